@@ -0,0 +1,138 @@
+"""
+Benchmark of the compressed storage of long post bodies.
+
+The same set of posts, with bodies from a few hundred bytes to several
+kilobytes, is loaded into two SQLite databases: one storing every body
+inline and one storing bodies over the threshold compressed in the
+`post_body` table. The script reports the size of each database and the
+latency of building the first page of `topic_posts`, and of reading the
+full content of a long post.
+
+    python benchmarks/bench_post_bodies.py --posts 5000 --threshold 1000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from common import measure, report, setup_environment
+
+setup_environment()
+
+from sqlalchemy import create_engine, insert, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from conf import get_settings  # noqa: E402
+from database.crud_factory import PostCRUD, SortKey  # noqa: E402
+from database.models import BaseModel, Post, PostBody, Topic  # noqa: E402
+from datastructures import PageParams  # noqa: E402
+from schemas import PaginatedResponse, PostSchema  # noqa: E402
+from utils import paginate  # noqa: E402
+
+WORDS = (
+    "library book loan author chapter shelf reader catalogue edition index "
+    "review novel archive borrow return reserve genre title page volume"
+).split()
+
+
+def fake_contents(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.choice([30, 80, 300, 1200])))
+        for _ in range(n)
+    ]
+
+
+def load(path: str, contents: list, topics: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    BaseModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(
+            insert(Topic),
+            [
+                {"title": f"Topic {i}", "category": "bench", "created_by": "bench"}
+                for i in range(topics)
+            ],
+        )
+        posts, bodies = [], []
+        for i, content in enumerate(contents, start=1):
+            preview, body = PostCRUD._split_body(content)
+            posts.append(
+                {
+                    "id": i,
+                    "content": preview,
+                    "author": "bench",
+                    "topic_id": i % topics + 1,
+                    "truncated": body is not None,
+                }
+            )
+            if body is not None:
+                bodies.append({"post_id": i, "content": body})
+        db.execute(insert(Post), posts)
+        if bodies:
+            db.execute(insert(PostBody), bodies)
+        db.commit()
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+            text("VACUUM")
+        )
+    engine.dispose()
+
+
+def first_page(db: Session, topic_id: int) -> bytes:
+    page = paginate(
+        PageParams(),
+        PostCRUD.get_many(db, topic_id, "topic_id", order_by=SortKey.POSTED_ON_DESC),
+    )
+    return (
+        PaginatedResponse[PostSchema]
+        .model_validate(page, from_attributes=True)
+        .model_dump_json()
+        .encode()
+    )
+
+
+def run(label: str, threshold: int, contents: list, topics: int, results: dict):
+    get_settings().POST_COMPRESSION_THRESHOLD = threshold
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "posts.sqlite3")
+        load(path, contents, topics)
+        results["size"][label] = os.path.getsize(path) / 1024
+        engine = create_engine(f"sqlite:///{path}")
+        with Session(engine) as db:
+            long_post = db.scalar(
+                select(Post.id).order_by(Post.truncated.desc(), Post.id).limit(1)
+            )
+            results["page"][label] = measure(
+                lambda: first_page(db, 1), repeat=3, number=200
+            )
+            results["page bytes"][label] = len(first_page(db, 1)) / 1024
+            results["full post"][label] = measure(
+                lambda: PostCRUD.get_full(db, long_post), repeat=3, number=200
+            )
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--threshold", type=int, default=1000)
+    args = parser.parse_args()
+
+    contents = fake_contents(args.posts)
+    results = {"size": {}, "page": {}, "page bytes": {}, "full post": {}}
+    run("inline", 0, contents, args.topics, results)
+    run(
+        f"compressed > {args.threshold}", args.threshold, contents, args.topics, results
+    )
+
+    report("Database size", results["size"], unit="KiB")
+    report("topic_posts first page", results["page"])
+    report("topic_posts first page body", results["page bytes"], unit="KiB")
+    report("PostCRUD.get_full of a long post", results["full post"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark of reactions to a single popular post.
+
+Threads react to the same post concurrently. The naive approach updates
+the count of the post in the transaction of each reaction, so every
+reaction waits for the lock of the same row. The reaction counter counts
+them in memory and adds them to the row in batches, once per flush.
+
+The per-user reaction rows, which are inserted in both cases, are left out
+to isolate the cost of the count. The script runs on a SQLite file, where
+a write locks the whole database; set the `which_db` and `db_*` variables
+to run it on PostgreSQL, where the contention is limited to the row.
+
+    python benchmarks/bench_reactions.py
+"""
+
+import threading
+import time
+
+from common import report, setup_environment
+
+setup_environment()
+
+from sqlalchemy import update  # noqa: E402
+
+from database.db_conf import SessionLocal, get_engine  # noqa: E402
+from database.models import (  # noqa: E402
+    BaseModel,
+    Post,
+    PostReactionCount,
+    Topic,
+)
+from database.reactions import add_reaction_counts  # noqa: E402
+from reactions import ReactionCounter  # noqa: E402
+
+THREADS = 8
+REACTIONS_PER_THREAD = 250
+FLUSH_INTERVAL = 0.05
+
+
+def react_naively(post_id: int) -> None:
+    with SessionLocal() as db:
+        for _ in range(REACTIONS_PER_THREAD):
+            db.execute(
+                update(PostReactionCount)
+                .where(
+                    PostReactionCount.post_id == post_id,
+                    PostReactionCount.kind == "like",
+                )
+                .values(count=PostReactionCount.count + 1)
+            )
+            db.commit()
+
+
+def react_with_counter(counter: ReactionCounter, post_id: int) -> None:
+    for _ in range(REACTIONS_PER_THREAD):
+        counter.add(post_id, "like", 1)
+
+
+def run_threads(target, *args) -> float:
+    threads = [threading.Thread(target=target, args=args) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    engine = get_engine()
+    BaseModel.metadata.drop_all(engine)
+    BaseModel.metadata.create_all(engine)
+    with SessionLocal() as db:
+        topic = Topic(title="Benchmark", category="bench", created_by="bench")
+        topic.posts = [Post(content="Popular", author="bench")]
+        db.add(topic)
+        db.commit()
+        post_id = topic.posts[0].id
+        add_reaction_counts(db.connection(), {(post_id, "like"): 0})
+        db.commit()
+
+    naive = run_threads(react_naively, post_id)
+
+    counter = ReactionCounter(shards=16, ttl=5.0, max_posts=100)
+    stop = threading.Event()
+
+    def flush_periodically() -> None:
+        while not stop.wait(FLUSH_INTERVAL):
+            counter.flush(SessionLocal)
+
+    flusher = threading.Thread(target=flush_periodically)
+    flusher.start()
+    counted = run_threads(react_with_counter, counter, post_id)
+    stop.set()
+    flusher.join()
+    start = time.perf_counter()
+    counter.flush(SessionLocal)
+    counted += time.perf_counter() - start
+
+    reactions = THREADS * REACTIONS_PER_THREAD
+    report(
+        f"Reactions per second, {THREADS} threads reacting to one post",
+        {
+            "row update per reaction": reactions / naive,
+            "in-memory counter": reactions / counted,
+        },
+        unit="/s",
+    )
+    print(f"  counter flushes: {counter.stats()['flushes']}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark of the service cold start.
+
+Two measures are taken in fresh interpreters:
+
+- the import time of the `main` module, with a ``-X importtime`` report
+  listing the slowest modules by cumulative import time;
+- the time needed to run the application lifespan until it is ready,
+  with the duration of each startup step.
+
+    python benchmarks/bench_startup.py --top 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import DEFAULT_ENVIRONMENT, SRC_DIR, report
+
+LIFESPAN_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+async def run():
+    async with app.router.lifespan_context(app):
+        return app.state.startup
+startup = asyncio.run(run())
+print(json.dumps({
+    "import": (imported - start) * 1000,
+    "lifespan": startup.total,
+    **{f"step {name}": value for name, value in startup.steps.items()},
+}))
+"""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=tempfile.gettempdir(),
+        env=DEFAULT_ENVIRONMENT | os.environ | {"PYTHONPATH": str(SRC_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_time_report(top: int) -> None:
+    start = time.perf_counter()
+    result = run_python("-X", "importtime", "-c", "import main")
+    wall_time = (time.perf_counter() - start) * 1000
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+        modules.append((int(cumulative_us), int(self_us), name.strip()))
+    report("Import of main", {"interpreter + imports (wall)": wall_time}, unit="ms")
+    print(f"  {len(modules)} modules imported")
+    print(f"Slowest {top} modules by cumulative import time")
+    for cumulative_us, self_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:>9.2f} ms  {self_us / 1000:>9.2f} ms  {name}")
+
+
+def lifespan_report(runs: int) -> None:
+    samples = [
+        json.loads(run_python("-c", LIFESPAN_SCRIPT).stdout.splitlines()[-1])
+        for _ in range(runs)
+    ]
+    report(
+        f"Startup pipeline, best of {runs} runs",
+        {key: min(sample[key] for sample in samples) for key in samples[0]},
+        unit="ms",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    import_time_report(args.top)
+    lifespan_report(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark of the statement build and compile overhead of `BaseCRUD.get_many`.
+
+The legacy implementation ordered the query with a raw ``text()`` clause and
+printed it, which compiled the statement on every call outside of
+SQLAlchemy's compiled statement cache. The current implementation reuses
+whitelisted ORDER BY clauses built once per CRUD class.
+"""
+
+from common import measure, report, setup_environment
+
+setup_environment()
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database.crud_factory import PostCRUD, SortKey  # noqa: E402
+from database.models import BaseModel, Post, Topic  # noqa: E402
+
+
+def legacy_get_many(db: Session, id_: int, column: str, order_by: str):
+    q = db.query(Post).order_by(text(order_by))
+    str(q)
+    if id_ and column:
+        q = q.where(getattr(Post, column) == id_)
+    return q
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    BaseModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        topic = Topic(title="Benchmark", category="bench", created_by="bench")
+        db.add(topic)
+        db.flush()
+        db.add_all(
+            Post(content=f"Post {i}", author="bench", topic_id=topic.id)
+            for i in range(50)
+        )
+        db.commit()
+        dialect = engine.dialect
+
+        results = {
+            "legacy build": measure(
+                lambda: legacy_get_many(db, topic.id, "topic_id", "posted_on desc")
+            ),
+            "current build": measure(
+                lambda: PostCRUD.get_many(
+                    db, topic.id, "topic_id", order_by=SortKey.POSTED_ON_DESC
+                )
+            ),
+            "legacy build+compile": measure(
+                lambda: legacy_get_many(
+                    db, topic.id, "topic_id", "posted_on desc"
+                ).statement.compile(dialect=dialect)
+            ),
+            "current build+compile": measure(
+                lambda: PostCRUD.get_many(
+                    db, topic.id, "topic_id", order_by=SortKey.POSTED_ON_DESC
+                ).statement.compile(dialect=dialect)
+            ),
+            "legacy build+execute": measure(
+                lambda: legacy_get_many(db, topic.id, "topic_id", "posted_on desc")
+                .limit(10)
+                .all()
+            ),
+            "current build+execute": measure(
+                lambda: PostCRUD.get_many(
+                    db, topic.id, "topic_id", order_by=SortKey.POSTED_ON_DESC
+                )
+                .limit(10)
+                .all()
+            ),
+        }
+    report("BaseCRUD.get_many statement overhead per request", results)
+
+
+if __name__ == "__main__":
+    main()
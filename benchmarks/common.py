@@ -0,0 +1,97 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The scripts are meant to be run from the repository root, for example:
+
+    python benchmarks/bench_statement_cache.py
+"""
+
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+DEFAULT_ENVIRONMENT = {
+    "which_db": "sqlite",
+    "db_name": ":memory:",
+    "jwt_secret": "benchmark_secret",
+    "jwt_alg": "HS256",
+}
+
+
+def setup_environment() -> None:
+    """
+    Make the application modules importable and provide default settings.
+
+    Variables already defined in the environment take precedence over the defaults.
+    """
+    for key, value in DEFAULT_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+
+def measure(func: Callable[[], object], repeat: int = 5, number: int = 1000) -> float:
+    """
+    Measure the best average duration of a callable.
+
+    Args:
+        func (Callable[[], object]): The callable to measure.
+        repeat (int): The number of measurement rounds.
+        number (int): The number of calls per round.
+
+    Returns:
+        float: The best average duration of a single call, in microseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1_000_000
+
+
+def measure_allocation(func: Callable[[], object], number: int = 200) -> float:
+    """
+    Measure the median peak memory allocated by a single call of a callable.
+
+    Args:
+        func (Callable[[], object]): The callable to measure.
+        number (int): The number of measured calls.
+
+    Returns:
+        float: The median peak allocation of a single call, in bytes.
+    """
+    func()
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(number):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks)
+
+
+def report(title: str, results: Dict[str, float], unit: str = "us") -> None:
+    """
+    Print benchmark results as an aligned table.
+
+    Args:
+        title (str): The title of the benchmark.
+        results (Dict[str, float]): The measured values, by label.
+        unit (str): The unit of the measured values.
+    """
+    print(title)
+    width = max(len(label) for label in results)
+    for label, value in results.items():
+        print(f"  {label:<{width}}  {value:>12.2f} {unit}")
@@ -0,0 +1,293 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Callable, Deque, Dict, Iterable, Optional
+
+from conf import get_settings
+from datastructures import PageParams
+from schemas import PaginatedResponse, PostSchema
+
+POST_OVERHEAD_BYTES = 256
+GENERATION_SLOTS = 4096
+
+
+def _post_size(post: PostSchema) -> int:
+    return POST_OVERHEAD_BYTES + len(post.content) + len(post.author)
+
+
+class _TopicPosts:
+    """
+    A ring buffer of the newest posts of a topic, most recent first, along
+    with the topic post count and the time it expires at.
+    """
+
+    __slots__ = ("posts", "total", "size_bytes", "expires_at")
+
+    def __init__(
+        self,
+        posts: Iterable[PostSchema],
+        total: int,
+        capacity: int,
+        expires_at: float,
+    ):
+        self.posts: Deque[PostSchema] = deque(posts, maxlen=capacity)
+        self.total = total
+        self.size_bytes = sum(_post_size(post) for post in self.posts)
+        self.expires_at = expires_at
+
+    def is_complete(self, size: int) -> bool:
+        return len(self.posts) >= size or len(self.posts) == self.total
+
+    def push(self, post: PostSchema) -> int:
+        if any(cached.id == post.id for cached in self.posts):
+            return self.replace(post)
+        dropped = self.posts[-1] if len(self.posts) == self.posts.maxlen else None
+        self.posts.appendleft(post)
+        self.total += 1
+        delta = _post_size(post) - (_post_size(dropped) if dropped else 0)
+        self.size_bytes += delta
+        return delta
+
+    def replace(self, post: PostSchema) -> int:
+        for i, cached in enumerate(self.posts):
+            if cached.id == post.id:
+                self.posts[i] = post
+                delta = _post_size(post) - _post_size(cached)
+                self.size_bytes += delta
+                return delta
+        return 0
+
+
+class HotPostCache:
+    """
+    A class keeping the first page of the posts of the most read topics in memory.
+
+    Each topic holds a ring buffer of its `page_size` newest posts, filled
+    lazily by the first read of its first page and kept up to date by
+    the post CRUD operations (write-through). Topics are evicted in least
+    recently used order when there are more than `max_topics` of them or
+    when their estimated memory footprint exceeds `max_bytes`.
+
+    The cache is local to the process: writes made by other workers are
+    only visible once the topic is evicted, invalidated or expired. A topic
+    expires `ttl` seconds after it was read from the database, however
+    often it is read or written through since.
+
+    Every write through bumps the generation of its topic, whether the topic
+    is cached or not. A page read from the database is only stored when
+    the generation of its topic did not change since the read started, so
+    that a read racing with a write never caches a page missing the write.
+    Generations are kept in a fixed number of slots shared by topics, so a
+    write may also prevent a page of another topic from being stored.
+
+    Attributes:
+        page_size (int): The number of newest posts kept per topic.
+        max_topics (int): The maximum number of cached topics.
+        max_bytes (int): The maximum estimated size of the cached posts.
+        ttl (float): The number of seconds a topic is cached for.
+        hits (int): The number of pages served from the cache.
+        misses (int): The number of first pages not found in the cache.
+    """
+
+    def __init__(
+        self,
+        page_size: int,
+        max_topics: int,
+        max_bytes: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.page_size = page_size
+        self.max_topics = max_topics
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._topics: OrderedDict[int, _TopicPosts] = OrderedDict()
+        self._size_bytes = 0
+        self._generations = [0] * GENERATION_SLOTS
+        self._lock = threading.Lock()
+
+    def _is_cacheable(self, page_params: PageParams) -> bool:
+        return page_params.page == 1 and page_params.size <= self.page_size
+
+    def get_page(
+        self, topic_id: int, page_params: PageParams
+    ) -> Optional[PaginatedResponse[PostSchema]]:
+        """
+        Gets the first page of a topic's posts from the cache.
+
+        Args:
+            topic_id (int): The ID of the topic.
+            page_params (PageParams): The pagination parameters.
+
+        Returns:
+            Optional[PaginatedResponse[PostSchema]]: The page, or None if it is
+            not the first page or not cached.
+        """
+        if not self._is_cacheable(page_params):
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._topics.get(topic_id)
+            if entry is not None and entry.expires_at <= now:
+                self._replace(topic_id, None)
+                entry = None
+            if entry is None or not entry.is_complete(page_params.size):
+                self.misses += 1
+                return None
+            self._topics.move_to_end(topic_id)
+            self.hits += 1
+            return PaginatedResponse[PostSchema](
+                total=entry.total,
+                page=1,
+                size=page_params.size,
+                data=list(entry.posts)[: page_params.size],
+            )
+
+    def generation(self, topic_id: int) -> int:
+        """
+        Gets the generation of a topic, to be read before its posts.
+
+        Args:
+            topic_id (int): The ID of the topic.
+
+        Returns:
+            int: The generation.
+        """
+        with self._lock:
+            return self._generations[topic_id % GENERATION_SLOTS]
+
+    def store_page(
+        self,
+        topic_id: int,
+        page_params: PageParams,
+        page: PaginatedResponse,
+        generation: int,
+    ) -> bool:
+        """
+        Caches the first page of a topic's posts read from the database.
+
+        Args:
+            topic_id (int): The ID of the topic.
+            page_params (PageParams): The pagination parameters of the page.
+            page (PaginatedResponse): The page, containing `Post` records.
+            generation (int): The generation of the topic before the read.
+
+        Returns:
+            bool: True if the page was stored, False if it is not the first
+            page or if the topic was written since the read started.
+        """
+        if not self._is_cacheable(page_params):
+            return False
+        posts = [
+            PostSchema.model_validate(post, from_attributes=True) for post in page.data
+        ]
+        entry = _TopicPosts(posts, page.total, self.page_size, self._clock() + self.ttl)
+        with self._lock:
+            if self._generations[topic_id % GENERATION_SLOTS] != generation:
+                return False
+            self._replace(topic_id, entry)
+            return True
+
+    def add(self, topic_id: int, post: PostSchema) -> None:
+        """
+        Adds a newly created post at the head of its topic's buffer, if cached.
+
+        Args:
+            topic_id (int): The ID of the topic.
+            post (PostSchema): The created post.
+        """
+        with self._lock:
+            self._bump(topic_id)
+            if (entry := self._topics.get(topic_id)) is not None:
+                self._size_bytes += entry.push(post)
+                self._evict()
+
+    def replace(self, topic_id: int, post: PostSchema) -> None:
+        """
+        Replaces an updated post in its topic's buffer, if cached.
+
+        Args:
+            topic_id (int): The ID of the topic.
+            post (PostSchema): The updated post.
+        """
+        with self._lock:
+            self._bump(topic_id)
+            if (entry := self._topics.get(topic_id)) is not None:
+                self._size_bytes += entry.replace(post)
+                self._evict()
+
+    def invalidate(self, topic_id: int) -> None:
+        """
+        Drops a topic from the cache.
+
+        Args:
+            topic_id (int): The ID of the topic.
+        """
+        with self._lock:
+            self._bump(topic_id)
+            self._replace(topic_id, None)
+
+    def clear(self) -> None:
+        """
+        Drops all the topics from the cache.
+        """
+        with self._lock:
+            self._topics.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports the cache usage.
+
+        Returns:
+            Dict[str, int]: The number of cached topics, their estimated size,
+            and the number of hits and misses.
+        """
+        return {
+            "topics": len(self._topics),
+            "size_bytes": self._size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _bump(self, topic_id: int) -> None:
+        self._generations[topic_id % GENERATION_SLOTS] += 1
+
+    def _replace(self, topic_id: int, entry: Optional[_TopicPosts]) -> None:
+        previous = self._topics.pop(topic_id, None)
+        if previous is not None:
+            self._size_bytes -= previous.size_bytes
+        if entry is None:
+            return
+        self._topics[topic_id] = entry
+        self._size_bytes += entry.size_bytes
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._topics and (
+            len(self._topics) > self.max_topics or self._size_bytes > self.max_bytes
+        ):
+            _, evicted = self._topics.popitem(last=False)
+            self._size_bytes -= evicted.size_bytes
+
+
+@lru_cache()
+def get_hot_post_cache() -> Optional[HotPostCache]:
+    """
+    Get the hot post cache of the process.
+
+    Returns:
+        Optional[HotPostCache]: The cache, or None if it is disabled.
+    """
+    if not get_settings().HOT_CACHE_ENABLED:
+        return None
+    return HotPostCache(
+        get_settings().HOT_CACHE_PAGE_SIZE,
+        get_settings().HOT_CACHE_MAX_TOPICS,
+        get_settings().HOT_CACHE_MAX_BYTES,
+        get_settings().HOT_CACHE_TTL_SECONDS,
+    )
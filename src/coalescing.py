@@ -0,0 +1,71 @@
+import asyncio
+from typing import Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    A class coalescing identical concurrent calls into a single execution.
+
+    The first caller of a key runs the function in a worker thread, keeping
+    the event loop free, and the callers arriving while it is in flight
+    await the same result instead of running it again. Once the execution
+    completes, the next call of the key runs the function again, so results
+    are never served stale.
+
+    Attributes:
+        executions (int): The number of calls which ran the function.
+        coalesced (int): The number of calls served by another call's execution.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        Runs a function, or waits for the in-flight execution of the same key.
+
+        The execution is shielded from the cancellation of its callers, so a
+        client disconnecting does not fail the other waiters.
+
+        Args:
+            key (Hashable): The key identifying identical calls, e.g. a route and its parameters.
+            func (Callable[[], T]): The blocking function to run.
+
+        Returns:
+            T: The result of the function. The same object is returned to all
+            the coalesced callers, so it must not be mutated.
+
+        Raises:
+            Exception: Any exception raised by the function, to all the coalesced callers.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(func))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports the coalescing counters.
+
+        Returns:
+            Dict[str, int]: The number of executions, of coalesced calls and
+            of executions in flight.
+        """
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
@@ -1,8 +1,23 @@
 from functools import lru_cache
+from typing import Dict, List, Optional
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class CachePolicy(BaseModel):
+    """
+    A model representing the HTTP caching policy of a route.
+
+    Public responses may be stored by shared caches, keyed by the `token`
+    request header; private responses only by the cache of the client.
+    """
+
+    max_age: int
+    stale_while_revalidate: int = 0
+    public: bool = True
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -11,8 +26,86 @@ class Settings(BaseSettings):
     DB_USERNAME: str = ""
     DB_PASSWORD: str = ""
     DB_HOST: str = ""
-    JWT_SECRET: str
-    JWT_ALG: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 0
+    DB_POOL_WARMUP: int = 0
+    DB_PROBE_TTL_SECONDS: float = 5.0
+    DB_LIMITER_ENABLED: bool = True
+    DB_LIMITER_MIN: int = 1
+    DB_LIMITER_TARGET_LATENCY_SECONDS: float = 0.25
+    DB_LIMITER_QUEUE_SIZE: int = 100
+    DB_LIMITER_WRITE_TIMEOUT_SECONDS: float = 2.0
+    DB_LIMITER_BROWSE_TIMEOUT_SECONDS: float = 0.5
+    JWT_SECRET: str = ""
+    JWT_ALG: str = "HS256"
+    JWT_JWKS_SOURCE: str = ""
+    JWT_JWKS_ALGORITHMS: List[str] = ["RS256", "ES256", "EdDSA"]
+    JWT_JWKS_REFRESH_SECONDS: float = 300.0
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    COMPRESSION_ENCODINGS: List[str] = ["br", "zstd", "gzip"]
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "text/"]
+    SKIP_SCHEMA_CHECK: bool = False
+    SERVER_TIMING_ENABLED: bool = False
+    HTTP_CACHE_ENABLED: bool = False
+    HTTP_CACHE_POLICIES: Dict[str, CachePolicy] = {
+        "GET /api/forum/topics/": CachePolicy(max_age=5, stale_while_revalidate=30),
+        "GET /api/forum/topics/latest-posts/": CachePolicy(
+            max_age=5, stale_while_revalidate=30
+        ),
+        "GET /api/forum/topics/{topic_id}/": CachePolicy(
+            max_age=30, stale_while_revalidate=60
+        ),
+        "GET /api/forum/topics/{topic_id}/posts/": CachePolicy(
+            max_age=5, stale_while_revalidate=30
+        ),
+        "GET /api/forum/posts/{post_id}/": CachePolicy(
+            max_age=30, stale_while_revalidate=60
+        ),
+        "GET /api/forum/users/{name}/posts/": CachePolicy(
+            max_age=10, stale_while_revalidate=60
+        ),
+    }
+    HTTP_CACHE_PURGE_URL: str = ""
+    HTTP_CACHE_PURGE_TIMEOUT_SECONDS: float = 2.0
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: float = 30.0
+    QUERY_BUDGET_DEFAULT: Optional[int] = None
+    QUERY_BUDGETS: Dict[str, int] = {}
+    QUERY_BUDGET_STRICT: bool = False
+    HOT_CACHE_ENABLED: bool = False
+    HOT_CACHE_PAGE_SIZE: int = 10
+    HOT_CACHE_MAX_TOPICS: int = 1000
+    HOT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    HOT_CACHE_TTL_SECONDS: float = 5.0
+    POST_COMPRESSION_THRESHOLD: int = 0
+    POST_PREVIEW_LENGTH: int = 500
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_MAX_KEYS: int = 100_000
+    IDEMPOTENCY_MAX_BYTES: int = 64 * 1024 * 1024
+    SOFT_DELETE: bool = True
+    PURGE_INTERVAL_SECONDS: float = 60.0
+    PURGE_BATCH_SIZE: int = 500
+    TOMBSTONE_RETENTION_DAYS: float = 30.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: float = 2.0
+    # Reactions are counted in memory and flushed every interval: a process
+    # killed between two flushes loses the reactions it counted in the
+    # meantime from the counts. The audit reports the drifted counts as
+    # `reactions.drifted_counts` in /metrics; rebuild them with
+    # `python -m database.reactions` while the application is stopped.
+    REACTIONS_SHARDS: int = 16
+    REACTIONS_FLUSH_INTERVAL_SECONDS: float = 1.0
+    REACTIONS_CACHE_TTL_SECONDS: float = 5.0
+    REACTIONS_CACHE_MAX_POSTS: int = 10_000
+    REACTIONS_AUDIT_INTERVAL_SECONDS: float = 15 * 60.0
+    ARCHIVE_DIRECTORY: str = "archive"
+    ARCHIVE_INACTIVE_DAYS: int = 365
+    ARCHIVE_BLOCK_SIZE: int = 100
+    ARCHIVE_MAX_OPEN_FILES: int = 64
+    ARCHIVE_SHARED_STORAGE: bool = False
 
 
 @lru_cache()
@@ -0,0 +1,462 @@
+"""
+Archival of cold topics to compressed block files.
+
+Topics without any activity for a number of days are archived: their live
+posts are written to a file of the archive directory, then removed from
+the `post` table in the transaction marking the topic as archived. The
+`topic` row stays as a stub, so that topics are listed as before, and the
+posts of an archived topic are served read-only from its file. Archived
+posts stay counted in the post counts of their authors, but are not listed
+with the other posts of their authors. Moderators
+may still delete an archived topic, whose file is removed with its row.
+
+An archive file holds the posts of a topic, most recent first, in blocks
+of a fixed number of posts. Each block stores the values of each field in
+a list, as a JSON object compressed with zstd when the optional
+`zstandard` package is installed, else with zlib. The file ends with a
+compressed JSON footer giving the topic and the offset of every block,
+then the size of the footer, so that a page is read by decompressing only
+the blocks it overlaps. Files are memory-mapped on first read.
+
+Archiving removes posts for good from the database: sync clients with an
+older change token are asked to reset. Every replica of the API reads the
+archive directory, so it must be a volume shared by all of them and by the
+archiving job, which is declared with `ARCHIVE_SHARED_STORAGE`: archiving
+refuses to run otherwise. Usage, from the `src` directory:
+
+    python -m database.archive
+    python -m database.archive --inactive-days 730 --limit 100
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from conf import get_settings
+from database.changes import change_stamp, mark_purged
+from database.crud_factory import delete_post_dependents
+from database.models import Post, PostBody, Topic
+from database.post_bodies import compress_body, decompress_body
+from database.post_counts import keep_archived_counts
+from datastructures import PageParams
+from schemas import PaginatedResponse, PostSchema, TopicSchema
+
+MAGIC = b"FORUMARC\x01"
+FOOTER_SIZE = struct.Struct("<Q")
+POST_FIELDS = ("id", "content", "author", "posted_on", "updated_at")
+
+
+def archive_path(directory: Path, topic_id: int) -> Path:
+    return directory / f"topic-{topic_id}.arc"
+
+
+def _encode_block(posts: List[Dict[str, object]]) -> bytes:
+    columns = {field: [post[field] for post in posts] for field in POST_FIELDS}
+    return compress_body(json.dumps(columns, default=datetime.isoformat))
+
+
+def _decode_block(data: bytes) -> List[PostSchema]:
+    columns = json.loads(decompress_body(data))
+    return [
+        PostSchema.model_validate(dict(zip(POST_FIELDS, values)))
+        for values in zip(*(columns[field] for field in POST_FIELDS))
+    ]
+
+
+def write_archive(
+    path: Path,
+    topic: TopicSchema,
+    posts: Iterable[Dict[str, object]],
+    block_size: int,
+) -> int:
+    """
+    Write the archive file of a topic, atomically.
+
+    Args:
+        path (Path): The archive file.
+        topic (TopicSchema): The archived topic.
+        posts (Iterable[Dict[str, object]]): The fields of its posts, most
+        recent first.
+        block_size (int): The number of posts of a block.
+
+    Returns:
+        int: The number of archived posts.
+    """
+    posts = list(posts)
+    blocks: List[Tuple[int, int]] = []
+    temporary = path.with_suffix(".tmp")
+    with temporary.open("wb") as file:
+        file.write(MAGIC)
+        for start in range(0, len(posts), block_size):
+            block = _encode_block(posts[start : start + block_size])
+            blocks.append((file.tell(), len(block)))
+            file.write(block)
+        footer = compress_body(
+            json.dumps(
+                {
+                    "topic": topic.model_dump(mode="json"),
+                    "total": len(posts),
+                    "block_size": block_size,
+                    "blocks": blocks,
+                }
+            )
+        )
+        file.write(footer)
+        file.write(FOOTER_SIZE.pack(len(footer)))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    return len(posts)
+
+
+class TopicArchive:
+    """
+    A class reading the posts of an archived topic from its memory-mapped file.
+
+    Attributes:
+        total (int): The number of archived posts.
+        block_size (int): The number of posts of a block.
+    """
+
+    def __init__(self, path: Path):
+        with path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a topic archive")
+        end = len(self._map) - FOOTER_SIZE.size
+        (footer_size,) = FOOTER_SIZE.unpack(self._map[end:])
+        footer = json.loads(decompress_body(self._map[end - footer_size : end]))
+        self.total: int = footer["total"]
+        self.block_size: int = footer["block_size"]
+        self._blocks: List[Tuple[int, int]] = footer["blocks"]
+
+    def read(self, offset: int, limit: int) -> List[PostSchema]:
+        """
+        Read posts, decompressing only the blocks holding them.
+
+        Args:
+            offset (int): The number of posts to skip.
+            limit (int): The maximum number of posts to read.
+
+        Returns:
+            List[PostSchema]: The posts, most recent first.
+        """
+        if offset >= self.total or limit <= 0:
+            return []
+        first = offset // self.block_size
+        last = min(offset + limit - 1, self.total - 1) // self.block_size
+        posts: List[PostSchema] = []
+        for start, length in self._blocks[first : last + 1]:
+            posts += _decode_block(self._map[start : start + length])
+        skip = offset - first * self.block_size
+        return posts[skip : skip + limit]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class ArchiveStore:
+    """
+    A class serving the posts of archived topics, keeping the most recently
+    read archives memory-mapped.
+
+    Attributes:
+        directory (Path): The archive directory.
+        max_open (int): The maximum number of memory-mapped archives.
+    """
+
+    def __init__(self, directory: Path, max_open: int):
+        self.directory = directory
+        self.max_open = max_open
+        self._archives: OrderedDict[int, TopicArchive] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _open(self, topic_id: int) -> Optional[TopicArchive]:
+        with self._lock:
+            if (archive := self._archives.get(topic_id)) is not None:
+                self._archives.move_to_end(topic_id)
+                return archive
+        path = archive_path(self.directory, topic_id)
+        if not path.is_file():
+            return None
+        archive = TopicArchive(path)
+        with self._lock:
+            if topic_id in self._archives:
+                archive.close()
+                return self._archives[topic_id]
+            self._archives[topic_id] = archive
+            while len(self._archives) > self.max_open:
+                _, evicted = self._archives.popitem(last=False)
+                evicted.close()
+        return archive
+
+    def get_page(
+        self, topic_id: int, page_params: PageParams
+    ) -> Optional[PaginatedResponse[PostSchema]]:
+        """
+        Read a page of the posts of an archived topic.
+
+        Args:
+            topic_id (int): The ID of the topic.
+            page_params (PageParams): The pagination parameters.
+
+        Returns:
+            Optional[PaginatedResponse[PostSchema]]: The page, or None if the
+            topic is not archived.
+        """
+        archive = self._open(topic_id)
+        if archive is None:
+            return None
+        return PaginatedResponse[PostSchema](
+            total=archive.total,
+            page=page_params.page,
+            size=page_params.size,
+            data=archive.read(
+                (page_params.page - 1) * page_params.size, page_params.size
+            ),
+        )
+
+    def remove(self, topic_id: int) -> None:
+        """
+        Remove the archive of a topic removed for good.
+
+        Args:
+            topic_id (int): The ID of the topic.
+        """
+        with self._lock:
+            archive = self._archives.pop(topic_id, None)
+        if archive is not None:
+            archive.close()
+        archive_path(self.directory, topic_id).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """
+        Unmap all the archives.
+        """
+        with self._lock:
+            for archive in self._archives.values():
+                archive.close()
+            self._archives.clear()
+
+
+@lru_cache()
+def get_archive_store() -> ArchiveStore:
+    """
+    Get the archive store of the process.
+
+    Returns:
+        ArchiveStore: The store.
+    """
+    return ArchiveStore(
+        Path(get_settings().ARCHIVE_DIRECTORY), get_settings().ARCHIVE_MAX_OPEN_FILES
+    )
+
+
+def read_archived_page(
+    db: Session, topic_id: int, page_params: PageParams
+) -> Optional[PaginatedResponse[PostSchema]]:
+    """
+    Read a page of the posts of a topic if it is archived and not deleted.
+
+    Args:
+        db (Session): The database session.
+        topic_id (int): The ID of the topic.
+        page_params (PageParams): The pagination parameters.
+
+    Returns:
+        Optional[PaginatedResponse[PostSchema]]: The page, or None if the
+        topic is not archived or deleted.
+
+    Raises:
+        FileNotFoundError: If the topic is archived but its file is missing.
+    """
+    archived_at = db.scalar(
+        select(Topic.archived_at).where(
+            Topic.id == topic_id, Topic.deleted_at.is_(None)
+        )
+    )
+    if archived_at is None:
+        return None
+    store = get_archive_store()
+    page = store.get_page(topic_id, page_params)
+    if page is None:
+        raise FileNotFoundError(archive_path(store.directory, topic_id))
+    return page
+
+
+def cold_topic_ids(db: Session, inactive_since: datetime, limit: int) -> List[int]:
+    """
+    Find the live topics without any activity since a date.
+
+    Args:
+        db (Session): The database session.
+        inactive_since (datetime): The date of the last allowed activity.
+        limit (int): The maximum number of topics.
+
+    Returns:
+        List[int]: The IDs of the topics, oldest first.
+    """
+    last_post = (
+        select(func.max(func.coalesce(Post.updated_at, Post.posted_on)))
+        .where(Post.topic_id == Topic.id)
+        .scalar_subquery()
+    )
+    return db.scalars(
+        select(Topic.id)
+        .where(
+            Topic.deleted_at.is_(None),
+            Topic.archived_at.is_(None),
+            func.coalesce(Topic.updated_at, Topic.created_on) < inactive_since,
+            or_(last_post.is_(None), last_post < inactive_since),
+        )
+        .order_by(Topic.id)
+        .limit(limit)
+    ).all()
+
+
+def archive_topic(
+    db: Session, topic_id: int, directory: Path, block_size: int
+) -> Optional[int]:
+    """
+    Archive the live posts of a topic and remove its posts from the database.
+
+    The topic is locked for the whole transaction, so that no post is added
+    to it meanwhile. The change counter is locked last, after the removed
+    posts, as every removal does. The file is written before the posts are
+    removed, and removed if the transaction fails.
+
+    Args:
+        db (Session): The database session.
+        topic_id (int): The ID of the topic.
+        directory (Path): The archive directory.
+        block_size (int): The number of posts of a block.
+
+    Returns:
+        int: The number of archived posts, None if the topic is not live or
+        already archived.
+
+    Raises:
+        ValueError: If the archive directory is not declared as shared storage.
+    """
+    if not get_settings().ARCHIVE_SHARED_STORAGE:
+        raise ValueError(
+            "The archive directory must be a volume shared by every replica, "
+            "set ARCHIVE_SHARED_STORAGE once it is"
+        )
+    topic_obj = db.scalars(
+        select(Topic)
+        .where(
+            Topic.id == topic_id,
+            Topic.deleted_at.is_(None),
+            Topic.archived_at.is_(None),
+        )
+        .with_for_update()
+    ).first()
+    if topic_obj is None:
+        return None
+    topic = TopicSchema.model_validate(topic_obj, from_attributes=True)
+    rows = db.execute(
+        select(
+            Post.id,
+            Post.content,
+            PostBody.content.label("body"),
+            Post.author,
+            Post.posted_on,
+            Post.updated_at,
+        )
+        .outerjoin(PostBody, PostBody.post_id == Post.id)
+        .where(Post.topic_id == topic_id, Post.deleted_at.is_(None))
+        .order_by(Post.posted_on.desc(), Post.id.desc())
+    )
+    posts = (
+        row._asdict()
+        | {"content": decompress_body(row.body) if row.body else row.content}
+        for row in rows
+    )
+    path = archive_path(directory, topic_id)
+    archived = write_archive(path, topic, posts, block_size)
+    try:
+        keep_archived_counts(db, topic_id)
+        delete_post_dependents(db, select(Post.id).where(Post.topic_id == topic_id))
+        db.execute(
+            delete(Post).where(Post.topic_id == topic_id),
+            execution_options={"synchronize_session": False},
+        )
+        db.execute(
+            update(Topic)
+            .where(Topic.id == topic_id)
+            .values(change_stamp(db) | {"archived_at": datetime.today()})
+        )
+        mark_purged(db)
+        db.commit()
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return archived
+
+
+def archive_cold_topics(
+    db: Session, directory: Path, inactive_days: int, block_size: int, limit: int
+) -> Dict[int, int]:
+    """
+    Archive the topics without any activity for a number of days.
+
+    Args:
+        db (Session): The database session.
+        directory (Path): The archive directory.
+        inactive_days (int): The number of days without activity.
+        block_size (int): The number of posts of a block.
+        limit (int): The maximum number of topics to archive.
+
+    Returns:
+        Dict[int, int]: The number of archived posts, by topic ID.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    inactive_since = datetime.today() - timedelta(days=inactive_days)
+    archived = {}
+    for topic_id in cold_topic_ids(db, inactive_since, limit):
+        count = archive_topic(db, topic_id, directory, block_size)
+        if count is not None:
+            archived[topic_id] = count
+    return archived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--inactive-days", type=int, default=get_settings().ARCHIVE_INACTIVE_DAYS
+    )
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    from database.db_conf import SessionLocal, get_engine
+
+    get_engine()
+    with SessionLocal() as db:
+        archived = archive_cold_topics(
+            db,
+            Path(get_settings().ARCHIVE_DIRECTORY),
+            args.inactive_days,
+            get_settings().ARCHIVE_BLOCK_SIZE,
+            args.limit,
+        )
+    print(
+        f"Archived {sum(archived.values())} posts of {len(archived)} topics "
+        f"to {get_settings().ARCHIVE_DIRECTORY}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Connection,
+    Text,
+    case,
+    cast,
+    event,
+    func,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from database.models import CHANGE_POSITION_SEQ, ChangeSequence, Post, Topic
+from schemas import ChangesSchema, PostChangeSchema, TopicSchema
+
+CHANGE_SEQUENCE_ID = 1
+
+ChangePosition = Tuple[int, int]
+
+
+def _transaction_id() -> ColumnElement:
+    return cast(cast(func.pg_current_xact_id(), Text), BigInteger)
+
+
+def _counter_block(connection: Connection, count: int) -> int:
+    return connection.scalar(
+        update(ChangeSequence)
+        .where(ChangeSequence.id == CHANGE_SEQUENCE_ID)
+        .values(value=ChangeSequence.value + count)
+        .returning(ChangeSequence.value)
+    )
+
+
+def next_change_position(connection: Connection) -> ChangePosition:
+    """
+    Allocate the position of the next change, ordering changes for sync.
+
+    On PostgreSQL, the position is the ID of the writing transaction and a
+    number drawn from the `change_position_seq` sequence, so concurrent
+    writers never wait for each other. Since transactions do not commit in
+    the order of their numbers, readers only return the changes of settled
+    transactions, see `change_horizon`. SQLite has a single writer, so the
+    counter row numbers changes in commit order and serves as both.
+
+    Args:
+        connection (Connection): The connection of the writing transaction.
+
+    Returns:
+        ChangePosition: The transaction ID and the sequence number.
+    """
+    if connection.dialect.name == "postgresql":
+        row = connection.execute(
+            select(_transaction_id(), CHANGE_POSITION_SEQ.next_value())
+        ).one()
+        return row[0], row[1]
+    seq = _counter_block(connection, 1)
+    return seq, seq
+
+
+def reserve_change_positions(
+    connection: Connection, count: int
+) -> List[ChangePosition]:
+    """
+    Allocate the positions of several changes at once.
+
+    Args:
+        connection (Connection): The connection of the writing transaction.
+        count (int): The number of positions to allocate.
+
+    Returns:
+        List[ChangePosition]: The allocated positions, in order.
+    """
+    if connection.dialect.name == "postgresql":
+        xid = connection.scalar(select(_transaction_id()))
+        seqs = connection.scalars(
+            select(CHANGE_POSITION_SEQ.next_value()).select_from(
+                func.generate_series(1, count)
+            )
+        ).all()
+        return [(xid, seq) for seq in sorted(seqs)]
+    last = _counter_block(connection, count)
+    return [(seq, seq) for seq in range(last - count + 1, last + 1)]
+
+
+def change_stamp(db: Session) -> Dict[str, object]:
+    """
+    Build the values stamping a record changed by the current transaction.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        Dict[str, object]: The `change_xid`, `change_seq` and `updated_at` values.
+    """
+    xid, seq = next_change_position(db.connection())
+    return {"change_xid": xid, "change_seq": seq, "updated_at": datetime.today()}
+
+
+def mark_purged(db: Session, through: Optional[int] = None) -> None:
+    """
+    Invalidate the change tokens older than removed records.
+
+    Removing records locks the counter row, so callers lock it after the
+    records they remove.
+
+    Args:
+        db (Session): The database session.
+        through (Optional[int]): The highest `change_xid` of the removed
+        records. If None, any record changed so far may have been removed.
+    """
+    if through is None:
+        through = (
+            _transaction_id()
+            if db.get_bind().dialect.name == "postgresql"
+            else ChangeSequence.value
+        )
+    db.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.id == CHANGE_SEQUENCE_ID)
+        .values(
+            purged_through=case(
+                (ChangeSequence.purged_through < through, through),
+                else_=ChangeSequence.purged_through,
+            )
+        )
+    )
+
+
+def change_horizon(db: Session) -> Tuple[int, int]:
+    """
+    Read the oldest transaction ID that may still add changes and the
+    `change_xid` of the last removed records.
+
+    On PostgreSQL, the horizon is the oldest transaction running when the
+    snapshot is taken: every older transaction is settled, so no change can
+    ever be added below it. A long running transaction holds it back and
+    delays the sync of later changes until it ends.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        Tuple[int, int]: The horizon and `purged_through`.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        horizon = cast(
+            cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger
+        )
+    else:
+        horizon = ChangeSequence.value + 1
+    row = db.execute(
+        select(horizon, ChangeSequence.purged_through).where(
+            ChangeSequence.id == CHANGE_SEQUENCE_ID
+        )
+    ).one()
+    return row[0], row[1]
+
+
+def decode_change_token(token: str) -> ChangePosition:
+    """
+    Decode a change token, i.e. the position of the last change synced.
+
+    Args:
+        token (str): The token, formatted as `<transaction ID>.<sequence number>`.
+
+    Returns:
+        ChangePosition: The position.
+    """
+    xid, seq = token.split(".")
+    return int(xid), int(seq)
+
+
+def encode_change_token(position: ChangePosition) -> str:
+    """
+    Encode a change position into a change token.
+
+    Args:
+        position (ChangePosition): The position.
+
+    Returns:
+        str: The token.
+    """
+    return "%d.%d" % position
+
+
+def changes_since(db: Session, since: str, limit: int) -> ChangesSchema:
+    """
+    Read the topics and posts changed after a change token, oldest change first.
+
+    Only the changes of settled transactions are returned, so a change
+    committed later never lands behind a token already handed out. Deleted
+    records are returned as tombstones, i.e. their ID only. The posts of a
+    deleted topic get no tombstone of their own.
+
+    Args:
+        db (Session): The database session.
+        since (str): The change token of the client.
+        limit (int): The maximum number of changed records to return.
+
+    Returns:
+        ChangesSchema: The changes and the token to send next time. If the
+        token is older than purged records, no change is returned and the
+        client must reload its data before syncing from the returned token.
+    """
+    position = decode_change_token(since)
+    horizon, purged_through = change_horizon(db)
+    caught_up = encode_change_token((horizon, 0))
+    if position != (0, 0) and position[0] <= purged_through:
+        return ChangesSchema(token=caught_up, has_more=False, reset=True)
+    records: List[Union[Topic, Post]] = []
+    for model in (Topic, Post):
+        records += db.scalars(
+            select(model)
+            .where(
+                tuple_(model.change_xid, model.change_seq) > position,
+                model.change_xid < horizon,
+            )
+            .order_by(model.change_xid, model.change_seq)
+            .limit(limit + 1)
+        ).all()
+    records.sort(key=lambda record: (record.change_xid, record.change_seq))
+    has_more = len(records) > limit
+    records = records[:limit]
+    changes = ChangesSchema(
+        token=(
+            encode_change_token((records[-1].change_xid, records[-1].change_seq))
+            if has_more
+            else max(since, caught_up, key=decode_change_token)
+        ),
+        has_more=has_more,
+        reset=False,
+    )
+    for record in records:
+        if isinstance(record, Topic):
+            if record.deleted_at is None:
+                changes.topics.append(
+                    TopicSchema.model_validate(record, from_attributes=True)
+                )
+            else:
+                changes.deleted_topics.append(record.id)
+        elif record.deleted_at is None:
+            changes.posts.append(
+                PostChangeSchema.model_validate(record, from_attributes=True)
+            )
+        else:
+            changes.deleted_posts.append(record.id)
+    return changes
+
+
+@event.listens_for(Topic, "before_insert")
+@event.listens_for(Topic, "before_update")
+@event.listens_for(Post, "before_insert")
+@event.listens_for(Post, "before_update")
+def _stamp_flushed_record(mapper, connection: Connection, target) -> None:
+    target.change_xid, target.change_seq = next_change_position(connection)
+    target.updated_at = datetime.today()
@@ -1,12 +1,102 @@
 from abc import ABC
-from typing import Optional
+from datetime import datetime, timedelta
+from enum import StrEnum
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-from pydantic import BaseModel as ValidatedData
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    bindparam,
+    delete,
+    exists,
+    func,
+    insert,
+    inspect,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.query import RowReturningQuery
-from sqlalchemy.sql import text
+from sqlalchemy.sql.elements import UnaryExpression
 
-from database.models import BaseModel, Post, Topic
+from cache import get_hot_post_cache
+from conf import get_settings
+from database.changes import change_stamp, mark_purged
+from database.models import (
+    BaseModel,
+    Post,
+    PostBody,
+    PostReaction,
+    PostReactionCount,
+    PostRevision,
+    Topic,
+)
+from database.post_bodies import decompress_body, split_body
+from database.post_counts import (
+    count_posts,
+    uncount_archived_posts,
+    uncount_posts,
+)
+from database.revisions import encode_revision, replay_revisions
+from database.validation_schemas import ValidatedData
+from datastructures import RequesterData
+from http_cache import TOPICS_KEY, post_key, tag_response, topic_key, user_key
+from outbox import enqueue, has_handlers
+from permissions import write_criteria
+from schemas import PostRevisionSchema, PostSchema
+
+POST_DEPENDENTS = (PostBody, PostRevision, PostReaction, PostReactionCount)
+
+
+def delete_post_dependents(db: Session, post_ids: Select) -> None:
+    """
+    Hard delete the rows depending on posts about to be hard deleted.
+
+    The rows are deleted explicitly rather than by the ``ON DELETE CASCADE``
+    of their foreign keys, which SQLite does not enforce and which are
+    dropped when the `post` table is partitioned.
+
+    Args:
+        db (Session): The database session.
+        post_ids (Select): The query selecting the IDs of the posts.
+    """
+    for model in POST_DEPENDENTS:
+        db.execute(
+            delete(model).where(model.post_id.in_(post_ids)),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def tombstone_cutoff() -> datetime:
+    """
+    Compute the deletion date before which soft deleted records may be purged.
+
+    Returns:
+        datetime: The cutoff date.
+    """
+    return datetime.today() - timedelta(days=get_settings().TOMBSTONE_RETENTION_DAYS)
+
+
+def _remove_archive(topic_id: int) -> None:
+    # The archive module builds on this one.
+    from database.archive import get_archive_store
+
+    get_archive_store().remove(topic_id)
+
+
+class SortKey(StrEnum):
+    """
+    Enumeration of the sort keys accepted by `BaseCRUD.get_many`.
+
+    Each value is made of a column name and a direction.
+    """
+
+    ID_DESC = "id desc"
+    CREATED_ON_DESC = "created_on desc"
+    POSTED_ON_DESC = "posted_on desc"
 
 
 class BaseCRUD(ABC):
@@ -16,9 +106,90 @@ class BaseCRUD(ABC):
     This class provides generic methods for creating, reading, updating,
     and deleting records in a database. It is meant to be subclassed with
     a specific model class assigned to the `MODEL` attribute.
+
+    Subclasses whitelist the sort keys and filter columns they accept with
+    the `SORT_KEYS` and `FILTER_COLUMNS` attributes. The matching ORDER BY
+    clauses and the select statements are built once, when the subclass is
+    defined, so that every request reuses the same SQL constructs and hits
+    SQLAlchemy's compiled statement cache.
+
+    Records are soft deleted when the `SOFT_DELETE` setting is enabled: their
+    `deleted_at` column is set and reads filter them out, while `purge`
+    removes them later in bounded batches.
     """
 
     MODEL = None
+    OWNER_COLUMN: Optional[str] = None
+    SORT_KEYS: Tuple[SortKey, ...] = (SortKey.ID_DESC,)
+    FILTER_COLUMNS: Tuple[str, ...] = ()
+
+    _order_by_clauses: Dict[SortKey, Tuple[UnaryExpression, ...]] = {}
+    _get_one_stmt: Optional[Select] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.MODEL is None:
+            return
+        cls._order_by_clauses = {
+            sort_key: cls._build_order_by(sort_key) for sort_key in cls.SORT_KEYS
+        }
+        cls._get_one_stmt = select(cls.MODEL).where(
+            cls.MODEL.id == bindparam("id_"), cls._live()
+        )
+
+    @classmethod
+    def _not_deleted(cls) -> ColumnElement[bool]:
+        """
+        Build the criteria matching records which are not soft deleted themselves.
+
+        Returns:
+            ColumnElement[bool]: The filter criteria.
+        """
+        return cls.MODEL.deleted_at.is_(None)
+
+    @classmethod
+    def _live(cls) -> ColumnElement[bool]:
+        """
+        Build the criteria matching the records which reads and writes may see.
+
+        Returns:
+            ColumnElement[bool]: The filter criteria.
+        """
+        return cls._not_deleted()
+
+    @classmethod
+    def _purgeable(cls) -> ColumnElement[bool]:
+        """
+        Build the criteria matching soft deleted records ready to be purged.
+
+        Records are kept as tombstones for `TOMBSTONE_RETENTION_DAYS`, so
+        that sync clients catch up on deletions without reloading their data.
+
+        Returns:
+            ColumnElement[bool]: The filter criteria.
+        """
+        return cls.MODEL.deleted_at <= tombstone_cutoff()
+
+    @classmethod
+    def _build_order_by(cls, sort_key: SortKey) -> Tuple[UnaryExpression, ...]:
+        """
+        Build the ORDER BY clauses matching a sort key.
+
+        A descending id clause is appended as a tie-breaker, so that records
+        sharing the same sort value are always returned in the same order.
+
+        Args:
+            sort_key (SortKey): The sort key to build the clauses for.
+
+        Returns:
+            Tuple[UnaryExpression, ...]: The ORDER BY clauses.
+        """
+        column_name, direction = sort_key.split()
+        column = getattr(cls.MODEL, column_name)
+        clauses = (column.desc() if direction == "desc" else column.asc(),)
+        if column_name != "id":
+            clauses += (cls.MODEL.id.desc(),)
+        return clauses
 
     @classmethod
     def get_one(cls, db: Session, id_: int) -> BaseModel:
@@ -32,7 +203,7 @@ class BaseCRUD(ABC):
         Returns:
             BaseModel: The retrieved record.
         """
-        return db.query(cls.MODEL).where(cls.MODEL.id == id_).first()
+        return db.scalars(cls._get_one_stmt, {"id_": id_}).first()
 
     @classmethod
     def get_many(
@@ -40,7 +211,7 @@ class BaseCRUD(ABC):
         db: Session,
         id_: Optional[int | str] = None,
         column: Optional[str] = None,
-        order_by: str = "id desc",
+        order_by: SortKey = SortKey.ID_DESC,
     ) -> RowReturningQuery[tuple[BaseModel]]:
         """
         Retrieve multiple records based on optional filter criteria.
@@ -48,16 +219,28 @@ class BaseCRUD(ABC):
         Args:
             db (Session): The database session.
             id_ (Optional[int | str]): The ID or string value to filter by.
-            column (Optional[str]): The column name to apply the filter on.
-            order_by (str): The column on which the query should be ordered.
+            column (Optional[str]): The column name to apply the filter on,
+            must be one of `FILTER_COLUMNS`.
+            order_by (SortKey): The sort key on which the query should be ordered,
+            must be one of `SORT_KEYS`.
             The query will be ordered by descending id column by default.
 
         Returns:
             ScalarResult[BaseModel]: The result set of records.
+
+        Raises:
+            ValueError: If the sort key or the filter column is not whitelisted.
         """
-        q = db.query(cls.MODEL).order_by(text(order_by))
-        print(q, flush=True)
+        try:
+            order_by_clauses = cls._order_by_clauses[order_by]
+        except KeyError:
+            raise ValueError(f"{cls.MODEL.__name__} cannot be sorted by {order_by!r}")
+        q = db.query(cls.MODEL).where(cls._live()).order_by(*order_by_clauses)
         if id_ and column:
+            if column not in cls.FILTER_COLUMNS:
+                raise ValueError(
+                    f"{cls.MODEL.__name__} cannot be filtered on {column!r}"
+                )
             q = q.where(getattr(cls.MODEL, column) == id_)
         return q
 
@@ -73,9 +256,12 @@ class BaseCRUD(ABC):
         Returns:
             BaseModel: The created record.
         """
-        obj = cls.MODEL(**validated_data.model_dump(exclude_none=True))
+        obj = cls.MODEL(**validated_data)
         db.add(obj)
+        cls._enqueue(db, "created", obj)
         db.commit()
+        cls._after_create(obj)
+        tag_response(*cls.surrogate_keys(obj))
         return obj
 
     @classmethod
@@ -93,9 +279,12 @@ class BaseCRUD(ABC):
         Returns:
             BaseModel: The updated record.
         """
-        for k, v in validated_data.model_dump(exclude_none=True).items():
+        for k, v in validated_data.items():
             setattr(obj, k, v)
+        cls._enqueue(db, "updated", obj)
         db.commit()
+        cls._after_update(obj)
+        tag_response(*cls.surrogate_keys(obj))
         return obj
 
     @classmethod
@@ -103,6 +292,9 @@ class BaseCRUD(ABC):
         """
         Delete a record from the database.
 
+        When soft deletion is enabled, the record is only marked as deleted,
+        which costs a single UPDATE whatever the number of dependent records.
+
         Args:
             db (Session): The database session.
             obj (BaseModel): The record to delete.
@@ -110,10 +302,303 @@ class BaseCRUD(ABC):
         Returns:
             bool: True if the deletion was successful.
         """
-        db.delete(obj)
+        keys = cls.surrogate_keys(obj)
+        cls._before_delete(db, (cls.MODEL.id == obj.id, cls._not_deleted()))
+        if get_settings().SOFT_DELETE:
+            obj.deleted_at = datetime.today()
+        else:
+            cls._delete_dependents(db, (cls.MODEL.id == obj.id,))
+            db.expire(obj, [rel.key for rel in inspect(obj).mapper.relationships])
+            db.delete(obj)
+            db.flush()
+            mark_purged(db)
+        cls._enqueue(db, "deleted", obj)
+        db.commit()
+        cls._after_delete(obj)
+        tag_response(*keys)
+        return True
+
+    @classmethod
+    def _permitted(cls, id_: int, requester_data: RequesterData) -> tuple:
+        """
+        Build the criteria matching a live record the requester may modify.
+
+        Args:
+            id_ (int): The ID of the record.
+            requester_data (RequesterData): The requester data.
+
+        Returns:
+            tuple: The filter criteria.
+        """
+        owner_column = (
+            getattr(cls.MODEL, cls.OWNER_COLUMN) if cls.OWNER_COLUMN else None
+        )
+        return (
+            cls.MODEL.id == id_,
+            cls._live(),
+            write_criteria(owner_column, requester_data),
+        )
+
+    @classmethod
+    def _update_criteria(cls) -> tuple:
+        """
+        Build the criteria a record must also match to be updated, on top of
+        the ones of `_permitted`.
+
+        Returns:
+            tuple: The filter criteria.
+        """
+        return ()
+
+    @classmethod
+    def update_if_permitted(
+        cls,
+        db: Session,
+        id_: int,
+        validated_data: ValidatedData,
+        requester_data: RequesterData,
+    ) -> Optional[BaseModel]:
+        """
+        Update a record with a single conditional UPDATE statement.
+
+        The record is only updated if the requester owns it or is a moderator,
+        which is checked in the WHERE clause instead of loading the record first.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the record to update.
+            validated_data (ValidatedData): The data to update the record with.
+            requester_data (RequesterData): The requester data.
+
+        Returns:
+            Optional[BaseModel]: The updated record, or None if it does not exist
+            or the requester is not allowed to modify it.
+        """
+        criteria = (*cls._permitted(id_, requester_data), *cls._update_criteria())
+        if not validated_data:
+            return db.scalars(select(cls.MODEL).where(*criteria)).first()
+        values = validated_data | change_stamp(db)
+        cls._before_update(db, id_, criteria, values, requester_data)
+        obj = db.scalars(
+            update(cls.MODEL).where(*criteria).values(values).returning(cls.MODEL)
+        ).first()
+        if obj is not None:
+            cls._enqueue(db, "updated", obj)
         db.commit()
+        if obj is not None:
+            cls._after_update(obj)
+            tag_response(*cls.surrogate_keys(obj))
+        return obj
+
+    @classmethod
+    def delete_if_permitted(
+        cls, db: Session, id_: int, requester_data: RequesterData
+    ) -> bool:
+        """
+        Delete a record with a single conditional statement.
+
+        The record is only deleted if the requester owns it or is a moderator,
+        which is checked in the WHERE clause instead of loading the record first.
+        When soft deletion is enabled, the record is only marked as deleted.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the record to delete.
+            requester_data (RequesterData): The requester data.
+
+        Returns:
+            bool: True if the record was deleted, False if it does not exist or
+            the requester is not allowed to delete it.
+        """
+        criteria = cls._permitted(id_, requester_data)
+        if get_settings().SOFT_DELETE:
+            stmt = (
+                update(cls.MODEL)
+                .where(*criteria)
+                .values(deleted_at=datetime.today(), **change_stamp(db))
+            )
+            cls._before_delete(db, criteria)
+        else:
+            cls._before_delete(db, criteria)
+            cls._delete_dependents(db, criteria)
+            stmt = delete(cls.MODEL).where(*criteria)
+        obj = db.scalars(stmt.returning(cls.MODEL)).first()
+        if obj is None:
+            db.commit()
+            return False
+        keys = cls.surrogate_keys(obj)
+        cls._enqueue(db, "deleted", obj)
+        if not get_settings().SOFT_DELETE:
+            mark_purged(db)
+            # The commit would expire the record, whose row is gone.
+            db.expunge(obj)
+        db.commit()
+        cls._after_delete(obj)
+        tag_response(*keys)
         return True
 
+    @classmethod
+    def _enqueue(cls, db: Session, event: str, obj: BaseModel) -> None:
+        """
+        Enqueue the side effects of a write in its transaction, if the write
+        has handlers.
+
+        Args:
+            db (Session): The database session.
+            event (str): The write, i.e. ``created``, ``updated`` or ``deleted``.
+            obj (BaseModel): The written record.
+        """
+        kind = f"{cls.MODEL.__tablename__}.{event}"
+        if has_handlers(kind):
+            db.flush()
+            enqueue(db, kind, cls._task_payload(obj))
+
+    @classmethod
+    def _task_payload(cls, obj: BaseModel) -> dict:
+        """
+        Build the payload of the outbox tasks of a write.
+
+        Args:
+            obj (BaseModel): The written record.
+
+        Returns:
+            dict: The arguments of the handlers.
+        """
+        return {"id": obj.id}
+
+    @classmethod
+    def surrogate_keys(cls, obj: BaseModel) -> Tuple[str, ...]:
+        """
+        List the surrogate keys of the cached responses a change of a record
+        makes stale, which the response of the change is tagged with.
+
+        Args:
+            obj (BaseModel): The changed record.
+
+        Returns:
+            Tuple[str, ...]: The surrogate keys.
+        """
+        return ()
+
+    @classmethod
+    def _after_create(cls, obj: BaseModel) -> None:
+        """
+        Hook called once a record has been created and committed.
+
+        Args:
+            obj (BaseModel): The created record.
+        """
+
+    @classmethod
+    def _before_update(
+        cls,
+        db: Session,
+        id_: int,
+        criteria: tuple,
+        values: dict,
+        requester_data: RequesterData,
+    ) -> None:
+        """
+        Hook called in the transaction of a conditional update, before the UPDATE.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the record about to be updated.
+            criteria (tuple): The criteria the record must match to be updated.
+            values (dict): The values about to be set.
+            requester_data (RequesterData): The requester data.
+        """
+
+    @classmethod
+    def _after_update(cls, obj: BaseModel) -> None:
+        """
+        Hook called once a record has been updated and committed.
+
+        Args:
+            obj (BaseModel): The updated record.
+        """
+
+    @classmethod
+    def _after_delete(cls, obj: BaseModel) -> None:
+        """
+        Hook called once a record has been deleted and committed.
+
+        Args:
+            obj (BaseModel): The deleted record.
+        """
+
+    @classmethod
+    def _purge_columns(cls) -> tuple:
+        """
+        List the columns read along with the IDs of the records about to be
+        purged, and passed to `_after_purge`.
+
+        Returns:
+            tuple: The columns.
+        """
+        return ()
+
+    @classmethod
+    def _after_purge(cls, rows: Sequence[Row]) -> None:
+        """
+        Hook called once a batch of records has been purged and committed.
+
+        Args:
+            rows (Sequence[Row]): The ID, change sequence number and purge
+            columns of the purged records.
+        """
+
+    @classmethod
+    def _before_delete(cls, db: Session, criteria: tuple) -> None:
+        """
+        Hook called in the transaction of a deletion, before the records are
+        deleted or marked as deleted.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the records must match to be deleted.
+        """
+
+    @classmethod
+    def _delete_dependents(cls, db: Session, criteria: tuple) -> None:
+        """
+        Hard delete the records depending on records about to be hard deleted.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the records must match to be deleted.
+        """
+
+    @classmethod
+    def purge(cls, db: Session, batch_size: int) -> int:
+        """
+        Permanently remove a batch of soft deleted records.
+
+        Args:
+            db (Session): The database session.
+            batch_size (int): The maximum number of records to remove.
+
+        Returns:
+            int: The number of removed records.
+        """
+        rows = db.execute(
+            select(cls.MODEL.id, cls.MODEL.change_xid, *cls._purge_columns())
+            .where(cls._purgeable())
+            .limit(batch_size)
+        ).all()
+        ids = [row.id for row in rows]
+        if ids:
+            cls._before_delete(db, (cls.MODEL.id.in_(ids), cls._not_deleted()))
+            cls._delete_dependents(db, (cls.MODEL.id.in_(ids),))
+            db.execute(
+                delete(cls.MODEL).where(cls.MODEL.id.in_(ids)),
+                execution_options={"synchronize_session": False},
+            )
+            mark_purged(db, max(row.change_xid for row in rows))
+        db.commit()
+        cls._after_purge(rows)
+        return len(ids)
+
 
 class TopicCRUD(BaseCRUD):
     """
@@ -124,6 +609,138 @@ class TopicCRUD(BaseCRUD):
     """
 
     MODEL = Topic
+    SORT_KEYS = (SortKey.ID_DESC, SortKey.CREATED_ON_DESC)
+
+    @classmethod
+    def surrogate_keys(cls, obj: Topic) -> Tuple[str, ...]:
+        """
+        List the surrogate keys of the topic listings and of the topic itself.
+
+        Args:
+            obj (Topic): The changed topic.
+
+        Returns:
+            Tuple[str, ...]: The surrogate keys.
+        """
+        return TOPICS_KEY, topic_key(obj.id)
+
+    @classmethod
+    def is_archived(cls, db: Session, id_: int) -> bool:
+        """
+        Check whether a topic is archived, locking it against archival until
+        the end of the transaction.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the topic.
+
+        Returns:
+            bool: True if the topic is archived.
+        """
+        archived_at = db.scalar(
+            select(Topic.archived_at).where(Topic.id == id_).with_for_update(read=True)
+        )
+        return archived_at is not None
+
+    @classmethod
+    def _update_criteria(cls) -> tuple:
+        """
+        Build the criteria a topic must also match to be updated.
+
+        Archived topics are read-only, but moderators may still delete them.
+
+        Returns:
+            tuple: The filter criteria.
+        """
+        return (Topic.archived_at.is_(None),)
+
+    @classmethod
+    def _after_delete(cls, obj: Topic) -> None:
+        """
+        Drop the deleted topic from the hot post cache, and remove its archive
+        if it was removed for good.
+
+        Args:
+            obj (Topic): The deleted topic.
+        """
+        if (hot_posts := get_hot_post_cache()) is not None:
+            hot_posts.invalidate(obj.id)
+        if obj.archived_at is not None and not get_settings().SOFT_DELETE:
+            _remove_archive(obj.id)
+
+    @classmethod
+    def _purge_columns(cls) -> tuple:
+        """
+        List the columns read along with the IDs of the topics about to be
+        purged.
+
+        Returns:
+            tuple: The columns.
+        """
+        return (Topic.archived_at,)
+
+    @classmethod
+    def _after_purge(cls, rows: Sequence[Row]) -> None:
+        """
+        Drop the purged topics from the hot post cache, and remove the
+        archives of the archived ones.
+
+        Args:
+            rows (Sequence[Row]): The purged topics.
+        """
+        if (hot_posts := get_hot_post_cache()) is not None:
+            for row in rows:
+                hot_posts.invalidate(row.id)
+        for row in rows:
+            if row.archived_at is not None:
+                _remove_archive(row.id)
+
+    @classmethod
+    def _before_delete(cls, db: Session, criteria: tuple) -> None:
+        """
+        Remove the live posts of topics about to be hard deleted from the post
+        counts of their authors.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the topics must match to be deleted.
+        """
+        if not get_settings().SOFT_DELETE:
+            uncount_posts(
+                db,
+                Post.topic_id.in_(select(Topic.id).where(*criteria)),
+                Post.deleted_at.is_(None),
+            )
+
+    @classmethod
+    def _delete_dependents(cls, db: Session, criteria: tuple) -> None:
+        """
+        Hard delete the posts of topics about to be hard deleted, and the rows
+        depending on them, and uncount their archived posts.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the topics must match to be deleted.
+        """
+        topic_posts = Post.topic_id.in_(select(Topic.id).where(*criteria))
+        uncount_archived_posts(db, select(Topic.id).where(*criteria))
+        delete_post_dependents(db, select(Post.id).where(topic_posts))
+        db.execute(
+            delete(Post).where(topic_posts),
+            execution_options={"synchronize_session": False},
+        )
+
+    @classmethod
+    def _purgeable(cls) -> ColumnElement[bool]:
+        """
+        Build the criteria matching soft deleted topics ready to be purged.
+
+        A topic is only purged once all of its posts have been removed.
+
+        Returns:
+            ColumnElement[bool]: The filter criteria.
+        """
+        return super()._purgeable() & ~exists().where(Post.topic_id == Topic.id)
 
 
 class PostCRUD(BaseCRUD):
@@ -135,3 +752,420 @@ class PostCRUD(BaseCRUD):
     """
 
     MODEL = Post
+    OWNER_COLUMN = "author"
+    SORT_KEYS = (SortKey.ID_DESC, SortKey.POSTED_ON_DESC)
+    FILTER_COLUMNS = ("topic_id",)
+
+    _by_author_order_by = (Post.posted_on.desc(), Post.id.desc())
+
+    @classmethod
+    def _live(cls) -> ColumnElement[bool]:
+        """
+        Build the criteria matching posts which are not soft deleted and whose
+        topic is not soft deleted either.
+
+        The posts of a deleted topic are hidden at once, although they are
+        only marked as deleted by the purge.
+
+        Returns:
+            ColumnElement[bool]: The filter criteria.
+        """
+        return super()._live() & exists().where(
+            Topic.id == Post.topic_id, Topic.deleted_at.is_(None)
+        )
+
+    @classmethod
+    def surrogate_keys(cls, obj: Post) -> Tuple[str, ...]:
+        """
+        List the surrogate keys of the post, of the posts of its topic and of
+        the posts of its author.
+
+        Args:
+            obj (Post): The changed post.
+
+        Returns:
+            Tuple[str, ...]: The surrogate keys.
+        """
+        return post_key(obj.id), topic_key(obj.topic_id), user_key(obj.author)
+
+    @classmethod
+    def _task_payload(cls, obj: Post) -> dict:
+        """
+        Build the payload of the outbox tasks of a write on a post.
+
+        Args:
+            obj (Post): The written post.
+
+        Returns:
+            dict: The IDs of the post and of its topic, and its author.
+        """
+        return {"id": obj.id, "topic_id": obj.topic_id, "author": obj.author}
+
+    @classmethod
+    def _after_create(cls, obj: Post) -> None:
+        """
+        Add the created post to the hot post cache.
+
+        Args:
+            obj (Post): The created post.
+        """
+        if (hot_posts := get_hot_post_cache()) is not None:
+            hot_posts.add(
+                obj.topic_id, PostSchema.model_validate(obj, from_attributes=True)
+            )
+
+    @classmethod
+    def _before_update(
+        cls,
+        db: Session,
+        id_: int,
+        criteria: tuple,
+        values: dict,
+        requester_data: RequesterData,
+    ) -> None:
+        """
+        Record the content of a post about to be edited as a revision, and
+        store the new content.
+
+        The row is locked until the end of the transaction, so concurrent
+        edits are recorded one after the other.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the post about to be updated.
+            criteria (tuple): The criteria the post must match to be updated.
+            values (dict): The values about to be set.
+            requester_data (RequesterData): The requester data.
+        """
+        if "content" not in values:
+            return
+        previous = cls._full_content(db, criteria, for_update=True)
+        if previous is None:
+            return
+        if previous != values["content"]:
+            db.execute(
+                insert(PostRevision).values(
+                    post_id=id_,
+                    content_delta=encode_revision(previous, values["content"]),
+                    edited_by=requester_data.name,
+                )
+            )
+        preview, body = cls._split_body(values["content"])
+        db.execute(delete(PostBody).where(PostBody.post_id == id_))
+        if body is not None:
+            db.execute(insert(PostBody).values(post_id=id_, content=body))
+        values.update(content=preview, truncated=body is not None)
+
+    @classmethod
+    def _before_delete(cls, db: Session, criteria: tuple) -> None:
+        """
+        Remove the posts about to be deleted from the post counts of their authors.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the posts must match to be deleted.
+        """
+        uncount_posts(db, *criteria)
+
+    @classmethod
+    def _delete_dependents(cls, db: Session, criteria: tuple) -> None:
+        """
+        Hard delete the bodies, revisions and reactions of posts about to be
+        hard deleted.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the posts must match to be deleted.
+        """
+        delete_post_dependents(db, select(Post.id).where(*criteria))
+
+    @classmethod
+    def get_by_author(
+        cls,
+        db: Session,
+        author: str,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Post]:
+        """
+        Retrieve the posts of an author, most recent first, with keyset pagination.
+
+        The posts are read from the ``(author, posted_on DESC, id DESC)``
+        index from the position of the last post of the previous page, so
+        the cost of a page does not depend on how deep it is.
+
+        Args:
+            db (Session): The database session.
+            author (str): The name of the author.
+            limit (int): The maximum number of posts to return.
+            after (Optional[Tuple[datetime, int]]): The publication date and ID
+            of the last post of the previous page, None for the first page.
+
+        Returns:
+            List[Post]: The posts.
+        """
+        q = select(Post).where(Post.author == author, cls._live())
+        if after is not None:
+            q = q.where(tuple_(Post.posted_on, Post.id) < tuple_(*after))
+        return db.scalars(q.order_by(*cls._by_author_order_by).limit(limit)).all()
+
+    @classmethod
+    def get_revisions(
+        cls,
+        db: Session,
+        id_: int,
+        requester_data: RequesterData,
+        offset: int,
+        limit: int,
+    ) -> Optional[Tuple[int, List[PostRevisionSchema]]]:
+        """
+        Get a page of the previous versions of a post, newest first.
+
+        Each version is decoded from the one that replaced it, so the versions
+        newer than the page are read as well.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the post.
+            requester_data (RequesterData): The requester data, who must be
+            allowed to modify the post.
+            offset (int): The number of versions to skip.
+            limit (int): The maximum number of versions to return.
+
+        Returns:
+            Optional[Tuple[int, List[PostRevisionSchema]]]: The total number of
+            revisions and the page, or None if the post does not exist or the
+            requester is not allowed to modify it.
+        """
+        content = cls._full_content(db, cls._permitted(id_, requester_data))
+        if content is None:
+            return None
+        total = db.scalar(select(func.count()).where(PostRevision.post_id == id_))
+        revisions = db.execute(
+            select(
+                PostRevision.id,
+                PostRevision.content_delta,
+                PostRevision.edited_by,
+                PostRevision.edited_on,
+            )
+            .where(PostRevision.post_id == id_)
+            .order_by(PostRevision.id.desc())
+            .limit(offset + limit)
+        ).all()
+        contents = replay_revisions(content, (row.content_delta for row in revisions))
+        page = [
+            PostRevisionSchema(
+                id=row.id,
+                content=content,
+                edited_by=row.edited_by,
+                edited_on=row.edited_on,
+            )
+            for row, content in zip(revisions, contents)
+        ]
+        return total, page[offset:]
+
+    @classmethod
+    def create(cls, db: Session, validated_data: ValidatedData) -> Post:
+        """
+        Create a new post, storing its content compressed if it is long enough.
+
+        Args:
+            db (Session): The database session.
+            validated_data (ValidatedData): The data to create the post from.
+
+        Returns:
+            Post: The created post.
+        """
+        preview, body = cls._split_body(validated_data["content"])
+        obj = cls.MODEL(
+            **validated_data | {"content": preview, "truncated": body is not None}
+        )
+        db.add(obj)
+        if body is not None:
+            db.flush()
+            db.execute(insert(PostBody).values(post_id=obj.id, content=body))
+        count_posts(db.connection(), {obj.author: 1})
+        cls._enqueue(db, "created", obj)
+        db.commit()
+        cls._after_create(obj)
+        tag_response(*cls.surrogate_keys(obj))
+        return obj
+
+    @classmethod
+    def get_full(cls, db: Session, id_: int) -> Optional[PostSchema]:
+        """
+        Retrieve a single post with its full content.
+
+        The compressed body of a truncated post is only read and decompressed here.
+
+        Args:
+            db (Session): The database session.
+            id_ (int): The ID of the post to retrieve.
+
+        Returns:
+            Optional[PostSchema]: The post, or None if it does not exist.
+        """
+        obj = cls.get_one(db, id_)
+        if obj is None:
+            return None
+        post = PostSchema.model_validate(obj, from_attributes=True)
+        if not post.truncated:
+            return post
+        body = db.scalar(select(PostBody.content).where(PostBody.post_id == id_))
+        return post.model_copy(
+            update={"content": decompress_body(body), "truncated": False}
+        )
+
+    @classmethod
+    def _split_body(cls, content: str) -> Tuple[str, Optional[bytes]]:
+        """
+        Split the content of a post into the value of its `content` column and
+        its compressed body, according to the settings.
+
+        Args:
+            content (str): The full content of the post.
+
+        Returns:
+            Tuple[str, Optional[bytes]]: The inline content and the compressed
+            body, or None if the content is short enough to be stored inline.
+        """
+        return split_body(
+            content,
+            get_settings().POST_COMPRESSION_THRESHOLD,
+            get_settings().POST_PREVIEW_LENGTH,
+        )
+
+    @classmethod
+    def _full_content(
+        cls, db: Session, criteria: tuple, for_update: bool = False
+    ) -> Optional[str]:
+        """
+        Read the full content of a post, decompressing it if needed.
+
+        Args:
+            db (Session): The database session.
+            criteria (tuple): The criteria the post must match.
+            for_update (bool): Whether the post row should be locked.
+
+        Returns:
+            Optional[str]: The content, or None if no post matches the criteria.
+        """
+        stmt = (
+            select(Post.content, PostBody.content.label("body"))
+            .outerjoin(PostBody, PostBody.post_id == Post.id)
+            .where(*criteria)
+        )
+        if for_update:
+            stmt = stmt.with_for_update(of=Post)
+        row = db.execute(stmt).first()
+        if row is None:
+            return None
+        return decompress_body(row.body) if row.body is not None else row.content
+
+    @classmethod
+    def _after_update(cls, obj: Post) -> None:
+        """
+        Replace the updated post in the hot post cache.
+
+        Args:
+            obj (Post): The updated post.
+        """
+        if (hot_posts := get_hot_post_cache()) is not None:
+            hot_posts.replace(
+                obj.topic_id, PostSchema.model_validate(obj, from_attributes=True)
+            )
+
+    @classmethod
+    def _after_delete(cls, obj: Post) -> None:
+        """
+        Drop the topic of the deleted post from the hot post cache.
+
+        Args:
+            obj (Post): The deleted post.
+        """
+        if (hot_posts := get_hot_post_cache()) is not None:
+            hot_posts.invalidate(obj.topic_id)
+
+    @classmethod
+    def _purge_columns(cls) -> tuple:
+        """
+        Read the topic of the posts about to be purged.
+
+        Returns:
+            tuple: The topic ID column.
+        """
+        return (Post.topic_id,)
+
+    @classmethod
+    def _after_purge(cls, rows: Sequence[Row]) -> None:
+        """
+        Drop the topics of the purged posts from the hot post cache.
+
+        Args:
+            rows (Sequence[Row]): The purged posts.
+        """
+        if (hot_posts := get_hot_post_cache()) is not None:
+            for topic_id in {row.topic_id for row in rows}:
+                hot_posts.invalidate(topic_id)
+
+    @classmethod
+    def _purgeable(cls) -> ColumnElement[bool]:
+        """
+        Build the criteria matching posts ready to be purged.
+
+        Posts are purged when they or their topic were soft deleted before
+        the retention period.
+
+        Returns:
+            ColumnElement[bool]: The filter criteria.
+        """
+        return super()._purgeable() | Post.topic_id.in_(
+            select(Topic.id).where(Topic.deleted_at <= tombstone_cutoff())
+        )
+
+    @classmethod
+    def load_latest_for_topics(
+        cls, db: Session, topics: Iterable[Topic], limit: int
+    ) -> List[Topic]:
+        """
+        Load the most recent posts of several topics with a single query.
+
+        The posts are ranked per topic with a ``row_number()`` window function,
+        so the number of queries does not depend on the number of topics. The
+        result is set as the committed value of each topic's `posts`
+        relationship, which prevents any further lazy load.
+
+        Args:
+            db (Session): The database session.
+            topics (Iterable[Topic]): The topics for which posts should be loaded.
+            limit (int): The maximum number of posts to load per topic.
+
+        Returns:
+            List[Topic]: The topics with their `posts` relationship populated,
+            most recent post first.
+        """
+        topics = list(topics)
+        if not topics:
+            return topics
+        rank = (
+            func.row_number()
+            .over(partition_by=cls.MODEL.topic_id, order_by=cls.MODEL.posted_on.desc())
+            .label("rank")
+        )
+        ranked = (
+            select(cls.MODEL, rank)
+            .where(cls.MODEL.topic_id.in_([topic.id for topic in topics]), cls._live())
+            .subquery()
+        )
+        ranked_post = aliased(cls.MODEL, ranked)
+        q = (
+            db.query(ranked_post)
+            .where(ranked.c.rank <= limit)
+            .order_by(ranked.c.topic_id, ranked.c.rank)
+        )
+        posts_by_topic = {topic.id: [] for topic in topics}
+        for post in q:
+            posts_by_topic[post.topic_id].append(post)
+        for topic in topics:
+            set_committed_value(topic, "posts", posts_by_topic[topic.id])
+        return topics
@@ -1,15 +1,70 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import sessionmaker
 
 from conf import get_settings
 
-DB_CHOICES = {
-    "sqlite": f"sqlite:///./{get_settings().DB_NAME}",
-    "postgresql": f"postgresql://{get_settings().DB_USERNAME}:{get_settings().DB_PASSWORD}@{get_settings().DB_HOST}/{get_settings().DB_NAME}",
-}
+SessionLocal = sessionmaker()
+
+
+def get_database_url() -> str:
+    """
+    Build the database URL from the settings.
+
+    Returns:
+        str: The URL of the configured database.
+    """
+    settings = get_settings()
+    db_choices = {
+        "sqlite": f"sqlite:///./{settings.DB_NAME}",
+        "postgresql": f"postgresql://{settings.DB_USERNAME}:{settings.DB_PASSWORD}@{settings.DB_HOST}/{settings.DB_NAME}",
+    }
+    return db_choices[settings.WHICH_DB]
+
+
+@lru_cache()
+def get_engine() -> Engine:
+    """
+    Create the database engine on first use and bind `SessionLocal` to it.
+
+    Building the engine loads the database driver, so it is deferred until
+    the application starts instead of being paid at import time.
+
+    Returns:
+        Engine: The database engine.
+    """
+    engine = create_engine(
+        get_database_url(),
+        pool_size=get_settings().DB_POOL_SIZE,
+        max_overflow=get_settings().DB_MAX_OVERFLOW,
+    )
+    SessionLocal.configure(bind=engine)
+    return engine
+
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """
+    Open connections ahead of the first requests so that they find a filled pool.
 
-DATABASE_URL = DB_CHOICES[get_settings().WHICH_DB]
+    The connections are all checked out at the same time, so that the pool
+    has to open new ones instead of reusing the same one, then returned to
+    the pool. The number of connections is capped by the pool size.
 
-engine = create_engine(DATABASE_URL, pool_size=10, max_overflow=0)
+    Args:
+        engine (Engine): The database engine.
+        connections (int): The number of connections to open.
 
-SessionLocal = sessionmaker(engine)
+    Returns:
+        int: The number of connections opened.
+    """
+    opened = []
+    try:
+        for _ in range(min(connections, get_settings().DB_POOL_SIZE)):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
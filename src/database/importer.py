@@ -0,0 +1,357 @@
+"""
+Bulk import of topics and posts from CSV or NDJSON files.
+
+Records are read in chunks, validated with `TopicImportValidatedData` and
+`PostImportValidatedData`, then loaded with ``COPY FROM STDIN`` on
+PostgreSQL and with executemany batches on SQLite, each chunk in its own
+transaction. Durability is relaxed for the duration of the import, so an
+import interrupted by a system crash may lose its last chunks, or corrupt
+a SQLite database: import into a database that has been backed up.
+
+Records keep their `id` when the file provides one, so that posts can
+reference the original IDs of their topics, and a file must either
+provide the ID of every record or of none. Each record gets its own change
+position, so that imported records are synced like the others, and
+imported posts are added to the post counts of their authors. Long posts
+are stored inline, whatever the compression threshold.
+
+CSV files need a header line naming the fields, e.g. for posts:
+
+    id,topic_id,author,posted_on,content
+
+Usage, from the `src` directory:
+
+    python -m database.importer --topics topics.ndjson --posts posts.csv
+    python -m database.importer --posts posts.csv --chunk-size 5000
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Connection, Table, insert, text
+
+from database.changes import ChangePosition, reserve_change_positions
+from database.models import Post, Topic
+from database.post_counts import count_posts
+from database.validation_schemas import (
+    PostImportValidatedData,
+    TopicImportValidatedData,
+    ValidatedData,
+)
+
+IMPORT_SCHEMAS = {
+    Topic.__table__: TypeAdapter(TopicImportValidatedData),
+    Post.__table__: TypeAdapter(PostImportValidatedData),
+}
+TIMESTAMP_COLUMNS = {Topic.__table__: "created_on", Post.__table__: "posted_on"}
+
+Record = Tuple[int, Dict[str, object]]
+
+
+def read_records(path: Path) -> Iterator[Record]:
+    """
+    Read the records of a CSV file with a header line, or of an NDJSON file.
+
+    Empty CSV fields are left out, so that optional fields take their default.
+
+    Args:
+        path (Path): The file, with a ``.csv``, ``.ndjson`` or ``.jsonl`` extension.
+
+    Yields:
+        Record: The line number and the fields of each record.
+
+    Raises:
+        ValueError: If the extension of the file is not supported.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in (".csv", ".ndjson", ".jsonl"):
+        raise ValueError(f"{path}: unsupported file format {suffix!r}")
+    with path.open(newline="", encoding="utf-8") as file:
+        if suffix == ".csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, {
+                    field: value
+                    for field, value in record.items()
+                    if field is not None and value != ""
+                }
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+
+
+def validated_chunks(
+    records: Iterable[Record],
+    table: Table,
+    chunk_size: int,
+    source: str = "",
+) -> Iterator[List[ValidatedData]]:
+    """
+    Validate records by chunks, without reading the whole file in memory.
+
+    Args:
+        records (Iterable[Record]): The line numbers and fields of the records.
+        table (Table): The table the records are imported into.
+        chunk_size (int): The number of records of a chunk.
+        source (str): The name of the file, to locate invalid records.
+
+    Yields:
+        List[ValidatedData]: The validated records of each chunk.
+
+    Raises:
+        ValueError: If a record is invalid.
+    """
+    schema = IMPORT_SCHEMAS[table]
+    records = iter(records)
+    while chunk := list(islice(records, chunk_size)):
+        validated = []
+        for line_number, record in chunk:
+            try:
+                validated.append(schema.validate_python(record))
+            except ValidationError as e:
+                raise ValueError(f"{source}:{line_number}: {e}") from e
+        yield validated
+
+
+def build_rows(
+    table: Table, chunk: List[ValidatedData], change_positions: List[ChangePosition]
+) -> List[Dict[str, object]]:
+    """
+    Build the rows of a chunk, with a value for every column but the ID
+    when the records have none.
+
+    Args:
+        table (Table): The table the records are imported into.
+        chunk (List[ValidatedData]): The validated records.
+        change_positions (List[ChangePosition]): The change positions allocated
+        to the records.
+
+    Returns:
+        List[Dict[str, object]]: The rows to insert.
+    """
+    defaults = {
+        column.name: column.default.arg if column.default is not None else None
+        for column in table.columns
+        if column.name != "id" and (column.default is None or column.default.is_scalar)
+    }
+    timestamp_column = TIMESTAMP_COLUMNS[table]
+    now = datetime.today()
+    rows = []
+    for record, (change_xid, change_seq) in zip(chunk, change_positions):
+        row = defaults | {
+            name: value for name, value in record.items() if value is not None
+        }
+        row.setdefault(timestamp_column, now)
+        row["change_xid"] = change_xid
+        row["change_seq"] = change_seq
+        rows.append(row)
+    return rows
+
+
+def _copy_value(value: object) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_buffer(rows: List[Dict[str, object]], columns: List[str]) -> io.StringIO:
+    """
+    Serialize rows in the text format of PostgreSQL ``COPY``.
+
+    Args:
+        rows (List[Dict[str, object]]): The rows to serialize.
+        columns (List[str]): The columns to serialize, in order.
+
+    Returns:
+        io.StringIO: The serialized rows, ready to be read.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def load_rows(connection: Connection, table: Table, rows: List[Dict]) -> None:
+    """
+    Insert rows with ``COPY FROM STDIN`` on PostgreSQL, with an executemany
+    batch otherwise.
+
+    Args:
+        connection (Connection): The connection of the importing transaction.
+        table (Table): The table the rows are inserted into.
+        rows (List[Dict]): The rows to insert, all with the same columns.
+    """
+    if connection.dialect.name != "postgresql":
+        connection.execute(insert(table), rows)
+        return
+    columns = list(rows[0])
+    column_names = ", ".join(f'"{column}"' for column in columns)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY "{table.name}" ({column_names}) FROM STDIN',
+            copy_buffer(rows, columns),
+        )
+
+
+def sync_id_sequence(connection: Connection, table: Table) -> None:
+    """
+    Move the ID sequence of a PostgreSQL table past the imported IDs.
+
+    Args:
+        connection (Connection): The database connection.
+        table (Table): The table the records were imported into.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                f'(SELECT coalesce(max(id), 1) FROM "{table.name}"))'
+            ),
+            {"table": table.name},
+        )
+        connection.commit()
+
+
+def import_records(
+    connection: Connection,
+    table: Table,
+    records: Iterable[Record],
+    chunk_size: int = 1000,
+    source: str = "",
+) -> int:
+    """
+    Import records into a table, committing each chunk.
+
+    Args:
+        connection (Connection): The database connection.
+        table (Table): The table the records are imported into.
+        records (Iterable[Record]): The line numbers and fields of the records.
+        chunk_size (int): The number of records validated and loaded at once.
+        source (str): The name of the file, to locate invalid records.
+
+    Returns:
+        int: The number of imported records.
+
+    Raises:
+        ValueError: If a record is invalid, or if only some records have an ID.
+        Previous chunks stay imported.
+    """
+    count = 0
+    keep_ids: Optional[bool] = None
+    for chunk in validated_chunks(records, table, chunk_size, source):
+        if keep_ids is None:
+            keep_ids = chunk[0].get("id") is not None
+        if any((record.get("id") is not None) != keep_ids for record in chunk):
+            raise ValueError(f"{source}: either every record or none must have an id")
+        load_rows(
+            connection,
+            table,
+            build_rows(table, chunk, reserve_change_positions(connection, len(chunk))),
+        )
+        if table is Post.__table__:
+            count_posts(connection, Counter(record["author"] for record in chunk))
+        connection.commit()
+        count += len(chunk)
+    if keep_ids:
+        sync_id_sequence(connection, table)
+    return count
+
+
+@contextmanager
+def relaxed_durability(connection: Connection) -> Iterator[None]:
+    """
+    Context manager trading durability for speed on a connection, restoring
+    its settings on exit.
+
+    PostgreSQL commits stop waiting for the WAL to be flushed. SQLite stops
+    syncing the database file and keeps its rollback journal in memory.
+
+    Args:
+        connection (Connection): The database connection.
+
+    Yields:
+        None
+    """
+    if connection.dialect.name == "postgresql":
+        settings = {"synchronous_commit": "off"}
+        restore = {"synchronous_commit": "DEFAULT"}
+        statement = "SET {} = {}"
+    else:
+        settings = {"synchronous": "OFF", "journal_mode": "MEMORY"}
+        restore = {
+            pragma: connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            for pragma in settings
+        }
+        statement = "PRAGMA {} = {}"
+    for name, value in settings.items():
+        connection.exec_driver_sql(statement.format(name, value))
+    connection.commit()
+    try:
+        yield
+    finally:
+        connection.rollback()
+        for name, value in restore.items():
+            connection.exec_driver_sql(statement.format(name, value))
+        connection.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", type=Path)
+    parser.add_argument("--posts", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    if args.topics is None and args.posts is None:
+        parser.error("nothing to import, pass --topics and/or --posts")
+
+    from database.db_conf import get_engine
+    from database.models import BaseModel
+
+    engine = get_engine()
+    BaseModel.metadata.create_all(bind=engine)
+    with engine.connect() as connection, relaxed_durability(connection):
+        for table, path in (
+            (Topic.__table__, args.topics),
+            (Post.__table__, args.posts),
+        ):
+            if path is None:
+                continue
+            start = time.perf_counter()
+            try:
+                count = import_records(
+                    connection, table, read_records(path), args.chunk_size, str(path)
+                )
+            except ValueError as e:
+                parser.exit(1, f"{e}\n")
+            elapsed = time.perf_counter() - start
+            print(
+                f"Imported {count} {table.name} records from {path} "
+                f"in {elapsed:.2f}s ({count / elapsed:,.0f} rows/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,189 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    Sequence,
+    String,
+    Text,
+    event,
+    insert,
+    text,
+)
 from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
 
 BaseModel = declarative_base()
 
+LIVE_ROWS = text("deleted_at IS NULL")
+DELETED_ROWS = text("deleted_at IS NOT NULL")
+
+CHANGE_POSITION_SEQ = Sequence("change_position_seq", metadata=BaseModel.metadata)
+
 
 class Post(BaseModel):
     __tablename__ = "post"
+    __table_args__ = (
+        Index(
+            "ix_post_topic_id_posted_on_live",
+            "topic_id",
+            "posted_on",
+            postgresql_where=LIVE_ROWS,
+            sqlite_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_post_deleted_at",
+            "deleted_at",
+            postgresql_where=DELETED_ROWS,
+            sqlite_where=DELETED_ROWS,
+        ),
+        Index("ix_post_change_position", "change_xid", "change_seq"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     content: Mapped[str]
     author: Mapped[str] = mapped_column(String(20))
     posted_on: Mapped[datetime] = mapped_column(insert_default=datetime.today)
     topic_id: Mapped[int] = mapped_column(ForeignKey("topic.id"))
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    truncated: Mapped[bool] = mapped_column(default=False)
+    change_xid: Mapped[int] = mapped_column(BigInteger, default=0)
+    change_seq: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(default=None)
 
     topic = relationship("Topic", back_populates="posts")
 
 
+Index(
+    "ix_post_author_posted_on_id_live",
+    Post.author,
+    Post.posted_on.desc(),
+    Post.id.desc(),
+    postgresql_where=LIVE_ROWS,
+    sqlite_where=LIVE_ROWS,
+)
+
+
+class AuthorPostCount(BaseModel):
+    """
+    The number of live posts of an author, kept up to date by every write
+    on posts so that profile pages never count the posts of an author.
+    """
+
+    __tablename__ = "author_post_count"
+
+    author: Mapped[str] = mapped_column(String(20), primary_key=True)
+    post_count: Mapped[int] = mapped_column(default=0)
+
+
+class ArchivedPostCount(BaseModel):
+    """
+    The number of posts of an author archived with a topic.
+
+    Archived posts stay counted in `author_post_count`, so their counts are
+    kept to rebuild the post counts, and to uncount the posts once the topic
+    is removed for good.
+    """
+
+    __tablename__ = "archived_post_count"
+
+    topic_id: Mapped[int] = mapped_column(ForeignKey("topic.id"), primary_key=True)
+    author: Mapped[str] = mapped_column(String(20), primary_key=True)
+    post_count: Mapped[int]
+
+
+class PostBody(BaseModel):
+    """
+    The compressed content of a post too long to be stored inline.
+
+    The `post` row then only holds a preview of the content and is flagged
+    as truncated, so listings never read nor decompress the full content.
+    """
+
+    __tablename__ = "post_body"
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    content: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class PostReaction(BaseModel):
+    """
+    A reaction of a user to a post, at most one of each kind per user and post.
+
+    Rows are only inserted and deleted, the number of reactions of a post is
+    kept in `PostReactionCount`.
+    """
+
+    __tablename__ = "post_reaction"
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    reacted_by: Mapped[str] = mapped_column(String(20), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True)
+    reacted_on: Mapped[datetime] = mapped_column(insert_default=datetime.today)
+
+
+class PostReactionCount(BaseModel):
+    """
+    The number of reactions of each kind to a post.
+
+    Reactions are counted in memory by each process and added to these rows
+    in batches, so that the reactions to a popular post never wait for the
+    lock of a single row.
+    """
+
+    __tablename__ = "post_reaction_count"
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+class PostRevision(BaseModel):
+    """
+    A previous version of the content of a post.
+
+    The content is stored compressed with the content that replaced it as
+    preset dictionary, so that a small edit costs a few bytes. Posts hold no
+    relationship to their revisions, which keeps them out of the post read path.
+    """
+
+    __tablename__ = "post_revision"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), index=True
+    )
+    content_delta: Mapped[bytes] = mapped_column(LargeBinary)
+    edited_by: Mapped[str] = mapped_column(String(20))
+    edited_on: Mapped[datetime] = mapped_column(insert_default=datetime.today)
+
+
 class Topic(BaseModel):
     __tablename__ = "topic"
+    __table_args__ = (
+        Index(
+            "ix_topic_created_on_live",
+            "created_on",
+            postgresql_where=LIVE_ROWS,
+            sqlite_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_topic_deleted_at",
+            "deleted_at",
+            postgresql_where=DELETED_ROWS,
+            sqlite_where=DELETED_ROWS,
+        ),
+        Index("ix_topic_change_position", "change_xid", "change_seq"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(50))
@@ -28,7 +191,62 @@ class Topic(BaseModel):
     category: Mapped[str] = mapped_column(String(20))
     created_by: Mapped[str] = mapped_column(String(20))
     created_on: Mapped[datetime] = mapped_column(insert_default=datetime.today)
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    change_xid: Mapped[int] = mapped_column(BigInteger, default=0)
+    change_seq: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+    archived_at: Mapped[Optional[datetime]] = mapped_column(default=None)
 
     posts: Mapped[List["Post"]] = relationship(
         "Post", back_populates="topic", cascade="all, delete-orphan"
     )
+
+
+class OutboxTask(BaseModel):
+    """
+    A side effect of a write, e.g. a notification, enqueued in the transaction
+    of the write and run later by the outbox consumer.
+
+    Tasks which failed too many times are kept as dead, with their last
+    error, for inspection.
+    """
+
+    __tablename__ = "outbox_task"
+    __table_args__ = (
+        Index(
+            "ix_outbox_task_available_at_pending",
+            "available_at",
+            postgresql_where=text("dead_at IS NULL"),
+            sqlite_where=text("dead_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    payload: Mapped[dict] = mapped_column(JSON)
+    created_on: Mapped[datetime] = mapped_column(insert_default=datetime.today)
+    available_at: Mapped[datetime] = mapped_column(insert_default=datetime.today)
+    attempts: Mapped[int] = mapped_column(default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, default=None)
+    dead_at: Mapped[Optional[datetime]] = mapped_column(default=None)
+
+
+class ChangeSequence(BaseModel):
+    """
+    The single row counter stamping every change of a topic or a post on
+    SQLite, where the `change_position_seq` sequence is not available.
+
+    `purged_through` is the highest `change_xid` whose record may have been
+    removed for good, up to which change tokens are no longer valid.
+    """
+
+    __tablename__ = "change_sequence"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    value: Mapped[int] = mapped_column(default=0)
+    purged_through: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+@event.listens_for(ChangeSequence.__table__, "after_create")
+def _insert_change_sequence(target, connection, **kw) -> None:
+    connection.execute(insert(target).values(id=1, value=0, purged_through=0))
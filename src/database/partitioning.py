@@ -0,0 +1,243 @@
+"""
+Optional PostgreSQL declarative partitioning of the `post` table.
+
+The `post` table is converted in place into a partitioned table, either
+hashed on `topic_id` or ranged by month on `posted_on`. The ORM mapping is
+left untouched: the partition key is only added to the primary key on the
+database side, so `PostCRUD` keeps working transparently and the listing
+of a topic's posts only scans the partition holding that topic.
+
+The foreign keys of the tables referencing `post` are dropped, since a
+partitioned table cannot be referenced by its `id` alone. Their rows are
+deleted explicitly with the posts, by `crud_factory.delete_post_dependents`,
+so nothing relies on their ``ON DELETE CASCADE``.
+
+Usage, from the `src` directory:
+
+    python -m database.partitioning hash --partitions 16
+    python -m database.partitioning range --start 2020-01 --months 96
+    python -m database.partitioning hash --partitions 16 --dry-run
+"""
+
+import argparse
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import Connection, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from database.models import Post
+
+HASH = "hash"
+RANGE = "range"
+
+PARTITION_KEYS = {HASH: "topic_id", RANGE: "posted_on"}
+
+
+def _qualified(name: str, schema: Optional[str]) -> str:
+    return f'"{schema}"."{name}"' if schema else f'"{name}"'
+
+
+def _add_months(month: date, count: int) -> date:
+    year, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + year, month_index + 1, 1)
+
+
+def partition_ddl(
+    strategy: str,
+    partitions: int = 16,
+    start: Optional[date] = None,
+    months: int = 12,
+    schema: Optional[str] = None,
+    referencing_foreign_keys: Optional[List[tuple[str, str]]] = None,
+) -> List[str]:
+    """
+    Build the statements converting the `post` table into a partitioned table.
+
+    Foreign keys of other tables referencing `post.id` are dropped, since
+    PostgreSQL requires them to include the whole primary key of a
+    partitioned table, which now contains the partition key.
+
+    Args:
+        strategy (str): Either ``hash`` on `topic_id` or ``range`` on `posted_on`.
+        partitions (int): The number of hash partitions.
+        start (Optional[date]): The first month covered by range partitions.
+        months (int): The number of monthly range partitions, a default
+        partition catches rows outside of them.
+        schema (Optional[str]): The schema holding the tables.
+        referencing_foreign_keys (Optional[List[tuple[str, str]]]): The
+        (table, constraint) pairs of foreign keys referencing `post`.
+
+    Returns:
+        List[str]: The DDL statements, to run in a single transaction.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+    """
+    if strategy not in PARTITION_KEYS:
+        raise ValueError(f"Unknown partitioning strategy {strategy!r}")
+    key = PARTITION_KEYS[strategy]
+    post = _qualified("post", schema)
+    legacy = _qualified("post_unpartitioned", schema)
+    method = "HASH" if strategy == HASH else "RANGE"
+
+    statements = [
+        f'ALTER TABLE {_qualified(table, schema)} DROP CONSTRAINT "{constraint}"'
+        for table, constraint in referencing_foreign_keys or []
+    ]
+    statements += [
+        f"ALTER TABLE {post} RENAME TO post_unpartitioned",
+        f"CREATE TABLE {post} (LIKE {legacy} INCLUDING DEFAULTS) "
+        f"PARTITION BY {method} ({key})",
+        f"ALTER TABLE {post} ADD PRIMARY KEY (id, {key})",
+        f"ALTER TABLE {post} ADD FOREIGN KEY (topic_id) "
+        f"REFERENCES {_qualified('topic', schema)} (id)",
+    ]
+    if strategy == HASH:
+        statements += [
+            f"CREATE TABLE {_qualified(f'post_p{i}', schema)} PARTITION OF {post} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+            for i in range(partitions)
+        ]
+    else:
+        first_month = (start or date.today()).replace(day=1)
+        for i in range(months):
+            lower, upper = _add_months(first_month, i), _add_months(first_month, i + 1)
+            statements.append(
+                f"CREATE TABLE {_qualified(f'post_{lower:%Y_%m}', schema)} "
+                f"PARTITION OF {post} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        statements.append(
+            f"CREATE TABLE {_qualified('post_default', schema)} "
+            f"PARTITION OF {post} DEFAULT"
+        )
+    statements += [
+        f"INSERT INTO {post} SELECT * FROM {legacy}",
+        f"ALTER SEQUENCE {_qualified('post_id_seq', schema)} OWNED BY {post}.id",
+        f"DROP TABLE {legacy}",
+    ]
+    dialect = postgresql.dialect()
+    for index in Post.__table__.indexes:
+        ddl = str(CreateIndex(index).compile(dialect=dialect))
+        statements.append(ddl.replace(" ON post ", f" ON {post} ") if schema else ddl)
+    return statements
+
+
+def referencing_foreign_keys(
+    connection: Connection, schema: Optional[str] = None
+) -> List[tuple[str, str]]:
+    """
+    List the foreign keys of other tables referencing the `post` table.
+
+    Args:
+        connection (Connection): The database connection.
+        schema (Optional[str]): The schema holding the tables.
+
+    Returns:
+        List[tuple[str, str]]: The (table, constraint) pairs.
+    """
+    inspector = inspect(connection)
+    return [
+        (table, foreign_key["name"])
+        for table in inspector.get_table_names(schema=schema)
+        if table != "post"
+        for foreign_key in inspector.get_foreign_keys(table, schema=schema)
+        if foreign_key["referred_table"] == "post"
+    ]
+
+
+def is_partitioned(connection: Connection, schema: Optional[str] = None) -> bool:
+    """
+    Tell whether the `post` table is already partitioned.
+
+    Args:
+        connection (Connection): The database connection.
+        schema (Optional[str]): The schema holding the tables.
+
+    Returns:
+        bool: True if the `post` table is a partitioned table.
+    """
+    return bool(
+        connection.scalar(
+            text(
+                "SELECT count(*) FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE c.relname = 'post' AND n.nspname = coalesce(:schema, current_schema())"
+            ),
+            {"schema": schema},
+        )
+    )
+
+
+def partition_posts(
+    connection: Connection, strategy: str, schema: Optional[str] = None, **options
+) -> List[str]:
+    """
+    Convert the `post` table into a partitioned table, in a single transaction.
+
+    Args:
+        connection (Connection): A PostgreSQL connection.
+        strategy (str): Either ``hash`` or ``range``.
+        schema (Optional[str]): The schema holding the tables.
+        **options: The partitioning options, see `partition_ddl`.
+
+    Returns:
+        List[str]: The executed statements, empty if the table was already partitioned.
+
+    Raises:
+        ValueError: If the connection is not a PostgreSQL one.
+    """
+    if connection.dialect.name != "postgresql":
+        raise ValueError("Partitioning is only supported on PostgreSQL")
+    with connection.begin():
+        if is_partitioned(connection, schema):
+            return []
+        statements = partition_ddl(
+            strategy,
+            schema=schema,
+            referencing_foreign_keys=referencing_foreign_keys(connection, schema),
+            **options,
+        )
+        for statement in statements:
+            connection.execute(text(statement))
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("strategy", choices=sorted(PARTITION_KEYS))
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--start", type=lambda value: date.fromisoformat(f"{value}-01"))
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--schema", default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    options = {
+        "partitions": args.partitions,
+        "start": args.start,
+        "months": args.months,
+    }
+
+    if args.dry_run:
+        for statement in partition_ddl(args.strategy, schema=args.schema, **options):
+            print(f"{statement};")
+        return
+
+    from database.db_conf import get_engine
+
+    with get_engine().connect() as connection:
+        statements = partition_posts(
+            connection, args.strategy, schema=args.schema, **options
+        )
+    print(
+        f"Executed {len(statements)} statements"
+        if statements
+        else "Already partitioned"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def compress_body(content: str) -> bytes:
+    """
+    Compress the body of a post, with zstd if available, else with zlib.
+
+    Args:
+        content (str): The content of the post.
+
+    Returns:
+        bytes: The compressed content.
+    """
+    data = content.encode()
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 9)
+
+
+def decompress_body(data: bytes) -> str:
+    """
+    Decompress the body of a post, detecting the codec from the frame header.
+
+    Args:
+        data (bytes): The content compressed by `compress_body`.
+
+    Returns:
+        str: The content of the post.
+
+    Raises:
+        RuntimeError: If the body was compressed with zstd and the optional
+        `zstandard` package is not installed.
+    """
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is required to read this post")
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    return zlib.decompress(data).decode()
+
+
+def split_body(
+    content: str, threshold: int, preview_length: int
+) -> Tuple[str, Optional[bytes]]:
+    """
+    Split the content of a post into an inline preview and a compressed body.
+
+    Args:
+        content (str): The content of the post.
+        threshold (int): The length over which the body is stored compressed,
+        0 disables compressed storage.
+        preview_length (int): The length of the inline preview of compressed bodies.
+
+    Returns:
+        Tuple[str, Optional[bytes]]: The content to store in the `post` table
+        and the compressed body, or None if the content is stored inline.
+    """
+    if not threshold or len(content) <= threshold:
+        return content, None
+    return content[:preview_length], compress_body(content)
@@ -0,0 +1,187 @@
+"""
+Per author post counts, kept in the `author_post_count` table.
+
+The counts are maintained by `PostCRUD` and `TopicCRUD` in the transaction
+of every write. The posts of archived topics stay counted, see
+`archived_post_count`. Rebuild them from the `post` table after the table is
+first created on a database which already holds posts, from the `src`
+directory:
+
+    python -m database.post_counts
+"""
+
+from typing import Dict
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Select,
+    delete,
+    func,
+    insert,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database.models import ArchivedPostCount, AuthorPostCount, Post
+
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def count_posts(connection: Connection, counts: Dict[str, int]) -> None:
+    """
+    Add new posts to the post counts of their authors, with a single upsert.
+
+    Args:
+        connection (Connection): The connection of the writing transaction.
+        counts (Dict[str, int]): The number of new posts by author.
+    """
+    if not counts:
+        return
+    upsert = UPSERTS[connection.dialect.name](AuthorPostCount).values(
+        [{"author": author, "post_count": count} for author, count in counts.items()]
+    )
+    connection.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[AuthorPostCount.author],
+            set_={
+                "post_count": AuthorPostCount.post_count + upsert.excluded.post_count
+            },
+        )
+    )
+
+
+def uncount_posts(db: Session, *criteria: ColumnElement[bool]) -> None:
+    """
+    Remove the posts about to be deleted from the post counts of their
+    authors, with a single UPDATE.
+
+    Args:
+        db (Session): The database session.
+        *criteria (ColumnElement[bool]): The criteria matching the live posts
+        about to be deleted.
+    """
+    authors = select(Post.author).where(*criteria)
+    removed = (
+        select(func.count())
+        .where(Post.author == AuthorPostCount.author, *criteria)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(AuthorPostCount)
+        .where(AuthorPostCount.author.in_(authors))
+        .values(post_count=AuthorPostCount.post_count - removed),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def keep_archived_counts(db: Session, topic_id: int) -> None:
+    """
+    Record the post counts of the live posts of a topic about to be archived.
+
+    Args:
+        db (Session): The database session.
+        topic_id (int): The ID of the topic.
+    """
+    db.execute(
+        insert(ArchivedPostCount).from_select(
+            ["topic_id", "author", "post_count"],
+            select(Post.topic_id, Post.author, func.count())
+            .where(Post.topic_id == topic_id, Post.deleted_at.is_(None))
+            .group_by(Post.topic_id, Post.author),
+        )
+    )
+
+
+def uncount_archived_posts(db: Session, topic_ids: Select) -> None:
+    """
+    Remove the archived posts of topics about to be hard deleted from the post
+    counts of their authors.
+
+    Args:
+        db (Session): The database session.
+        topic_ids (Select): The query selecting the IDs of the topics.
+    """
+    archived = ArchivedPostCount.topic_id.in_(topic_ids)
+    removed = (
+        select(func.sum(ArchivedPostCount.post_count))
+        .where(ArchivedPostCount.author == AuthorPostCount.author, archived)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(AuthorPostCount)
+        .where(
+            AuthorPostCount.author.in_(select(ArchivedPostCount.author).where(archived))
+        )
+        .values(post_count=AuthorPostCount.post_count - removed),
+        execution_options={"synchronize_session": False},
+    )
+    db.execute(
+        delete(ArchivedPostCount).where(archived),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def author_post_count(db: Session, author: str) -> int:
+    """
+    Read the number of live posts of an author.
+
+    Args:
+        db (Session): The database session.
+        author (str): The name of the author.
+
+    Returns:
+        int: The number of posts, 0 if the author never posted.
+    """
+    return (
+        db.scalar(
+            select(AuthorPostCount.post_count).where(AuthorPostCount.author == author)
+        )
+        or 0
+    )
+
+
+def rebuild_post_counts(db: Session) -> int:
+    """
+    Recompute the post counts of every author from the `post` table and the
+    counts of the archived posts.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        int: The number of authors with live posts.
+    """
+    counts = union_all(
+        select(Post.author, func.count().label("post_count"))
+        .where(Post.deleted_at.is_(None))
+        .group_by(Post.author),
+        select(ArchivedPostCount.author, ArchivedPostCount.post_count),
+    ).subquery()
+    db.execute(delete(AuthorPostCount))
+    authors = db.execute(
+        insert(AuthorPostCount).from_select(
+            ["author", "post_count"],
+            select(counts.c.author, func.sum(counts.c.post_count)).group_by(
+                counts.c.author
+            ),
+        )
+    ).rowcount
+    db.commit()
+    return authors
+
+
+def main() -> None:
+    from database.db_conf import SessionLocal, get_engine
+
+    get_engine()
+    with SessionLocal() as db:
+        authors = rebuild_post_counts(db)
+    print(f"Rebuilt the post counts of {authors} authors")
+
+
+if __name__ == "__main__":
+    main()
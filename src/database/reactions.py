@@ -0,0 +1,244 @@
+"""
+Reactions of users to posts.
+
+A reaction is a row of the `post_reaction` table, whose primary key makes
+a user react at most once of each kind to a post. The number of reactions
+of each kind is kept in the `post_reaction_count` table, which is not
+updated by the reactions themselves: the reactions are counted in memory
+by `reactions.ReactionCounter` and added to the counts in batches. The
+reactions counted by a process which is killed before its next flush are
+lost from the counts; `read_reaction_drift` finds the counts which differ
+from their reactions, and the application reports them in its metrics.
+
+Rebuild the counts from the `post_reaction` table, e.g. after reactions
+were counted twice or lost, from the `src` directory, while no application
+process is running, since the reactions they counted and did not flush
+yet would be added again:
+
+    python -m database.reactions
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import (
+    Connection,
+    Integer,
+    String,
+    and_,
+    column,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+    values,
+)
+from sqlalchemy.orm import Session
+
+from database.models import Post, PostReaction, PostReactionCount
+from database.post_counts import UPSERTS
+
+
+def add_reaction(db: Session, post_id: int, reacted_by: str, kind: str) -> bool:
+    """
+    Add the reaction of a user to a live post.
+
+    The reaction is inserted with a single statement, which neither fails
+    nor waits when the user already reacted.
+
+    Args:
+        db (Session): The database session.
+        post_id (int): The ID of the post.
+        reacted_by (str): The name of the user.
+        kind (str): The kind of reaction.
+
+    Returns:
+        bool: True if the reaction was added, False if the user already
+        reacted with this kind or if the post does not exist.
+    """
+    reaction = select(
+        literal(post_id), literal(reacted_by), literal(kind), literal(datetime.today())
+    ).where(exists().where(Post.id == post_id, Post.deleted_at.is_(None)))
+    added = db.execute(
+        UPSERTS[db.get_bind().dialect.name](PostReaction)
+        .from_select(["post_id", "reacted_by", "kind", "reacted_on"], reaction)
+        .on_conflict_do_nothing()
+    ).rowcount
+    db.commit()
+    return added == 1
+
+
+def remove_reaction(db: Session, post_id: int, reacted_by: str, kind: str) -> bool:
+    """
+    Remove the reaction of a user to a post.
+
+    Args:
+        db (Session): The database session.
+        post_id (int): The ID of the post.
+        reacted_by (str): The name of the user.
+        kind (str): The kind of reaction.
+
+    Returns:
+        bool: True if the reaction was removed, False if there was none.
+    """
+    removed = db.execute(
+        delete(PostReaction).where(
+            PostReaction.post_id == post_id,
+            PostReaction.reacted_by == reacted_by,
+            PostReaction.kind == kind,
+        )
+    ).rowcount
+    db.commit()
+    return removed == 1
+
+
+def add_reaction_counts(
+    connection: Connection, deltas: Dict[Tuple[int, str], int]
+) -> None:
+    """
+    Add a batch of changes to the reaction counts, with a single upsert.
+
+    The changes to the counts of posts which no longer exist, e.g. because
+    they were purged or archived since they were counted, are dropped.
+
+    Args:
+        connection (Connection): The connection of the writing transaction.
+        deltas (Dict[Tuple[int, str], int]): The change of the count of each
+        post ID and kind of reaction.
+    """
+    if not deltas:
+        return
+    changes = (
+        values(
+            column("post_id", Integer),
+            column("kind", String),
+            column("count", Integer),
+            name="delta",
+        )
+        .data([(post_id, kind, delta) for (post_id, kind), delta in deltas.items()])
+        .cte()
+    )
+    upsert = UPSERTS[connection.dialect.name](PostReactionCount).from_select(
+        ["post_id", "kind", "count"],
+        select(changes).where(exists().where(Post.id == changes.c.post_id)),
+    )
+    connection.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[PostReactionCount.post_id, PostReactionCount.kind],
+            set_={"count": PostReactionCount.count + upsert.excluded.count},
+        )
+    )
+
+
+def read_reaction_counts(
+    db: Session, post_ids: Iterable[int]
+) -> Dict[int, Dict[str, int]]:
+    """
+    Read the reaction counts of posts.
+
+    Args:
+        db (Session): The database session.
+        post_ids (Iterable[int]): The IDs of the posts.
+
+    Returns:
+        Dict[int, Dict[str, int]]: The number of reactions of each kind, by
+        post ID. Posts without reactions have no counts.
+    """
+    counts: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for row in db.execute(
+        select(
+            PostReactionCount.post_id, PostReactionCount.kind, PostReactionCount.count
+        ).where(PostReactionCount.post_id.in_(list(post_ids)))
+    ):
+        counts[row.post_id][row.kind] = row.count
+    return dict(counts)
+
+
+def read_reaction_drift(db: Session) -> Dict[Tuple[int, str], int]:
+    """
+    Compare the reaction counts of every post with its reactions.
+
+    The reactions counted in memory by the application processes and not
+    flushed yet make their counts differ too, until their next flush.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        Dict[Tuple[int, str], int]: The number of reactions minus the count,
+        by post ID and kind of reaction, for the counts which differ.
+    """
+    reactions = (
+        select(PostReaction.post_id, PostReaction.kind, func.count().label("count"))
+        .group_by(PostReaction.post_id, PostReaction.kind)
+        .subquery()
+    )
+    counts = (
+        select(
+            PostReactionCount.post_id, PostReactionCount.kind, PostReactionCount.count
+        )
+        .where(PostReactionCount.count != 0)
+        .subquery()
+    )
+    same_key = and_(
+        reactions.c.post_id == counts.c.post_id, reactions.c.kind == counts.c.kind
+    )
+    miscounted = (
+        select(
+            counts.c.post_id,
+            counts.c.kind,
+            func.coalesce(reactions.c.count, 0) - counts.c.count,
+        )
+        .select_from(counts.outerjoin(reactions, same_key))
+        .where(or_(reactions.c.count.is_(None), reactions.c.count != counts.c.count))
+    )
+    uncounted = (
+        select(reactions.c.post_id, reactions.c.kind, reactions.c.count)
+        .select_from(reactions.outerjoin(counts, same_key))
+        .where(counts.c.post_id.is_(None))
+    )
+    return {
+        (post_id, kind): drift
+        for post_id, kind, drift in db.execute(union_all(miscounted, uncounted))
+    }
+
+
+def rebuild_reaction_counts(db: Session) -> int:
+    """
+    Recompute the reaction counts of every post from the `post_reaction` table.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        int: The number of counts, i.e. of posts and kinds with reactions.
+    """
+    db.execute(delete(PostReactionCount))
+    counts = db.execute(
+        insert(PostReactionCount).from_select(
+            ["post_id", "kind", "count"],
+            select(PostReaction.post_id, PostReaction.kind, func.count()).group_by(
+                PostReaction.post_id, PostReaction.kind
+            ),
+        )
+    ).rowcount
+    db.commit()
+    return counts
+
+
+def main() -> None:
+    from database.db_conf import SessionLocal, get_engine
+
+    get_engine()
+    with SessionLocal() as db:
+        counts = rebuild_reaction_counts(db)
+    print(f"Rebuilt {counts} reaction counts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import zlib
+from typing import Iterable, Iterator
+
+COMPRESSION_LEVEL = 9
+
+
+def encode_revision(previous: str, current: str) -> bytes:
+    """
+    Encode the previous content of a post as a delta against its current content.
+
+    The previous content is deflated with the current content as preset
+    dictionary, so the unchanged parts of the text are encoded as back
+    references into the dictionary.
+
+    Args:
+        previous (str): The content being replaced.
+        current (str): The content replacing it.
+
+    Returns:
+        bytes: The encoded delta.
+    """
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=current.encode())
+    return compressor.compress(previous.encode()) + compressor.flush()
+
+
+def decode_revision(delta: bytes, current: str) -> str:
+    """
+    Decode the previous content of a post from a delta and its current content.
+
+    Args:
+        delta (bytes): The delta returned by `encode_revision`.
+        current (str): The content that replaced the decoded one.
+
+    Returns:
+        str: The previous content.
+    """
+    decompressor = zlib.decompressobj(zdict=current.encode())
+    return (decompressor.decompress(delta) + decompressor.flush()).decode()
+
+
+def replay_revisions(current: str, deltas: Iterable[bytes]) -> Iterator[str]:
+    """
+    Decode a chain of deltas, from the newest to the oldest.
+
+    Args:
+        current (str): The current content of the post.
+        deltas (Iterable[bytes]): The deltas, newest first.
+
+    Yields:
+        str: The previous contents of the post, newest first.
+    """
+    for delta in deltas:
+        current = decode_revision(delta, current)
+        yield current
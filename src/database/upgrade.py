@@ -0,0 +1,166 @@
+"""
+Upgrade of a database created by an earlier version of the forum.
+
+The application only runs `create_all` on startup, which creates the
+missing tables but never alters the existing ones. This command adds the
+columns and indexes added since to the existing tables, e.g. `deleted_at`,
+`truncated`, `change_xid`, `change_seq`, `updated_at` and `archived_at` on
+`topic` and `post`, then creates the missing tables. Columns which are not
+nullable are added with their default value.
+
+Existing topics and posts then get a change position, so that sync clients
+receive them, and the post counts of the authors are rebuilt when their
+table is created. The upgrade runs in a single transaction and can be run
+again safely. Stop the application first, then run, from the `src`
+directory:
+
+    python -m database.upgrade
+    python -m database.upgrade --dry-run
+"""
+
+import argparse
+from typing import List
+
+from sqlalchemy import Column, Connection, bindparam, inspect, literal, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from database.changes import reserve_change_positions
+from database.models import AuthorPostCount, BaseModel, Post, Topic
+from database.post_counts import rebuild_post_counts
+
+
+def _column_ddl(connection: Connection, column: Column) -> str:
+    dialect = connection.dialect
+    quote = dialect.identifier_preparer.quote
+    ddl = (
+        f"ALTER TABLE {quote(column.table.name)} ADD COLUMN {quote(column.name)} "
+        f"{column.type.compile(dialect=dialect)}"
+    )
+    if column.nullable:
+        return ddl
+    if column.default is None or not column.default.is_scalar:
+        raise ValueError(f"{column} is not nullable and has no default value")
+    default = literal(column.default.arg, column.type).compile(
+        dialect=dialect, compile_kwargs={"literal_binds": True}
+    )
+    return f"{ddl} NOT NULL DEFAULT {default}"
+
+
+def upgrade_ddl(connection: Connection) -> List[str]:
+    """
+    Build the statements adding the missing columns and indexes to the
+    existing tables.
+
+    Args:
+        connection (Connection): The database connection.
+
+    Returns:
+        List[str]: The statements, empty if the tables are up to date.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    statements = []
+    for table in BaseModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        statements += [
+            _column_ddl(connection, column)
+            for column in table.columns
+            if column.name not in columns
+        ]
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        statements += [
+            str(CreateIndex(index).compile(dialect=connection.dialect))
+            for index in sorted(table.indexes, key=lambda index: index.name)
+            if index.name not in indexes
+        ]
+    return statements
+
+
+def backfill_change_positions(connection: Connection, chunk_size: int) -> int:
+    """
+    Give a change position to the topics and posts which have none.
+
+    Args:
+        connection (Connection): The connection of the upgrading transaction.
+        chunk_size (int): The number of records updated by statement.
+
+    Returns:
+        int: The number of updated records.
+    """
+    count = 0
+    for table in (Topic.__table__, Post.__table__):
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("record_id"))
+            .values(
+                change_xid=bindparam("record_xid"), change_seq=bindparam("record_seq")
+            )
+        )
+        while ids := connection.scalars(
+            select(table.c.id)
+            .where(table.c.change_seq == 0)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all():
+            positions = reserve_change_positions(connection, len(ids))
+            connection.execute(
+                stmt,
+                [
+                    {"record_id": id_, "record_xid": xid, "record_seq": seq}
+                    for id_, (xid, seq) in zip(ids, positions)
+                ],
+            )
+            count += len(ids)
+    return count
+
+
+def upgrade_schema(connection: Connection, chunk_size: int = 10_000) -> List[str]:
+    """
+    Upgrade the schema and the data of a database to the current models.
+
+    Args:
+        connection (Connection): The database connection.
+        chunk_size (int): The number of records given a change position by
+        statement.
+
+    Returns:
+        List[str]: The executed statements adding columns and indexes.
+    """
+    with connection.begin():
+        existing_tables = set(inspect(connection).get_table_names())
+        statements = upgrade_ddl(connection)
+        for statement in statements:
+            connection.execute(text(statement))
+        BaseModel.metadata.create_all(connection)
+        backfill_change_positions(connection, chunk_size)
+        if AuthorPostCount.__tablename__ not in existing_tables:
+            with Session(bind=connection) as db:
+                rebuild_post_counts(db)
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    from database.db_conf import get_engine
+
+    with get_engine().connect() as connection:
+        if args.dry_run:
+            for statement in upgrade_ddl(connection):
+                print(f"{statement};")
+            return
+        statements = upgrade_schema(connection)
+    print(
+        f"Executed {len(statements)} statements"
+        if statements
+        else "No column or index to add"
+    )
+
+
+if __name__ == "__main__":
+    main()
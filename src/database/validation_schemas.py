@@ -1,34 +1,53 @@
-from typing import Optional, TypeAlias
+from datetime import datetime
+from typing import Any, NotRequired, Optional, TypedDict
 
 from pydantic import BaseModel
 
-ValidatedData: TypeAlias = BaseModel
+
+class ValidatedData(TypedDict):
+    """
+    A base dict representing the column values validated for a write.
+
+    Validated data is the parameters of the INSERT or UPDATE statement
+    itself: it is built once, with `from_request`, from a request payload
+    FastAPI has already validated and from values set by the server.
+    """
 
 
 class TopicCreateValidatedData(ValidatedData):
     """
-    A model representing validated data for creating a topic.
+    A dict representing validated data for creating a topic.
     """
 
     title: str
-    description: Optional[str] = None
+    description: NotRequired[Optional[str]]
     category: str
     created_by: str
 
 
-class TopicUpdateValidatedData(ValidatedData):
+class TopicImportValidatedData(TopicCreateValidatedData):
+    """
+    A dict representing validated data for importing a topic, keeping its
+    original ID and creation date when provided.
+    """
+
+    id: NotRequired[Optional[int]]
+    created_on: NotRequired[Optional[datetime]]
+
+
+class TopicUpdateValidatedData(ValidatedData, total=False):
     """
-    A model representing validated data for updating a topic.
+    A dict representing validated data for updating a topic.
     """
 
-    title: Optional[str] = None
-    description: Optional[str] = None
-    category: Optional[str] = None
+    title: str
+    description: str
+    category: str
 
 
 class PostCreateValidatedData(ValidatedData):
     """
-    A model representing validated data for creating a post.
+    A dict representing validated data for creating a post.
     """
 
     content: str
@@ -36,9 +55,41 @@ class PostCreateValidatedData(ValidatedData):
     topic_id: int
 
 
+class PostImportValidatedData(PostCreateValidatedData):
+    """
+    A dict representing validated data for importing a post, keeping its
+    original ID and publication date when provided.
+    """
+
+    id: NotRequired[Optional[int]]
+    posted_on: NotRequired[Optional[datetime]]
+
+
 class PostUpdateValidatedData(ValidatedData):
     """
-    A model representing validated data for updating a post.
+    A dict representing validated data for updating a post.
     """
 
     content: str
+
+
+def from_request(payload: BaseModel, **fields: Any) -> ValidatedData:
+    """
+    Build the validated data of a write from a request payload validated by
+    FastAPI, without validating nor serializing the payload again.
+
+    Fields of the payload set to None are left out, so that an update only
+    sets the fields sent by the client.
+
+    Args:
+        payload (BaseModel): The validated request payload.
+        **fields (Any): The values set by the server, e.g. the requester name.
+
+    Returns:
+        ValidatedData: The validated data.
+    """
+    validated_data = {
+        name: value for name, value in payload.__dict__.items() if value is not None
+    }
+    validated_data.update(fields)
+    return validated_data
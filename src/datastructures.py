@@ -1,6 +1,9 @@
+from enum import StrEnum
 from typing import List, Optional
 
-from pydantic import BaseModel, conint
+from pydantic import BaseModel, PrivateAttr, confloat, conint, constr
+
+from permissions import Role, roles_from_groups
 
 
 class Token(BaseModel):
@@ -21,11 +24,21 @@ class RequesterData(BaseModel):
     Attributes:
         name (str): The name of the requester.
         groups (List[str]): A list of groups the requester belongs to.
+        roles (Role): The role bitmask computed from the groups once, at validation.
     """
 
     name: str
     groups: List[str]
 
+    _roles: Role = PrivateAttr(default=Role.NONE)
+
+    def model_post_init(self, __context) -> None:
+        self._roles = roles_from_groups(self.groups)
+
+    @property
+    def roles(self) -> Role:
+        return self._roles
+
 
 class PageParams(BaseModel):
     """
@@ -40,6 +53,62 @@ class PageParams(BaseModel):
     size: conint(ge=1, le=100) = 10
 
 
+class KeysetParams(BaseModel):
+    """
+    A model representing keyset pagination parameters.
+
+    Attributes:
+        cursor (Optional[str]): The cursor returned with the previous page,
+        None for the first page. Defaults to None.
+        size (conint): The number of items per page, must be between 1 and 100. Defaults to 10.
+    """
+
+    cursor: Optional[str] = None
+    size: conint(ge=1, le=100) = 10
+
+
+class LatestPostsParams(BaseModel):
+    """
+    A model representing the number of latest posts to embed per topic.
+
+    Attributes:
+        posts (conint): The number of most recent posts returned with each topic,
+        must be between 1 and 20. Defaults to 3.
+    """
+
+    posts: conint(ge=1, le=20) = 3
+
+
+class ChangesParams(BaseModel):
+    """
+    A model representing the parameters of a sync request.
+
+    Attributes:
+        since (constr): The change token returned by the previous sync, formatted
+        as `<transaction ID>.<sequence number>`. Defaults to "0.0", i.e. before
+        every change.
+        limit (conint): The maximum number of changed records to return, must be
+        between 1 and 1000. Defaults to 500.
+    """
+
+    since: constr(pattern=r"^\d+\.\d+$") = "0.0"
+    limit: conint(ge=1, le=1000) = 500
+
+
+class ProfileParams(BaseModel):
+    """
+    A model representing the parameters of a sampling profile.
+
+    Attributes:
+        seconds (confloat): The sampling duration, must be greater than 0. Defaults to 10.
+        interval_ms (conint): The interval between two samples in milliseconds,
+        must be between 1 and 1000. Defaults to 10.
+    """
+
+    seconds: confloat(gt=0) = 10.0
+    interval_ms: conint(ge=1, le=1000) = 10
+
+
 class TopicCreateData(BaseModel):
     """
     A model representing data for creating a topic.
@@ -70,6 +139,29 @@ class TopicUpdateData(BaseModel):
     category: Optional[str] = None
 
 
+class ReactionKind(StrEnum):
+    """
+    The kinds of reactions to a post.
+    """
+
+    LIKE = "like"
+    LOVE = "love"
+    LAUGH = "laugh"
+    SAD = "sad"
+    ANGRY = "angry"
+
+
+class ReactionData(BaseModel):
+    """
+    A model representing data for reacting to a post.
+
+    Attributes:
+        kind (ReactionKind): The kind of reaction.
+    """
+
+    kind: ReactionKind
+
+
 class PostData(BaseModel):
     """
     A model representing data for a post.
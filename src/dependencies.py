@@ -1,41 +1,56 @@
-from typing import Annotated
+from typing import (
+    Annotated,
+    AsyncGenerator,
+    Callable,
+    Generator,
+    Optional,
+    Set,
+    Type,
+)
 
 import jwt
-from fastapi import Header
-from jwt.exceptions import DecodeError
+from fastapi import Depends, Header, Request
+from jwt.exceptions import InvalidTokenError, PyJWKError
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
 from conf import get_settings
-from database.db_conf import SessionLocal
+from database.db_conf import SessionLocal, get_engine
 from datastructures import RequesterData, Token
-from exceptions import JWTTokenInvalidException
-
-
-def get_db():
-    """
-    Generator function to get a database session.
-
-    Yields:
-        Session: A database session.
-    """
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
+from exceptions import InvalidFieldSelectionException, JWTTokenInvalidException
+from idempotency import IdempotentRequest, get_idempotency_store
+from jwks import JWKSKeySet
+from limiter import Priority, get_db_limiter
+from permissions import Role
+from profiler import timed
 
 
 class JWTToken:
     """
     A class for handling JWT token operations.
 
+    Tokens signed with an asymmetric algorithm are verified against the
+    public keys of a JWKS document, selected by the `kid` header, when a
+    JWKS source is configured. Other tokens are verified with the shared
+    secret, when one is configured.
+
     Attributes:
         _secret (str): The secret key used for encoding and decoding JWT tokens.
         _algorithm (str): The algorithm used for encoding and decoding JWT tokens.
+        key_set (Optional[JWKSKeySet]): The cached public keys used for
+        asymmetric algorithms, None if no JWKS source is configured.
     """
 
     def __init__(self):
         self._secret = get_settings().JWT_SECRET
         self._algorithm = get_settings().JWT_ALG
+        self.key_set = (
+            JWKSKeySet(
+                get_settings().JWT_JWKS_SOURCE, get_settings().JWT_JWKS_ALGORITHMS
+            )
+            if get_settings().JWT_JWKS_SOURCE
+            else None
+        )
 
     def decode(self, token: Annotated[Token, Header()]) -> RequesterData:
         """
@@ -50,9 +65,145 @@ class JWTToken:
         Raises:
             JWTTokenInvalidException: If the token is invalid or cannot be decoded.
         """
-        try:
-            return RequesterData(
-                **jwt.decode(token.bearer, self._secret, [self._algorithm])
-            )
-        except DecodeError as e:
-            raise JWTTokenInvalidException(e)
+        with timed("auth"):
+            try:
+                header = jwt.get_unverified_header(token.bearer)
+                if (
+                    self.key_set is not None
+                    and header.get("alg") in self.key_set.algorithms
+                ):
+                    key = self.key_set.get(header.get("kid"))
+                    payload = jwt.decode(token.bearer, key.key, [key.algorithm_name])
+                elif self._secret:
+                    payload = jwt.decode(token.bearer, self._secret, [self._algorithm])
+                else:
+                    raise InvalidTokenError(
+                        f"Algorithm {header.get('alg')} not allowed"
+                    )
+                return RequesterData(**payload)
+            except (InvalidTokenError, PyJWKError) as e:
+                raise JWTTokenInvalidException(e)
+
+
+jwt_token = JWTToken()
+
+
+async def admit_db_request(
+    request: Request, requester_data: RequesterData = Depends(jwt_token.decode)
+) -> AsyncGenerator[None, None]:
+    """
+    Generator function holding a slot of the database concurrency limiter
+    for the duration of a request.
+
+    Writes and moderator requests take precedence over browsing when
+    requests have to wait for a slot.
+
+    Args:
+        request (Request): The incoming request.
+        requester_data (RequesterData): The data of the requester.
+
+    Yields:
+        None: Once the request is admitted.
+
+    Raises:
+        ServiceOverloadedException: If the request is shed.
+    """
+    limiter = get_db_limiter()
+    if limiter is None:
+        yield
+        return
+    priority = (
+        Priority.WRITE
+        if request.method != "GET" or Role.MODERATOR in requester_data.roles
+        else Priority.BROWSE
+    )
+    admitted_at = await limiter.acquire(priority)
+    try:
+        yield
+    finally:
+        limiter.release(admitted_at)
+
+
+def get_db(_: None = Depends(admit_db_request)):
+    """
+    Generator function to get a database session, once the request is
+    admitted by the database concurrency limiter.
+
+    Yields:
+        Session: A database session.
+    """
+    get_engine()
+    try:
+        db = SessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+def get_session_factory() -> Callable[[], Session]:
+    """
+    Function to get the factory of database sessions, for work which may
+    outlive the request, e.g. a read coalesced with other requests.
+
+    Returns:
+        Callable[[], Session]: The factory creating database sessions.
+    """
+    get_engine()
+    return SessionLocal
+
+
+class FieldSelection:
+    """
+    A class for parsing the `fields` query parameter of a response schema.
+
+    Attributes:
+        _allowed_fields (frozenset[str]): The fields of the response schema.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self._allowed_fields = frozenset(schema.model_fields)
+
+    def __call__(self, fields: Optional[str] = None) -> Optional[Set[str]]:
+        """
+        Parses a comma separated list of fields to include in the response.
+
+        Args:
+            fields (Optional[str]): The comma separated field names, e.g. ``id,title``.
+
+        Returns:
+            Optional[Set[str]]: The selected fields, or None if all fields should be returned.
+
+        Raises:
+            InvalidFieldSelectionException: If a field is not part of the response schema.
+        """
+        if not fields:
+            return None
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        if unknown := selected - self._allowed_fields:
+            raise InvalidFieldSelectionException(unknown)
+        return selected or None
+
+
+def get_idempotent_request(
+    request: Request,
+    idempotency_key: Annotated[
+        Optional[str], Header(min_length=1, max_length=255)
+    ] = None,
+) -> Generator[IdempotentRequest, None, None]:
+    """
+    Generator function binding a write request to its `Idempotency-Key` header.
+
+    Args:
+        request (Request): The incoming request.
+        idempotency_key (Optional[str]): The idempotency key sent by the client.
+
+    Yields:
+        IdempotentRequest: The idempotent request, released once the endpoint returns.
+    """
+    idempotent_request = IdempotentRequest(
+        get_idempotency_store(), idempotency_key, request.method, request.url.path
+    )
+    try:
+        yield idempotent_request
+    finally:
+        idempotent_request.release()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
 
 from fastapi import status
 
@@ -13,9 +14,11 @@ class ForumApiException(Exception, ABC):
 
     Attributes:
         STATUS_CODE (int): The HTTP status code associated with the exception.
+        HEADERS (Optional[Dict[str, str]]): The headers added to the error response.
     """
 
     STATUS_CODE = None
+    HEADERS: Optional[Dict[str, str]] = None
 
     @property
     @abstractmethod
@@ -94,3 +97,238 @@ class NoPermissionException(ForumApiException):
             str: A message indicating that the user does not have sufficient permissions.
         """
         return f"User {self.username} does not have enough permission to perform this action!"
+
+
+class InvalidFieldSelectionException(ForumApiException):
+    """
+    Exception raised when a client selects response fields that do not exist.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for a bad request (400).
+        fields (Iterable[str]): The requested fields that are not part of the response schema.
+    """
+
+    STATUS_CODE = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, fields: Iterable[str]):
+        """
+        Initializes the exception with the unknown fields.
+
+        Args:
+            fields (Iterable[str]): The requested fields that are not part of the response schema.
+        """
+        self.fields = sorted(fields)
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message listing the unknown fields.
+        """
+        return f"Unknown fields requested: {', '.join(self.fields)}"
+
+
+class IdempotencyKeyConflictException(ForumApiException):
+    """
+    Exception raised when a write is retried while its first attempt is still in progress.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for a conflict (409).
+        key (str): The idempotency key of the write.
+    """
+
+    STATUS_CODE = status.HTTP_409_CONFLICT
+
+    def __init__(self, key: str):
+        """
+        Initializes the exception with the idempotency key.
+
+        Args:
+            key (str): The idempotency key of the write.
+        """
+        self.key = key
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message indicating that the write is still in progress.
+        """
+        return f"A request with idempotency key {self.key} is already being processed"
+
+
+class IdempotencyKeyMismatchException(ForumApiException):
+    """
+    Exception raised when an idempotency key is reused with a different payload.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for an unprocessable entity (422).
+        key (str): The reused idempotency key.
+    """
+
+    STATUS_CODE = status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def __init__(self, key: str):
+        """
+        Initializes the exception with the idempotency key.
+
+        Args:
+            key (str): The reused idempotency key.
+        """
+        self.key = key
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message indicating that the key was used for another request.
+        """
+        return f"Idempotency key {self.key} was already used with a different payload"
+
+
+class QueryBudgetExceededException(ForumApiException):
+    """
+    Exception raised when a request executes more SQL statements than its budget.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for an internal server error (500).
+        count (int): The number of statements executed so far.
+        budget (int): The maximum number of statements allowed.
+    """
+
+    STATUS_CODE = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    def __init__(self, count: int, budget: int):
+        """
+        Initializes the exception with the statement count and budget.
+
+        Args:
+            count (int): The number of statements executed so far.
+            budget (int): The maximum number of statements allowed.
+        """
+        self.count = count
+        self.budget = budget
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message indicating that the query budget was exceeded.
+        """
+        return (
+            f"Query budget exceeded: {self.count} statements, budget is {self.budget}"
+        )
+
+
+class ProfileInProgressException(ForumApiException):
+    """
+    Exception raised when a profile is requested while another one is being captured.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for a conflict (409).
+    """
+
+    STATUS_CODE = status.HTTP_409_CONFLICT
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message indicating that a profile is already being captured.
+        """
+        return "A profile is already being captured, retry once it is complete"
+
+
+class ServiceOverloadedException(ForumApiException):
+    """
+    Exception raised when a request is shed because the database is saturated.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for a service unavailable (503).
+        HEADERS (Dict[str, str]): The headers asking the client to retry later.
+    """
+
+    STATUS_CODE = status.HTTP_503_SERVICE_UNAVAILABLE
+    HEADERS = {"Retry-After": "1"}
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message asking the client to retry later.
+        """
+        return "The service is overloaded, retry later"
+
+
+class InvalidCursorException(ForumApiException):
+    """
+    Exception raised when a pagination cursor cannot be decoded.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for an unprocessable entity (422).
+        cursor (str): The invalid cursor.
+    """
+
+    STATUS_CODE = status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def __init__(self, cursor: str):
+        """
+        Initializes the exception with the invalid cursor.
+
+        Args:
+            cursor (str): The invalid cursor.
+        """
+        self.cursor = cursor
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message indicating that the cursor is invalid.
+        """
+        return f"Invalid pagination cursor {self.cursor!r}"
+
+
+class TopicArchivedException(ForumApiException):
+    """
+    Exception raised when posting to an archived topic, which is read-only.
+
+    Attributes:
+        STATUS_CODE (int): The HTTP status code for a conflict (409).
+        topic_id (int): The ID of the archived topic.
+    """
+
+    STATUS_CODE = status.HTTP_409_CONFLICT
+
+    def __init__(self, topic_id: int):
+        """
+        Initializes the exception with the ID of the archived topic.
+
+        Args:
+            topic_id (int): The ID of the archived topic.
+        """
+        self.topic_id = topic_id
+
+    @property
+    def message(self) -> str:
+        """
+        The message describing the exception.
+
+        Returns:
+            str: A message indicating that the topic is read-only.
+        """
+        return f"Topic {self.topic_id} is archived and read-only"
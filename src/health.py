@@ -0,0 +1,121 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+
+class StartupProfile:
+    """
+    A class recording the duration of each step of the application startup.
+
+    Attributes:
+        steps (Dict[str, float]): The duration of each completed step, in milliseconds.
+        ready (bool): Whether the startup is complete.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, float] = {}
+        self.ready = False
+        self._started_at = time.perf_counter()
+        self._ready_at: Optional[float] = None
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """
+        Measures the duration of a startup step.
+
+        Args:
+            name (str): The name of the step.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = (time.perf_counter() - start) * 1000
+
+    def mark_ready(self) -> None:
+        """
+        Marks the startup as complete.
+        """
+        self.ready = True
+        self._ready_at = time.perf_counter()
+
+    @property
+    def total(self) -> Optional[float]:
+        """
+        The total duration of the startup, in milliseconds.
+
+        Returns:
+            Optional[float]: The duration, or None if the startup is not complete.
+        """
+        if self._ready_at is None:
+            return None
+        return (self._ready_at - self._started_at) * 1000
+
+
+class DatabaseProbe:
+    """
+    A class probing the database with a cached result.
+
+    The database is queried at most once every `ttl` seconds, whatever the
+    number of probe requests, and concurrent probes wait for the same check.
+
+    Attributes:
+        engine (Engine): The database engine.
+        ttl (float): The number of seconds a probe result is reused.
+    """
+
+    def __init__(self, engine: Engine, ttl: float):
+        self.engine = engine
+        self.ttl = ttl
+        self._reachable = False
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _check(self) -> bool:
+        try:
+            with self.engine.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.ttl
+        )
+
+    async def reachable(self) -> bool:
+        """
+        Tells whether the database is reachable, using the cached result while fresh.
+
+        Returns:
+            bool: True if the last check could run a query.
+        """
+        if self._is_fresh():
+            return self._reachable
+        async with self._lock:
+            if not self._is_fresh():
+                self._reachable = await asyncio.to_thread(self._check)
+                self._checked_at = time.monotonic()
+        return self._reachable
+
+    def pool_status(self) -> Dict[str, int]:
+        """
+        Reports the state of the connection pool, without querying the database.
+
+        Returns:
+            Dict[str, int]: The pool size and the number of checked in, checked
+            out and overflow connections.
+        """
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
@@ -0,0 +1,170 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Iterator, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+TOPICS_KEY = "topics"
+
+
+def topic_key(topic_id: int) -> str:
+    return f"topic-{topic_id}"
+
+
+def post_key(post_id: int) -> str:
+    return f"post-{post_id}"
+
+
+def user_key(name: str) -> str:
+    return f"user-{name}"
+
+
+class CacheTags:
+    """
+    A class collecting what the response of a request depends on.
+
+    Read handlers tag their response with the surrogate keys of the records
+    it contains and, when it is exact, the last modification date of these
+    records. Writes tag their response with the keys of the records they
+    changed, so that the responses depending on them can be purged.
+
+    Attributes:
+        keys (Set[str]): The surrogate keys, e.g. ``topic-3``.
+        last_modified (Optional[datetime]): The last modification date.
+    """
+
+    def __init__(self):
+        self.keys: Set[str] = set()
+        self.last_modified: Optional[datetime] = None
+
+    def add(self, *keys: str, last_modified: Optional[datetime] = None) -> None:
+        self.keys.update(keys)
+        if last_modified is not None and (
+            self.last_modified is None or last_modified > self.last_modified
+        ):
+            self.last_modified = last_modified
+
+
+_cache_tags: ContextVar[Optional[CacheTags]] = ContextVar("cache_tags", default=None)
+
+
+@contextmanager
+def record_cache_tags() -> Iterator[CacheTags]:
+    """
+    Collect the cache tags of the request running in the current context.
+
+    Yields:
+        CacheTags: The collected tags.
+    """
+    cache_tags = CacheTags()
+    token = _cache_tags.set(cache_tags)
+    try:
+        yield cache_tags
+    finally:
+        _cache_tags.reset(token)
+
+
+def tag_response(*keys: str, last_modified: Optional[datetime] = None) -> None:
+    """
+    Tag the response of the current request, if its tags are being collected.
+
+    Args:
+        *keys (str): The surrogate keys of the records the response depends on.
+        last_modified (Optional[datetime]): The last modification date of the
+        records, only when the response is made of these records alone.
+    """
+    if (cache_tags := _cache_tags.get()) is not None:
+        cache_tags.add(*keys, last_modified=last_modified)
+
+
+def http_date(value: datetime) -> str:
+    """
+    Format a date as an HTTP date.
+
+    Naive dates are in local time, as stored by the database models.
+
+    Args:
+        value (datetime): The date.
+
+    Returns:
+        str: The HTTP date, e.g. ``Wed, 01 Jan 2025 10:00:00 GMT``.
+    """
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    """
+    Parse an HTTP date.
+
+    Args:
+        value (str): The HTTP date.
+
+    Returns:
+        Optional[datetime]: The aware date, or None if the value is invalid.
+    """
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else None
+
+
+def not_modified_since(last_modified: datetime, if_modified_since: str) -> bool:
+    """
+    Tell whether a response is unchanged since the date of a conditional request.
+
+    HTTP dates have a one second resolution, so the comparison ignores
+    fractions of seconds.
+
+    Args:
+        last_modified (datetime): The last modification date of the response.
+        if_modified_since (str): The value of the `If-Modified-Since` request header.
+
+    Returns:
+        bool: True if the response has not been modified since the date.
+    """
+    since = parse_http_date(if_modified_since)
+    return since is not None and int(last_modified.timestamp()) <= int(
+        since.timestamp()
+    )
+
+
+class SurrogatePurger:
+    """
+    A class purging the responses of a reverse proxy cache by surrogate key.
+
+    A ``PURGE`` request listing the keys in a `Surrogate-Key` header is sent
+    to the proxy, as understood by Varnish with the xkey module or by a
+    Fastly style CDN. Purges are best effort: failures are logged and the
+    purged responses are left to expire.
+
+    Attributes:
+        url (str): The URL the purge requests are sent to.
+        timeout (float): The timeout of a purge request, in seconds.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def purge(self, keys: Iterable[str]) -> None:
+        """
+        Purge the cached responses tagged with any of the keys.
+
+        Args:
+            keys (Iterable[str]): The surrogate keys to purge.
+        """
+        surrogate_keys = " ".join(sorted(keys))
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.request(
+                    "PURGE", self.url, headers={"Surrogate-Key": surrogate_keys}
+                )
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Purging %s failed: %s", surrogate_keys, e)
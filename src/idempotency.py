@@ -0,0 +1,260 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Type
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+from conf import get_settings
+from exceptions import IdempotencyKeyConflictException, IdempotencyKeyMismatchException
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+Scope = Tuple[str, str, str, str]
+
+RECORD_OVERHEAD_BYTES = 256
+
+
+class _Record:
+    __slots__ = ("fingerprint", "expires_at", "body", "status_code", "size_bytes")
+
+    def __init__(self, scope: Scope, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.body: Optional[bytes] = None
+        self.status_code = status.HTTP_200_OK
+        self.size_bytes = (
+            RECORD_OVERHEAD_BYTES + len(fingerprint) + sum(map(len, scope))
+        )
+
+
+class IdempotencyStore:
+    """
+    A class keeping the responses of idempotent writes in memory for a bounded time.
+
+    A write is identified by its scope, i.e. the requester, the method, the
+    path and the `Idempotency-Key` header, and bound to the fingerprint of
+    its payload. The first request of a scope is executed and its response
+    stored; retries within the TTL replay that response. Failed writes are
+    forgotten so that they can be retried.
+
+    The store is local to the process: retries landing on another worker
+    are executed again. The oldest responses are forgotten when there are
+    more than `max_keys` of them or when their estimated memory footprint
+    exceeds `max_bytes`.
+
+    Attributes:
+        ttl (float): The number of seconds a response is replayed for.
+        max_keys (int): The maximum number of stored responses.
+        max_bytes (int): The maximum estimated size of the stored responses.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_keys: int,
+        max_bytes: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._records: OrderedDict[Scope, _Record] = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+
+    def begin(self, scope: Scope, fingerprint: str) -> Optional[Response]:
+        """
+        Starts an idempotent write, or returns the response of its first execution.
+
+        Args:
+            scope (Scope): The requester, method, path and idempotency key.
+            fingerprint (str): The fingerprint of the request payload.
+
+        Returns:
+            Optional[Response]: The stored response to replay, or None if the
+            write should be executed.
+
+        Raises:
+            IdempotencyKeyMismatchException: If the key was used with another payload.
+            IdempotencyKeyConflictException: If the first write is still in progress.
+        """
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            record = self._records.get(scope)
+            if record is None:
+                record = _Record(scope, fingerprint, now + self.ttl)
+                self._records[scope] = record
+                self._size_bytes += record.size_bytes
+                self._evict()
+                return None
+        if record.fingerprint != fingerprint:
+            raise IdempotencyKeyMismatchException(scope[-1])
+        if record.body is None:
+            raise IdempotencyKeyConflictException(scope[-1])
+        return Response(
+            record.body,
+            status_code=record.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    def complete(self, scope: Scope, body: bytes, status_code: int) -> None:
+        """
+        Stores the response of a successful write.
+
+        Args:
+            scope (Scope): The requester, method, path and idempotency key.
+            body (bytes): The JSON body of the response.
+            status_code (int): The status code of the response.
+        """
+        with self._lock:
+            if (record := self._records.get(scope)) is not None:
+                record.body = body
+                record.status_code = status_code
+                record.size_bytes += len(body)
+                self._size_bytes += len(body)
+                self._evict()
+
+    def abort(self, scope: Scope) -> None:
+        """
+        Forgets a write whose response was not stored, so that it can be retried.
+
+        Args:
+            scope (Scope): The requester, method, path and idempotency key.
+        """
+        with self._lock:
+            record = self._records.get(scope)
+            if record is not None and record.body is None:
+                del self._records[scope]
+                self._size_bytes -= record.size_bytes
+
+    def clear(self) -> None:
+        """
+        Forgets all the stored responses.
+        """
+        with self._lock:
+            self._records.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports the store usage.
+
+        Returns:
+            Dict[str, int]: The number of stored responses and their
+            estimated size.
+        """
+        return {"keys": len(self._records), "size_bytes": self._size_bytes}
+
+    def _expire(self, now: float) -> None:
+        while self._records:
+            scope, record = next(iter(self._records.items()))
+            if record.expires_at > now:
+                break
+            del self._records[scope]
+            self._size_bytes -= record.size_bytes
+
+    def _evict(self) -> None:
+        while self._records and (
+            len(self._records) > self.max_keys or self._size_bytes > self.max_bytes
+        ):
+            _, evicted = self._records.popitem(last=False)
+            self._size_bytes -= evicted.size_bytes
+
+
+class IdempotentRequest:
+    """
+    A class binding a write request to its `Idempotency-Key` header.
+
+    When the request has no key, writes are executed as usual and their
+    result returned unchanged.
+
+    Attributes:
+        key (Optional[str]): The idempotency key sent by the client.
+    """
+
+    def __init__(
+        self, store: IdempotencyStore, key: Optional[str], method: str, path: str
+    ):
+        self.key = key
+        self._store = store
+        self._method = method
+        self._path = path
+        self._scope: Optional[Scope] = None
+
+    def begin(self, requester: str, payload: BaseModel) -> Optional[Response]:
+        """
+        Starts the write of a requester.
+
+        Args:
+            requester (str): The name of the requester.
+            payload (BaseModel): The request payload.
+
+        Returns:
+            Optional[Response]: The response to replay, or None if the write
+            should be executed.
+        """
+        if self.key is None:
+            return None
+        scope = (requester, self._method, self._path, self.key)
+        fingerprint = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+        replay = self._store.begin(scope, fingerprint)
+        # Only the request holding the reservation may complete or release it.
+        if replay is None:
+            self._scope = scope
+        return replay
+
+    def complete(
+        self,
+        response_model: Type[BaseModel],
+        obj: object,
+        status_code: int = status.HTTP_200_OK,
+    ):
+        """
+        Stores the result of the write, to be replayed for retries.
+
+        Args:
+            response_model (Type[BaseModel]): The response schema of the endpoint.
+            obj (object): The written record.
+            status_code (int): The status code of the response.
+
+        Returns:
+            The record if the request has no idempotency key, else the JSON response.
+        """
+        if self._scope is None:
+            return obj
+        body = (
+            response_model.model_validate(obj, from_attributes=True)
+            .model_dump_json()
+            .encode()
+        )
+        self._store.complete(self._scope, body, status_code)
+        return Response(body, status_code=status_code, media_type="application/json")
+
+    def release(self) -> None:
+        """
+        Forgets the write if it did not complete, e.g. because it raised.
+        """
+        if self._scope is not None:
+            self._store.abort(self._scope)
+
+
+@lru_cache()
+def get_idempotency_store() -> IdempotencyStore:
+    """
+    Get the idempotency store of the process.
+
+    Returns:
+        IdempotencyStore: The store.
+    """
+    return IdempotencyStore(
+        get_settings().IDEMPOTENCY_TTL_SECONDS,
+        get_settings().IDEMPOTENCY_MAX_KEYS,
+        get_settings().IDEMPOTENCY_MAX_BYTES,
+    )
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from jwt import PyJWK, PyJWKSet
+from jwt.exceptions import PyJWKError
+
+
+class JWKSKeySet:
+    """
+    A class caching the public keys of a JSON Web Key Set by key id.
+
+    The key set is read from a local file or fetched from a URL. Keys are
+    parsed once into `PyJWK` objects holding ready-to-use public keys, so
+    that verifying a token does not parse any key material. The key set
+    can be reloaded at any time, e.g. by a background worker, to follow
+    key rotations; an unknown key id also triggers a reload, at most once
+    every `min_reload_interval` seconds.
+
+    Asymmetric keys require the optional `cryptography` package, installed
+    with ``pyjwt[crypto]``.
+
+    Attributes:
+        source (str): The path or URL of the JWKS document.
+        algorithms (frozenset[str]): The signature algorithms accepted for the keys.
+        min_reload_interval (float): The minimum number of seconds between two
+        reloads triggered by unknown key ids.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        algorithms: Iterable[str] = ("RS256", "ES256", "EdDSA"),
+        min_reload_interval: float = 30.0,
+    ):
+        self.source = source
+        self.algorithms = frozenset(algorithms)
+        self.min_reload_interval = min_reload_interval
+        self._keys: Dict[Optional[str], PyJWK] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _read_document(self) -> dict:
+        if self.source.startswith(("http://", "https://")):
+            import httpx  # only needed by remote key sets, kept off the startup path
+
+            response = httpx.get(self.source, timeout=5.0)
+            response.raise_for_status()
+            return response.json()
+        return json.loads(Path(self.source).read_text())
+
+    def load(self) -> int:
+        """
+        Reads the key set and replaces the cached keys.
+
+        Keys using an algorithm which is not accepted are ignored. The cached
+        keys are replaced at once, so concurrent lookups never see a partial
+        key set.
+
+        Returns:
+            int: The number of cached keys.
+
+        Raises:
+            PyJWKError: If the document is not a valid key set.
+        """
+        with self._lock:
+            key_set = PyJWKSet.from_dict(self._read_document())
+            self._keys = {
+                key.key_id: key
+                for key in key_set.keys
+                if key.algorithm_name in self.algorithms
+            }
+            self._loaded_at = time.monotonic()
+            return len(self._keys)
+
+    def get(self, kid: Optional[str]) -> PyJWK:
+        """
+        Gets the key matching a key id.
+
+        Args:
+            kid (Optional[str]): The key id found in the token header.
+
+        Returns:
+            PyJWK: The matching key.
+
+        Raises:
+            PyJWKError: If no key matches the key id, even after a reload.
+        """
+        if (key := self._keys.get(kid)) is not None:
+            return key
+        if self._loaded_at is None or (
+            time.monotonic() - self._loaded_at >= self.min_reload_interval
+        ):
+            self.load()
+            if (key := self._keys.get(kid)) is not None:
+                return key
+        raise PyJWKError(f"Unable to find a signing key matching kid {kid!r}")
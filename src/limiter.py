@@ -0,0 +1,193 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from conf import get_settings
+from exceptions import ServiceOverloadedException
+
+
+class Priority(IntEnum):
+    """
+    Enumeration of the priorities of the requests waiting for a database session.
+    """
+
+    BROWSE = 0
+    WRITE = 1
+
+
+class AdaptiveLimiter:
+    """
+    A class limiting the number of concurrent database requests, adapting the
+    limit to the observed latency with AIMD (additive increase, multiplicative
+    decrease).
+
+    A request completing under `target_latency` raises the limit by
+    ``1 / limit``, i.e. by about one per round of requests, up to
+    `max_limit`. A slower request multiplies it by `backoff`, down to
+    `min_limit`.
+
+    Requests over the limit wait in a bounded queue, higher priorities
+    first, and are shed with a `ServiceOverloadedException` once their
+    queue timeout elapses. When the queue is full, a request evicts the
+    newest waiter of a lower priority, or is shed right away.
+
+    Attributes:
+        limit (float): The current concurrency limit.
+        min_limit (int): The lowest concurrency limit.
+        max_limit (int): The highest concurrency limit.
+        target_latency (float): The latency over which the limit decreases, in seconds.
+        backoff (float): The factor applied to the limit on slow requests.
+        queue_size (int): The maximum number of waiting requests.
+        queue_timeouts (Dict[Priority, float]): The maximum waiting time by priority, in seconds.
+        in_flight (int): The number of admitted requests.
+        admitted (int): The total number of admitted requests.
+        shed (int): The total number of rejected requests.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        queue_size: int,
+        queue_timeouts: Dict[Priority, float],
+        backoff: float = 0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.queue_size = queue_size
+        self.queue_timeouts = queue_timeouts
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    async def acquire(self, priority: Priority) -> float:
+        """
+        Waits for a slot under the concurrency limit.
+
+        Args:
+            priority (Priority): The priority of the request.
+
+        Returns:
+            float: The admission time, to pass to `release`.
+
+        Raises:
+            ServiceOverloadedException: If the request is shed.
+        """
+        if self.in_flight < int(self.limit) and not self.queued:
+            return self._admit()
+        if self.queued >= self.queue_size and not self._evict_below(priority):
+            self.shed += 1
+            raise ServiceOverloadedException()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._order), future))
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(future), self.queue_timeouts[priority]
+            )
+        except BaseException as e:
+            if future.done() and not future.cancelled() and not future.exception():
+                self._release_slot()
+            future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.shed += 1
+                raise ServiceOverloadedException() from None
+            raise
+        return self._admit(counted=True)
+
+    def release(self, admitted_at: float) -> None:
+        """
+        Frees a slot and adapts the limit to the latency of the request.
+
+        Args:
+            admitted_at (float): The admission time returned by `acquire`.
+        """
+        latency = time.monotonic() - admitted_at
+        if latency > self.target_latency:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._release_slot()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Reports the limiter state.
+
+        Returns:
+            Dict[str, float]: The current limit, the numbers of requests in
+            flight and queued, and the totals of admitted and shed requests.
+        """
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+    def _admit(self, counted: bool = False) -> float:
+        if not counted:
+            self.in_flight += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def _evict_below(self, priority: Priority) -> bool:
+        candidates = [
+            waiter
+            for waiter in self._waiters
+            if -waiter[0] < priority and not waiter[2].done()
+        ]
+        if not candidates:
+            return False
+        newest = max(candidates, key=lambda waiter: (waiter[0], waiter[1]))
+        newest[2].set_exception(ServiceOverloadedException())
+        self.shed += 1
+        return True
+
+
+@lru_cache()
+def get_db_limiter() -> Optional[AdaptiveLimiter]:
+    """
+    Get the database concurrency limiter of the process.
+
+    The limit starts at the pool size and never exceeds the pool size plus
+    its overflow, so that admitted requests do not wait for a connection.
+
+    Returns:
+        Optional[AdaptiveLimiter]: The limiter, or None if it is disabled.
+    """
+    if not get_settings().DB_LIMITER_ENABLED:
+        return None
+    return AdaptiveLimiter(
+        initial_limit=get_settings().DB_POOL_SIZE,
+        min_limit=get_settings().DB_LIMITER_MIN,
+        max_limit=get_settings().DB_POOL_SIZE + get_settings().DB_MAX_OVERFLOW,
+        target_latency=get_settings().DB_LIMITER_TARGET_LATENCY_SECONDS,
+        queue_size=get_settings().DB_LIMITER_QUEUE_SIZE,
+        queue_timeouts={
+            Priority.BROWSE: get_settings().DB_LIMITER_BROWSE_TIMEOUT_SECONDS,
+            Priority.WRITE: get_settings().DB_LIMITER_WRITE_TIMEOUT_SECONDS,
+        },
+    )
@@ -1,24 +1,98 @@
+import asyncio
 from contextlib import asynccontextmanager
+from functools import partial
 from typing import Callable
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from database.db_conf import engine
+from conf import get_settings
+from database.db_conf import get_engine, warm_up_pool
 from database.models import BaseModel
 from exceptions import (
     ForumApiException,
+    IdempotencyKeyConflictException,
+    IdempotencyKeyMismatchException,
+    InvalidCursorException,
+    InvalidFieldSelectionException,
     JWTTokenInvalidException,
     NoPermissionException,
+    ProfileInProgressException,
+    QueryBudgetExceededException,
+    ServiceOverloadedException,
+    TopicArchivedException,
+)
+from health import DatabaseProbe, StartupProfile
+from http_cache import SurrogatePurger
+from middlewares import (
+    CompressionMiddleware,
+    HttpCacheMiddleware,
+    QueryBudgetMiddleware,
+    ServerTimingMiddleware,
+)
+from outbox import get_outbox_consumer
+from reactions import get_reaction_counter
+from routers import debug_router, health_router, jwt_token, router
+from workers import (
+    PeriodicWorker,
+    audit_reaction_counts,
+    consume_outbox,
+    flush_reaction_counts,
+    purge_deleted_records,
 )
-from routers import router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    BaseModel.metadata.create_all(bind=engine)
+    startup = app.state.startup = StartupProfile()
+    with startup.step("engine"):
+        engine = get_engine()
+    if not get_settings().SKIP_SCHEMA_CHECK:
+        with startup.step("schema_check"):
+            BaseModel.metadata.create_all(bind=engine)
+    if get_settings().DB_POOL_WARMUP:
+        with startup.step("pool_warmup"):
+            await asyncio.to_thread(warm_up_pool, engine, get_settings().DB_POOL_WARMUP)
+    app.state.db_probe = DatabaseProbe(engine, get_settings().DB_PROBE_TTL_SECONDS)
     print("Database connected on startup")
+    workers = [
+        PeriodicWorker(
+            "purge",
+            partial(purge_deleted_records, get_settings().PURGE_BATCH_SIZE),
+            get_settings().PURGE_INTERVAL_SECONDS,
+        ),
+        PeriodicWorker(
+            "reactions-flush",
+            partial(flush_reaction_counts, get_reaction_counter()),
+            get_settings().REACTIONS_FLUSH_INTERVAL_SECONDS,
+        ),
+        PeriodicWorker(
+            "reactions-audit",
+            partial(audit_reaction_counts, get_reaction_counter()),
+            get_settings().REACTIONS_AUDIT_INTERVAL_SECONDS,
+        ),
+        PeriodicWorker(
+            "outbox",
+            partial(consume_outbox, get_outbox_consumer()),
+            get_settings().OUTBOX_POLL_INTERVAL_SECONDS,
+        ),
+    ]
+    if jwt_token.key_set is not None:
+        workers.append(
+            PeriodicWorker(
+                "jwks-refresh",
+                jwt_token.key_set.load,
+                get_settings().JWT_JWKS_REFRESH_SECONDS,
+            )
+        )
+    with startup.step("workers"):
+        for worker in workers:
+            worker.start()
+    startup.mark_ready()
     yield
+    for worker in workers:
+        await worker.stop()
+    await asyncio.to_thread(flush_reaction_counts, get_reaction_counter())
     engine.dispose()
     print("Database disconnected on shutdown")
 
@@ -26,13 +100,51 @@ async def lifespan(app: FastAPI):
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
+app.include_router(health_router)
+if get_settings().PROFILING_ENABLED:
+    app.include_router(debug_router)
+
+if get_settings().HTTP_CACHE_ENABLED:
+    app.add_middleware(
+        HttpCacheMiddleware,
+        policies=get_settings().HTTP_CACHE_POLICIES,
+        purger=(
+            SurrogatePurger(
+                get_settings().HTTP_CACHE_PURGE_URL,
+                get_settings().HTTP_CACHE_PURGE_TIMEOUT_SECONDS,
+            )
+            if get_settings().HTTP_CACHE_PURGE_URL
+            else None
+        ),
+    )
+
+if get_settings().COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=get_settings().COMPRESSION_MINIMUM_SIZE,
+        encodings=get_settings().COMPRESSION_ENCODINGS,
+        content_types=get_settings().COMPRESSION_CONTENT_TYPES,
+    )
+
+if get_settings().QUERY_BUDGET_DEFAULT is not None or get_settings().QUERY_BUDGETS:
+    app.add_middleware(
+        QueryBudgetMiddleware,
+        default_budget=get_settings().QUERY_BUDGET_DEFAULT,
+        budgets=get_settings().QUERY_BUDGETS,
+        strict=get_settings().QUERY_BUDGET_STRICT,
+    )
+
+if get_settings().SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
 
 
 def create_exception_handler() -> Callable[[Request, ForumApiException], JSONResponse]:
 
     async def exception_handler(_: Request, exc: ForumApiException) -> JSONResponse:
         return JSONResponse(
-            status_code=exc.STATUS_CODE, content={"detail": exc.message}
+            status_code=exc.STATUS_CODE,
+            content={"detail": exc.message},
+            headers=exc.HEADERS,
         )
 
     return exception_handler
@@ -47,3 +159,43 @@ app.add_exception_handler(
     exc_class_or_status_code=JWTTokenInvalidException,
     handler=create_exception_handler(),
 )
+
+app.add_exception_handler(
+    exc_class_or_status_code=InvalidFieldSelectionException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=IdempotencyKeyConflictException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=IdempotencyKeyMismatchException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=QueryBudgetExceededException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=ProfileInProgressException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=ServiceOverloadedException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=InvalidCursorException,
+    handler=create_exception_handler(),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=TopicArchivedException,
+    handler=create_exception_handler(),
+)
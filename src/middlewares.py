@@ -0,0 +1,421 @@
+import gzip
+import logging
+import time
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from conf import CachePolicy
+from http_cache import (
+    CacheTags,
+    SurrogatePurger,
+    http_date,
+    not_modified_since,
+    record_cache_tags,
+)
+from profiler import record_server_timing
+from query_budget import count_queries
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+def route_key(scope: Scope) -> Optional[str]:
+    """
+    Build the key of the route matched by a request, which the settings of
+    the routes are keyed by.
+
+    Args:
+        scope (Scope): The ASGI scope of the request.
+
+    Returns:
+        Optional[str]: The method and path template of the route, e.g.
+        ``GET /api/forum/topics/{topic_id}/posts/``, or None if the request
+        has not been routed yet.
+    """
+    route = scope.get("route")
+    if route is None:
+        return None
+    return f"{scope['method']} {route.path_format}"
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=4)
+
+
+def _compress_zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(body)
+
+
+def available_codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    """
+    List the compression codecs available in the current environment.
+
+    Gzip is always available, brotli and zstd require the optional
+    `brotli` and `zstandard` packages.
+
+    Returns:
+        Dict[str, Callable[[bytes], bytes]]: The compression functions, by content-coding.
+    """
+    codecs = {"gzip": _compress_gzip}
+    if brotli is not None:
+        codecs["br"] = _compress_brotli
+    if zstandard is not None:
+        codecs["zstd"] = _compress_zstd
+    return codecs
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies.
+
+    The encoding is negotiated from the `Accept-Encoding` request header,
+    following the server preference order given by `encodings`. Only
+    complete bodies whose content type matches one of `content_types` and
+    whose size reaches `minimum_size` are compressed; streamed responses
+    are passed through untouched.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        minimum_size (int): The minimum body size, in bytes, to compress.
+        content_types (tuple[str, ...]): The content type prefixes to compress.
+        codecs (Dict[str, Callable[[bytes], bytes]]): The usable codecs, in preference order.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        encodings: Iterable[str] = ("br", "zstd", "gzip"),
+        content_types: Iterable[str] = ("application/json", "text/"),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        codecs = available_codecs()
+        self.codecs = {
+            encoding: codecs[encoding] for encoding in encodings if encoding in codecs
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        streaming = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+            if message.get("more_body", False):
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if self.should_compress(headers, body):
+                body = self.codecs[encoding](body)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = message | {"body": body}
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """
+        Select the preferred encoding accepted by the client.
+
+        Args:
+            accept_encoding (str): The value of the `Accept-Encoding` request header.
+
+        Returns:
+            Optional[str]: The selected content-coding, or None if no codec is acceptable.
+        """
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            q = params.strip().removeprefix("q=")
+            try:
+                if params and float(q) == 0:
+                    continue
+            except ValueError:
+                continue
+            accepted.add(coding.strip().lower())
+        for encoding in self.codecs:
+            if encoding in accepted or "*" in accepted:
+                return encoding
+        return None
+
+    def should_compress(self, headers: MutableHeaders, body: bytes) -> bool:
+        """
+        Tell whether a complete response body should be compressed.
+
+        Args:
+            headers (MutableHeaders): The response headers.
+            body (bytes): The response body.
+
+        Returns:
+            bool: True if the body is large enough, of a compressible content type
+            and not already encoded.
+        """
+        return (
+            len(body) >= self.minimum_size
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(self.content_types)
+        )
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI middleware counting the SQL statements executed by each request.
+
+    Requests executing more statements than the budget of their route are
+    logged with the first statements they executed, which makes N+1 query
+    patterns visible. In strict mode, the statement exceeding the budget
+    raises a `QueryBudgetExceededException` instead of being executed.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        default_budget (Optional[int]): The budget of routes without their own.
+        budgets (Dict[str, int]): The budgets by route, keyed by method and
+        path template, e.g. ``GET /api/forum/topics/{topic_id}/posts/``.
+        strict (bool): Whether exceeding a budget fails the request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_budget: Optional[int] = None,
+        budgets: Optional[Dict[str, int]] = None,
+        strict: bool = False,
+    ):
+        self.app = app
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with count_queries(partial(self.budget, scope), self.strict) as counter:
+            await self.app(scope, receive, send)
+        if counter.exceeded:
+            logger.warning(
+                "%s executed %d SQL statements, budget is %d: %s",
+                route_key(scope),
+                counter.count,
+                counter.budget(),
+                counter.statements,
+            )
+
+    def budget(self, scope: Scope) -> Optional[int]:
+        """
+        Get the budget of the route matched by a request.
+
+        The route is looked up when the budget is needed, since the router
+        only sets it in the scope once the request has been routed.
+
+        Args:
+            scope (Scope): The ASGI scope of the request.
+
+        Returns:
+            Optional[int]: The maximum number of statements allowed, or None
+            if the request has no budget.
+        """
+        key = route_key(scope)
+        if key is None:
+            return None
+        return self.budgets.get(key, self.default_budget)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware reporting where the time of each request goes in a
+    `Server-Timing` response header.
+
+    The reported metrics, in milliseconds, are:
+
+    - ``auth``: the decoding of the JWT token;
+    - ``db``: the execution of SQL statements, during dependencies or the handler;
+    - ``handler``: the route handler, excluding its dependencies;
+    - ``serialize``: from the handler return to the response start, mostly
+      the validation and serialization of the response;
+    - ``total``: the whole request, up to the response start.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        with record_server_timing() as server_timing, count_queries() as queries:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    now = time.perf_counter()
+                    server_timing.add("db", queries.duration)
+                    if server_timing.handler_end is not None:
+                        server_timing.add(
+                            "serialize", (now - server_timing.handler_end) * 1000
+                        )
+                    server_timing.add("total", (now - start) * 1000)
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", server_timing.header()
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+
+class HttpCacheMiddleware:
+    """
+    ASGI middleware adding HTTP caching headers to the responses of the
+    routes with a caching policy, so that a reverse proxy cache or a CDN
+    can serve reads.
+
+    Successful GET responses of these routes get:
+
+    - a `Cache-Control` header built from the policy of the route;
+    - a `Vary: token` header, so that a shared cache never serves the
+      response of a token to another one;
+    - a `Last-Modified` header, when the handler tagged the response with
+      the last modification date of its records, which makes
+      `If-Modified-Since` requests answer with a body-less 304 response;
+    - a `Surrogate-Key` header listing the keys the handler tagged the
+      response with, e.g. ``topic-3``.
+
+    After a successful write, the responses tagged with the keys of the
+    changed records are purged through `purger`, when there is one.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        policies (Dict[str, CachePolicy]): The caching policies by route,
+        keyed by method and path template.
+        purger (Optional[SurrogatePurger]): Purges the cache after writes.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Dict[str, CachePolicy],
+        purger: Optional[SurrogatePurger] = None,
+    ):
+        self.app = app
+        self.policies = policies
+        self.purger = purger
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        reading = scope["method"] in ("GET", "HEAD")
+        if_modified_since = Headers(scope=scope).get("if-modified-since")
+        not_modified = False
+        written = False
+
+        with record_cache_tags() as cache_tags:
+
+            async def send_with_cache_headers(message: Message) -> None:
+                nonlocal not_modified, written
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    policy = self.policies.get(route_key(scope))
+                    if not reading:
+                        written = status < 400
+                    elif status == 200 and policy is not None:
+                        headers = MutableHeaders(scope=message)
+                        self.add_headers(headers, policy, cache_tags)
+                        not_modified = (
+                            if_modified_since is not None
+                            and cache_tags.last_modified is not None
+                            and not_modified_since(
+                                cache_tags.last_modified, if_modified_since
+                            )
+                        )
+                        if not_modified:
+                            message["status"] = 304
+                            del headers["content-length"]
+                            del headers["content-type"]
+                elif message["type"] == "http.response.body" and not_modified:
+                    if message.get("more_body", False):
+                        return
+                    message = message | {"body": b""}
+                await send(message)
+
+            await self.app(scope, receive, send_with_cache_headers)
+
+        if written and cache_tags.keys and self.purger is not None:
+            await self.purger.purge(cache_tags.keys)
+
+    @staticmethod
+    def cache_control(policy: CachePolicy) -> str:
+        """
+        Render a caching policy as a `Cache-Control` header value.
+
+        Args:
+            policy (CachePolicy): The caching policy.
+
+        Returns:
+            str: The header value, e.g. ``public, max-age=5, stale-while-revalidate=30``.
+        """
+        directives = [
+            "public" if policy.public else "private",
+            f"max-age={policy.max_age}",
+        ]
+        if policy.stale_while_revalidate:
+            directives.append(f"stale-while-revalidate={policy.stale_while_revalidate}")
+        return ", ".join(directives)
+
+    def add_headers(
+        self, headers: MutableHeaders, policy: CachePolicy, cache_tags: CacheTags
+    ) -> None:
+        """
+        Add the caching headers of a successful read response.
+
+        Args:
+            headers (MutableHeaders): The response headers.
+            policy (CachePolicy): The caching policy of the route.
+            cache_tags (CacheTags): The tags of the response.
+        """
+        headers["Cache-Control"] = self.cache_control(policy)
+        headers.add_vary_header("token")
+        if cache_tags.last_modified is not None:
+            headers["Last-Modified"] = http_date(cache_tags.last_modified)
+        if cache_tags.keys:
+            headers["Surrogate-Key"] = " ".join(sorted(cache_tags.keys))
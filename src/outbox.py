@@ -0,0 +1,271 @@
+"""
+A durable queue of the side effects of writes, kept in the `outbox_task`
+table.
+
+Handlers are registered for kinds of tasks, named after the table and the
+write, e.g. ``post.created``:
+
+    @handles(POST_CREATED)
+    def index_post(payload: dict) -> None:
+        ...
+
+The CRUD operations enqueue a task in the transaction of each write with
+handlers, so that a task exists if and only if its write is committed, and
+the consumer runs the handlers off the request path. A task is run at least
+once: it is retried when one of its handlers fails, so handlers must be
+idempotent.
+
+The consumer runs in a background worker of each application process. It
+only claims the kinds of tasks it has handlers for, leaving the others to
+a consumer which has, so that tasks enqueued by a newer release are not
+dropped by an older one. It can also run in a process of its own, from
+the `src` directory, given the modules registering the handlers:
+
+    python -m outbox search.handlers
+"""
+
+import argparse
+import importlib
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, DefaultDict, Dict, List
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from conf import get_settings
+from database.models import OutboxTask
+
+logger = logging.getLogger(__name__)
+
+TOPIC_CREATED = "topic.created"
+TOPIC_UPDATED = "topic.updated"
+TOPIC_DELETED = "topic.deleted"
+POST_CREATED = "post.created"
+POST_UPDATED = "post.updated"
+POST_DELETED = "post.deleted"
+
+Handler = Callable[[dict], None]
+
+_handlers: DefaultDict[str, List[Handler]] = defaultdict(list)
+
+
+def handles(*kinds: str) -> Callable[[Handler], Handler]:
+    """
+    Register a function as a handler of kinds of tasks.
+
+    Args:
+        *kinds (str): The kinds of tasks, e.g. ``post.created``.
+
+    Returns:
+        Callable[[Handler], Handler]: The decorator registering the handler.
+    """
+
+    def register(handler: Handler) -> Handler:
+        for kind in kinds:
+            _handlers[kind].append(handler)
+        return handler
+
+    return register
+
+
+def has_handlers(kind: str) -> bool:
+    return bool(_handlers.get(kind))
+
+
+def handled_kinds() -> List[str]:
+    return [kind for kind, handlers in _handlers.items() if handlers]
+
+
+def enqueue(db: Session, kind: str, payload: dict) -> None:
+    """
+    Enqueue a task in the current transaction.
+
+    Callers should check that the kind of task `has_handlers` first.
+
+    Args:
+        db (Session): The session of the writing transaction.
+        kind (str): The kind of task.
+        payload (dict): The JSON serializable arguments of the handlers.
+    """
+    db.execute(insert(OutboxTask).values(kind=kind, payload=payload))
+
+
+class OutboxConsumer:
+    """
+    A class running the tasks of the outbox by batches.
+
+    Each batch is claimed, run and acknowledged in its own transaction. On
+    PostgreSQL the claimed rows are locked with ``SKIP LOCKED``, so that
+    several processes consume the outbox without running a task twice.
+    A task whose handler fails is retried after an exponential backoff,
+    and kept as dead after `max_attempts` attempts.
+
+    Attributes:
+        batch_size (int): The maximum number of tasks per transaction.
+        max_attempts (int): The number of attempts before a task is dead.
+        retry_base (float): The delay before the first retry, in seconds,
+        doubled by each following retry.
+        processed (int): The number of tasks run successfully.
+        retried (int): The number of failed attempts which will be retried.
+        dead (int): The number of tasks given up.
+        pending (int): The number of tasks waiting, after the last batch.
+        lag_seconds (float): The age of the oldest waiting task, after the
+        last batch.
+    """
+
+    def __init__(self, batch_size: int, max_attempts: int, retry_base: float):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.processed = 0
+        self.retried = 0
+        self.dead = 0
+        self.pending = 0
+        self.lag_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run_batch(self, db: Session) -> int:
+        """
+        Claim and run a batch of due tasks with handlers, in order of enqueueing.
+
+        Args:
+            db (Session): The database session.
+
+        Returns:
+            int: The number of claimed tasks.
+        """
+        now = datetime.today()
+        tasks = db.scalars(
+            select(OutboxTask)
+            .where(
+                OutboxTask.dead_at.is_(None),
+                OutboxTask.available_at <= now,
+                OutboxTask.kind.in_(handled_kinds()),
+            )
+            .order_by(OutboxTask.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        done = []
+        for task in tasks:
+            try:
+                for handler in _handlers[task.kind]:
+                    handler(task.payload)
+            except Exception as e:
+                self._failed(task, e, now)
+            else:
+                done.append(task.id)
+        db.flush()
+        if done:
+            db.execute(delete(OutboxTask).where(OutboxTask.id.in_(done)))
+        pending, oldest = db.execute(
+            select(func.count(), func.min(OutboxTask.created_on)).where(
+                OutboxTask.dead_at.is_(None)
+            )
+        ).one()
+        db.commit()
+        with self._lock:
+            self.processed += len(done)
+            self.pending = pending
+            self.lag_seconds = (now - oldest).total_seconds() if oldest else 0.0
+        return len(tasks)
+
+    def _failed(self, task: OutboxTask, error: Exception, now: datetime) -> None:
+        task.attempts += 1
+        task.last_error = repr(error)
+        if task.attempts >= self.max_attempts:
+            task.dead_at = now
+            logger.error(
+                "Outbox task %d (%s) failed %d times, giving up: %r",
+                task.id,
+                task.kind,
+                task.attempts,
+                error,
+            )
+            with self._lock:
+                self.dead += 1
+            return
+        task.available_at = now + timedelta(
+            seconds=self.retry_base * 2 ** (task.attempts - 1)
+        )
+        logger.warning("Outbox task %d (%s) failed: %r", task.id, task.kind, error)
+        with self._lock:
+            self.retried += 1
+
+    def run(self, session_factory: Callable[[], Session]) -> int:
+        """
+        Run the due tasks until the outbox has none left.
+
+        Args:
+            session_factory (Callable[[], Session]): The factory creating database sessions.
+
+        Returns:
+            int: The number of claimed tasks.
+        """
+        claimed = 0
+        with session_factory() as db:
+            while True:
+                count = self.run_batch(db)
+                claimed += count
+                if count < self.batch_size:
+                    return claimed
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the consumer statistics.
+
+        Returns:
+            Dict[str, float]: The task counters, the number of waiting tasks
+            and the age of the oldest one, in seconds.
+        """
+        with self._lock:
+            return {
+                "processed": self.processed,
+                "retried": self.retried,
+                "dead": self.dead,
+                "pending": self.pending,
+                "lag_seconds": self.lag_seconds,
+            }
+
+
+@lru_cache()
+def get_outbox_consumer() -> OutboxConsumer:
+    """
+    Get the outbox consumer of the process.
+
+    Returns:
+        OutboxConsumer: The consumer.
+    """
+    return OutboxConsumer(
+        get_settings().OUTBOX_BATCH_SIZE,
+        get_settings().OUTBOX_MAX_ATTEMPTS,
+        get_settings().OUTBOX_RETRY_BASE_SECONDS,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the outbox tasks.")
+    parser.add_argument(
+        "modules", nargs="+", help="The modules registering the task handlers."
+    )
+    args = parser.parse_args()
+    for module in args.modules:
+        importlib.import_module(module)
+
+    from database.db_conf import SessionLocal, get_engine
+
+    logging.basicConfig(level=logging.INFO)
+    get_engine()
+    consumer = get_outbox_consumer()
+    while True:
+        consumer.run(SessionLocal)
+        time.sleep(get_settings().OUTBOX_POLL_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
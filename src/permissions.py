@@ -0,0 +1,84 @@
+from enum import IntFlag
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from sqlalchemy import ColumnElement, literal, or_
+
+from exceptions import NoPermissionException
+
+if TYPE_CHECKING:
+    from datastructures import RequesterData
+
+
+class Role(IntFlag):
+    """
+    Bitmask of the roles a requester can hold.
+    """
+
+    NONE = 0
+    BASIC = 1
+    MODERATOR = 2
+
+
+GROUP_ROLES = {
+    "basic": Role.BASIC,
+    "moderator": Role.MODERATOR,
+}
+
+
+def roles_from_groups(groups: Iterable[str]) -> Role:
+    """
+    Compute the role bitmask matching a list of groups.
+
+    Unknown groups grant no role.
+
+    Args:
+        groups (Iterable[str]): The groups the requester belongs to.
+
+    Returns:
+        Role: The combined roles of the groups.
+    """
+    roles = Role.NONE
+    for group in groups:
+        roles |= GROUP_ROLES.get(group, Role.NONE)
+    return roles
+
+
+def require_role(requester_data: "RequesterData", role: Role) -> None:
+    """
+    Ensure a requester holds a role.
+
+    Args:
+        requester_data (RequesterData): The requester data.
+        role (Role): The required role.
+
+    Raises:
+        NoPermissionException: If the requester does not hold the role.
+    """
+    if not requester_data.roles & role:
+        raise NoPermissionException(requester_data.name)
+
+
+def write_criteria(
+    owner_column: Optional[ColumnElement], requester_data: "RequesterData"
+) -> ColumnElement[bool]:
+    """
+    Build the criteria matching the records a requester is allowed to modify.
+
+    Moderators may modify any record, other requesters only the records
+    they own. The criteria is meant to be added to the WHERE clause of a
+    conditional UPDATE or DELETE, so that the permission check does not
+    cost any extra query.
+
+    Args:
+        owner_column (Optional[ColumnElement]): The column holding the name of the
+        record owner, None if records can only be modified by moderators.
+        requester_data (RequesterData): The requester data.
+
+    Returns:
+        ColumnElement[bool]: The filter criteria, rendered as
+        ``(owner = :name OR :is_moderator)``.
+    """
+    is_moderator = literal(bool(requester_data.roles & Role.MODERATOR))
+    if owner_column is None:
+        return is_moderator
+    return or_(owner_column == requester_data.name, is_moderator)
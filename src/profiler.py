@@ -0,0 +1,195 @@
+import asyncio
+import functools
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from fastapi.routing import APIRoute
+
+
+def _collapse_frame(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_filename}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def sample_stacks(duration: float, interval: float) -> Counter:
+    """
+    Sample the stacks of all the threads of the process.
+
+    The sampling thread itself is excluded. Each sample is collapsed into a
+    single line of semicolon separated frames, from the outermost to the
+    innermost one.
+
+    Args:
+        duration (float): The sampling duration, in seconds.
+        interval (float): The interval between two samples, in seconds.
+
+    Returns:
+        Counter: The number of samples of each collapsed stack.
+    """
+    own_thread = threading.get_ident()
+    samples: Counter = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_thread:
+                samples[_collapse_frame(frame)] += 1
+        time.sleep(interval)
+    return samples
+
+
+class StackSampler:
+    """
+    A class capturing time-bounded sampling profiles of the running process.
+
+    Stacks are sampled from a separate thread, so handlers running on the
+    event loop are profiled without being instrumented. A single profile
+    is captured at a time.
+
+    Attributes:
+        max_duration (float): The maximum duration of a profile, in seconds.
+    """
+
+    def __init__(self, max_duration: float):
+        self.max_duration = max_duration
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, duration: float, interval: float) -> str:
+        """
+        Captures a profile in the collapsed stack format.
+
+        The output can be rendered by flamegraph.pl, speedscope or inferno.
+
+        Args:
+            duration (float): The sampling duration, in seconds, capped to `max_duration`.
+            interval (float): The interval between two samples, in seconds.
+
+        Returns:
+            str: One line per distinct stack, followed by its number of samples.
+        """
+        async with self._lock:
+            samples = await asyncio.to_thread(
+                sample_stacks, min(duration, self.max_duration), interval
+            )
+        return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class ServerTiming:
+    """
+    A class accumulating the duration of the phases of a request.
+
+    Attributes:
+        durations (Dict[str, float]): The duration of each phase, in milliseconds.
+        handler_end (Optional[float]): When the route handler returned, as a
+        `time.perf_counter` value.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.handler_end: Optional[float] = None
+
+    def add(self, name: str, duration: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def header(self) -> str:
+        """
+        Renders the durations as a `Server-Timing` header value.
+
+        Returns:
+            str: The header value, e.g. ``auth;dur=0.4, db;dur=2.1``.
+        """
+        return ", ".join(
+            f"{name};dur={duration:.2f}" for name, duration in self.durations.items()
+        )
+
+
+_server_timing: ContextVar[Optional[ServerTiming]] = ContextVar(
+    "server_timing", default=None
+)
+
+
+@contextmanager
+def record_server_timing() -> Iterator[ServerTiming]:
+    """
+    Collect the phase durations of the request running in the current context.
+
+    Yields:
+        ServerTiming: The collected durations.
+    """
+    server_timing = ServerTiming()
+    token = _server_timing.set(server_timing)
+    try:
+        yield server_timing
+    finally:
+        _server_timing.reset(token)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Measure a phase of the current request, if its timing is being collected.
+
+    Args:
+        name (str): The name of the phase.
+    """
+    server_timing = _server_timing.get()
+    if server_timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        server_timing.add(name, (time.perf_counter() - start) * 1000)
+
+
+def _timed_endpoint(call: Callable) -> Callable:
+    def done(start: float) -> None:
+        if (server_timing := _server_timing.get()) is not None:
+            server_timing.handler_end = time.perf_counter()
+            server_timing.add("handler", (server_timing.handler_end - start) * 1000)
+
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                done(start)
+
+    else:
+
+        @functools.wraps(call)
+        def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                done(start)
+
+    return timed_call
+
+
+class TimedRoute(APIRoute):
+    """
+    A route measuring the duration of its handler, excluding its dependencies
+    and the serialization of its response.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependant.call = _timed_endpoint(self.dependant.call)
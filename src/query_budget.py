@@ -0,0 +1,109 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from exceptions import QueryBudgetExceededException
+
+MAX_RECORDED_STATEMENTS = 20
+
+
+class QueryCount:
+    """
+    A class counting the SQL statements executed in a context.
+
+    Attributes:
+        count (int): The number of executed statements.
+        duration (float): The time spent executing them, in milliseconds.
+        statements (List[str]): The first executed statements, for reporting.
+        budget (Callable[[], Optional[int]]): Returns the maximum number of
+        statements allowed, or None if there is none.
+        strict (bool): Whether exceeding the budget raises before executing
+        the statement.
+    """
+
+    def __init__(
+        self,
+        budget: Callable[[], Optional[int]] = lambda: None,
+        strict: bool = False,
+    ):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: List[str] = []
+        self.budget = budget
+        self.strict = strict
+
+    @property
+    def exceeded(self) -> bool:
+        budget = self.budget()
+        return budget is not None and self.count > budget
+
+    def record(self, statement: str) -> None:
+        """
+        Count a statement about to be executed.
+
+        Args:
+            statement (str): The SQL statement.
+
+        Raises:
+            QueryBudgetExceededException: If the counter is strict and the
+            statement exceeds the budget.
+        """
+        self.count += 1
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append(statement)
+        if self.strict and self.exceeded:
+            raise QueryBudgetExceededException(self.count, self.budget())
+
+
+_counters: ContextVar[Tuple[QueryCount, ...]] = ContextVar("query_counters", default=())
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counters = _counters.get()
+    for counter in counters:
+        counter.record(statement)
+    if counters and context is not None:
+        context.query_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "query_started_at", None)
+    if started_at is None:
+        return
+    duration = (time.perf_counter() - started_at) * 1000
+    for counter in _counters.get():
+        counter.duration += duration
+
+
+@contextmanager
+def count_queries(
+    budget: Callable[[], Optional[int]] = lambda: None, strict: bool = False
+) -> Iterator[QueryCount]:
+    """
+    Count and time the SQL statements executed by any engine in the current context.
+
+    Counters can be nested, each statement is counted by all of them. The
+    context is copied to the threads running sync dependencies, so their
+    statements are counted as well.
+
+    Args:
+        budget (Callable[[], Optional[int]]): Returns the maximum number of
+        statements allowed, or None if there is none.
+        strict (bool): Whether exceeding the budget raises before executing
+        the statement.
+
+    Yields:
+        QueryCount: The counter.
+    """
+    counter = QueryCount(budget, strict)
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
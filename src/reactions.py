@@ -0,0 +1,288 @@
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Callable, DefaultDict, Dict, Iterable, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from conf import get_settings
+from database.reactions import (
+    add_reaction_counts,
+    read_reaction_counts,
+    read_reaction_drift,
+)
+from schemas import PostSchema
+
+Deltas = DefaultDict[int, Counter]
+
+
+def _deltas() -> Deltas:
+    return defaultdict(Counter)
+
+
+class _Shard:
+    __slots__ = ("deltas", "lock")
+
+    def __init__(self):
+        self.deltas = _deltas()
+        self.lock = threading.Lock()
+
+
+class ReactionCounter:
+    """
+    A class counting the reactions to posts in memory and adding them to the
+    reaction counts of the database in batches.
+
+    Reactions are counted in shards selected by post ID, each with its own
+    lock, so that a flush only holds one shard at a time while reactions
+    keep being counted in the others. A flush adds the counted reactions to
+    the database with a single upsert, which turns thousands of reactions to
+    a popular post into one row update per flush.
+
+    The flushed counts of the posts are cached for `ttl` seconds. Served
+    counts are the cached counts plus the reactions counted by the process
+    and not flushed yet, so a user sees their own reactions at once, while
+    the reactions counted by other workers show up within a flush interval
+    and a TTL. Counts read from the database while a flush commits are
+    served but not cached, since they may already include the flushed
+    reactions.
+
+    Attributes:
+        ttl (float): The number of seconds flushed counts are cached for.
+        max_posts (int): The maximum number of posts with cached counts.
+        flushes (int): The number of flushes which wrote counts.
+        flushed (int): The number of counts written by the flushes.
+        drifted (int): The number of counts which differed from their
+        reactions in the last audit.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        ttl: float,
+        max_posts: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_posts = max_posts
+        self.flushes = 0
+        self.flushed = 0
+        self.drifted = 0
+        self._drift: Dict[Tuple[int, str], int] = {}
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        self._in_flight = _deltas()
+        self._epoch = 0
+        self._counts: OrderedDict[int, Tuple[float, Dict[str, int]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _shard(self, post_id: int) -> _Shard:
+        return self._shards[post_id % len(self._shards)]
+
+    def add(self, post_id: int, kind: str, delta: int) -> None:
+        """
+        Count a reaction added to, or removed from, a post.
+
+        Args:
+            post_id (int): The ID of the post.
+            kind (str): The kind of reaction.
+            delta (int): 1 for an added reaction, -1 for a removed one.
+        """
+        shard = self._shard(post_id)
+        with shard.lock:
+            shard.deltas[post_id][kind] += delta
+
+    def _unflushed(self, post_id: int) -> Counter:
+        shard = self._shard(post_id)
+        unflushed = Counter()
+        with shard.lock:
+            unflushed.update(shard.deltas.get(post_id, {}))
+        with self._lock:
+            unflushed.update(self._in_flight.get(post_id, {}))
+        return unflushed
+
+    def counts(self, db: Session, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """
+        Get the reaction counts of posts, reading the counts missing from the
+        cache with a single query.
+
+        Args:
+            db (Session): The database session.
+            post_ids (Iterable[int]): The IDs of the posts.
+
+        Returns:
+            Dict[int, Dict[str, int]]: The number of reactions of each kind,
+            by post ID. Kinds without reactions are left out.
+        """
+        post_ids = list(post_ids)
+        now = self._clock()
+        flushed: Dict[int, Dict[str, int]] = {}
+        with self._lock:
+            epoch = self._epoch
+            for post_id in post_ids:
+                entry = self._counts.get(post_id)
+                if entry is not None and entry[0] > now:
+                    self._counts.move_to_end(post_id)
+                    flushed[post_id] = entry[1]
+        if missing := [post_id for post_id in post_ids if post_id not in flushed]:
+            read = read_reaction_counts(db, missing)
+            with self._lock:
+                for post_id in missing:
+                    flushed[post_id] = read.get(post_id, {})
+                    if self._epoch == epoch:
+                        self._counts[post_id] = (now + self.ttl, flushed[post_id])
+                while len(self._counts) > self.max_posts:
+                    self._counts.popitem(last=False)
+        counts = {}
+        for post_id in post_ids:
+            total = Counter(flushed[post_id])
+            total.update(self._unflushed(post_id))
+            counts[post_id] = {
+                kind: count for kind, count in total.items() if count > 0
+            }
+        return counts
+
+    def with_counts(self, db: Session, posts: List[PostSchema]) -> List[PostSchema]:
+        """
+        Copy posts with their reaction counts.
+
+        Args:
+            db (Session): The database session.
+            posts (List[PostSchema]): The posts.
+
+        Returns:
+            List[PostSchema]: The posts with their `reactions` set.
+        """
+        counts = self.counts(db, (post.id for post in posts))
+        return [
+            post.model_copy(update={"reactions": counts[post.id]}) for post in posts
+        ]
+
+    def flush(self, session_factory: Callable[[], Session]) -> int:
+        """
+        Add the reactions counted since the previous flush to the reaction
+        counts of the database.
+
+        When the flush fails, the reactions are counted again so that the
+        next flush writes them. The reactions to posts which no longer exist
+        are dropped rather than retried.
+
+        Args:
+            session_factory (Callable[[], Session]): The factory creating
+            database sessions.
+
+        Returns:
+            int: The number of counts written.
+        """
+        with self._flush_lock:
+            for shard in self._shards:
+                with shard.lock, self._lock:
+                    self._in_flight.update(shard.deltas)
+                    shard.deltas = _deltas()
+            deltas = {
+                (post_id, kind): delta
+                for post_id, kinds in self._in_flight.items()
+                for kind, delta in kinds.items()
+                if delta
+            }
+            if not deltas:
+                with self._lock:
+                    self._in_flight = _deltas()
+                return 0
+            try:
+                with session_factory() as db:
+                    add_reaction_counts(db.connection(), deltas)
+                    db.commit()
+            except Exception:
+                with self._lock:
+                    self._in_flight = _deltas()
+                for (post_id, kind), delta in deltas.items():
+                    self.add(post_id, kind, delta)
+                raise
+            with self._lock:
+                self._in_flight = _deltas()
+                for (post_id, kind), delta in deltas.items():
+                    if (entry := self._counts.get(post_id)) is not None:
+                        counts = Counter(entry[1])
+                        counts[kind] += delta
+                        self._counts[post_id] = (entry[0], dict(counts))
+                self._epoch += 1
+            self.flushes += 1
+            self.flushed += len(deltas)
+            return len(deltas)
+
+    def audit(self, session_factory: Callable[[], Session]) -> int:
+        """
+        Flush the counted reactions, then compare the reaction counts of the
+        database with the reactions.
+
+        The reactions counted by other processes and not flushed yet make
+        counts differ for a flush interval, so a count only drifted when it
+        differs by the same number of reactions in two audits in a row.
+
+        Args:
+            session_factory (Callable[[], Session]): The factory creating
+            database sessions.
+
+        Returns:
+            int: The number of drifted counts.
+        """
+        self.flush(session_factory)
+        with session_factory() as db:
+            drift = read_reaction_drift(db)
+        with self._lock:
+            self.drifted = sum(
+                1 for key, count in drift.items() if self._drift.get(key) == count
+            )
+            self._drift = drift
+            return self.drifted
+
+    def clear(self) -> None:
+        """
+        Forget the counted reactions and the cached counts.
+        """
+        for shard in self._shards:
+            with shard.lock:
+                shard.deltas = _deltas()
+        with self._lock:
+            self._in_flight = _deltas()
+            self._counts.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counter statistics.
+
+        Returns:
+            Dict[str, int]: The number of flushes, of flushed counts, of
+            counts waiting for the next flush, of posts with cached counts
+            and of counts which drifted from their reactions.
+        """
+        pending = 0
+        for shard in self._shards:
+            with shard.lock:
+                pending += sum(len(kinds) for kinds in shard.deltas.values())
+        with self._lock:
+            return {
+                "flushes": self.flushes,
+                "flushed": self.flushed,
+                "pending": pending,
+                "cached_posts": len(self._counts),
+                "drifted_counts": self.drifted,
+            }
+
+
+@lru_cache()
+def get_reaction_counter() -> ReactionCounter:
+    """
+    Get the reaction counter of the process.
+
+    Returns:
+        ReactionCounter: The counter.
+    """
+    return ReactionCounter(
+        get_settings().REACTIONS_SHARDS,
+        get_settings().REACTIONS_CACHE_TTL_SECONDS,
+        get_settings().REACTIONS_CACHE_MAX_POSTS,
+    )
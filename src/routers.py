@@ -1,61 +1,152 @@
-from fastapi import APIRouter, Depends
+from typing import Callable, Optional, Set
+
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from database.crud_factory import PostCRUD, TopicCRUD
+from cache import get_hot_post_cache
+from coalescing import SingleFlight
+from conf import get_settings
+from database.archive import read_archived_page
+from database.changes import changes_since
+from database.crud_factory import PostCRUD, SortKey, TopicCRUD
 from database.db_conf import SessionLocal
+from database.post_counts import author_post_count
+from database.reactions import add_reaction, remove_reaction
 from database.validation_schemas import (
     PostCreateValidatedData,
     PostUpdateValidatedData,
     TopicCreateValidatedData,
     TopicUpdateValidatedData,
+    from_request,
 )
 from datastructures import (
+    ChangesParams,
+    KeysetParams,
+    LatestPostsParams,
     PageParams,
     PostData,
+    ProfileParams,
+    ReactionData,
+    ReactionKind,
     RequesterData,
     TopicCreateData,
     TopicUpdateData,
 )
-from dependencies import JWTToken, get_db
-from exceptions import NoPermissionException
-from schemas import PaginatedResponse, PostSchema, TopicSchema
-from utils import paginate
+from dependencies import (
+    FieldSelection,
+    get_db,
+    get_idempotent_request,
+    get_session_factory,
+    jwt_token,
+)
+from exceptions import (
+    NoPermissionException,
+    ProfileInProgressException,
+    TopicArchivedException,
+)
+from http_cache import TOPICS_KEY, post_key, tag_response, topic_key, user_key
+from idempotency import IdempotentRequest, get_idempotency_store
+from limiter import get_db_limiter
+from outbox import get_outbox_consumer
+from permissions import Role, require_role
+from profiler import StackSampler, TimedRoute
+from reactions import get_reaction_counter
+from schemas import (
+    ChangesSchema,
+    KeysetResponse,
+    LivenessSchema,
+    MetricsSchema,
+    PaginatedResponse,
+    PostRevisionSchema,
+    PostSchema,
+    ReadinessSchema,
+    TopicSchema,
+    TopicWithPostsSchema,
+)
+from utils import decode_cursor, encode_cursor, paginate, select_fields
 
-router = APIRouter(prefix="/api/forum", tags=["forum"])
+router = APIRouter(prefix="/api/forum", tags=["forum"], route_class=TimedRoute)
+health_router = APIRouter(tags=["health"])
+debug_router = APIRouter(prefix="/debug", tags=["debug"])
 
 
-jwt_token = JWTToken()
+stack_sampler = StackSampler(get_settings().PROFILING_MAX_SECONDS)
+single_flight = SingleFlight()
 
 
 @router.get("/topics/")
 async def topics(
     requester_data: RequesterData = Depends(jwt_token.decode),
     page_params: PageParams = Depends(),
+    fields: Optional[Set[str]] = Depends(FieldSelection(TopicSchema)),
     db: SessionLocal = Depends(get_db),
 ) -> PaginatedResponse[TopicSchema]:
-    return paginate(page_params, TopicCRUD.get_many(db, order_by="created_on desc"))
+    tag_response(TOPICS_KEY)
+    return select_fields(
+        PaginatedResponse[TopicSchema],
+        paginate(page_params, TopicCRUD.get_many(db, order_by=SortKey.CREATED_ON_DESC)),
+        fields,
+    )
+
+
+@router.get("/topics/latest-posts/")
+async def topics_with_latest_posts(
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    page_params: PageParams = Depends(),
+    latest_params: LatestPostsParams = Depends(),
+    db: SessionLocal = Depends(get_db),
+) -> PaginatedResponse[TopicWithPostsSchema]:
+    page = paginate(
+        page_params, TopicCRUD.get_many(db, order_by=SortKey.CREATED_ON_DESC)
+    )
+    page.data = PostCRUD.load_latest_for_topics(db, page.data, latest_params.posts)
+    tag_response(TOPICS_KEY, *(topic_key(topic.id) for topic in page.data))
+    return page
 
 
 @router.get("/topics/{topic_id}/")
 async def topic_details(
     topic_id: int,
     requester_data: RequesterData = Depends(jwt_token.decode),
+    fields: Optional[Set[str]] = Depends(FieldSelection(TopicSchema)),
     db: SessionLocal = Depends(get_db),
 ) -> TopicSchema:
-    return TopicCRUD.get_one(db, topic_id)
+    topic_obj = TopicCRUD.get_one(db, topic_id)
+    if topic_obj is not None:
+        tag_response(
+            topic_key(topic_id),
+            last_modified=topic_obj.updated_at or topic_obj.created_on,
+        )
+    return select_fields(TopicSchema, topic_obj, fields)
+
+
+@router.get("/changes/")
+async def changes(
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    changes_params: ChangesParams = Depends(),
+    db: SessionLocal = Depends(get_db),
+) -> ChangesSchema:
+    return changes_since(db, changes_params.since, changes_params.limit)
 
 
 @router.post("/topics/")
 async def topic_create(
     topic_data: TopicCreateData,
     requester_data: RequesterData = Depends(jwt_token.decode),
+    idempotent_request: IdempotentRequest = Depends(get_idempotent_request),
     db: SessionLocal = Depends(get_db),
 ) -> TopicSchema:
-    validated_data = TopicCreateValidatedData(
-        **topic_data.model_dump() | {"created_by": requester_data.name}
+    if (
+        replay := idempotent_request.begin(requester_data.name, topic_data)
+    ) is not None:
+        return replay
+    validated_data: TopicCreateValidatedData = from_request(
+        topic_data, created_by=requester_data.name
     )
     topic_obj = TopicCRUD.create(db, validated_data)
-    return topic_obj
+    return idempotent_request.complete(TopicSchema, topic_obj)
 
 
 @router.patch("/topics/{topic_id}/")
@@ -65,13 +156,9 @@ async def topic_update(
     requester_data: RequesterData = Depends(jwt_token.decode),
     db: SessionLocal = Depends(get_db),
 ) -> TopicSchema:
-    if not set(requester_data.groups) & {"moderator"}:
-        raise NoPermissionException(requester_data.name)
-    topic_obj = TopicCRUD.get_one(db, topic_id)
-    validated_data = TopicUpdateValidatedData(
-        **topic_data.model_dump(exclude_none=True)
-    )
-    return TopicCRUD.update(db, topic_obj, validated_data)
+    require_role(requester_data, Role.MODERATOR)
+    validated_data: TopicUpdateValidatedData = from_request(topic_data)
+    return TopicCRUD.update_if_permitted(db, topic_id, validated_data, requester_data)
 
 
 @router.delete("/topics/{topic_id}/", response_model=bool)
@@ -80,10 +167,8 @@ async def topic_delete(
     requester_data: RequesterData = Depends(jwt_token.decode),
     db: SessionLocal = Depends(get_db),
 ) -> bool | StarletteHTTPException:
-    if not set(requester_data.groups) & {"moderator"}:
-        raise NoPermissionException(requester_data.name)
-    topic_obj = TopicCRUD.get_one(db, topic_id)
-    return TopicCRUD.delete(db, topic_obj)
+    require_role(requester_data, Role.MODERATOR)
+    return TopicCRUD.delete_if_permitted(db, topic_id, requester_data)
 
 
 @router.get("/topics/{topic_id}/posts/")
@@ -91,12 +176,48 @@ async def topic_posts(
     topic_id: int,
     requester_data: RequesterData = Depends(jwt_token.decode),
     page_params: PageParams = Depends(),
+    fields: Optional[Set[str]] = Depends(FieldSelection(PostSchema)),
     db: SessionLocal = Depends(get_db),
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
 ) -> PaginatedResponse[PostSchema]:
-    return paginate(
-        page_params,
-        PostCRUD.get_many(db, topic_id, "topic_id", order_by="posted_on desc"),
+    hot_posts = get_hot_post_cache()
+    page = hot_posts.get_page(topic_id, page_params) if hot_posts else None
+    if page is None:
+
+        # The read is shared by the coalesced requests and may outlive the
+        # request which started it, so it runs in a session of its own.
+        def read_page() -> PaginatedResponse[PostSchema]:
+            generation = hot_posts.generation(topic_id) if hot_posts else 0
+            with session_factory() as read_db:
+                page = PaginatedResponse[PostSchema].model_validate(
+                    paginate(
+                        page_params,
+                        PostCRUD.get_many(
+                            read_db,
+                            topic_id,
+                            "topic_id",
+                            order_by=SortKey.POSTED_ON_DESC,
+                        ),
+                    ),
+                    from_attributes=True,
+                )
+                # The posts of an archived topic are no longer in the table.
+                if page.total == 0:
+                    archived = read_archived_page(read_db, topic_id, page_params)
+                    if archived is not None:
+                        return archived
+            if hot_posts:
+                hot_posts.store_page(topic_id, page_params, page, generation)
+            return page
+
+        page = await single_flight.do(
+            ("topic_posts", topic_id, page_params.page, page_params.size), read_page
+        )
+    tag_response(topic_key(topic_id))
+    page = page.model_copy(
+        update={"data": get_reaction_counter().with_counts(db, page.data)}
     )
+    return select_fields(PaginatedResponse[PostSchema], page, fields)
 
 
 @router.post("/topics/{topic_id}/posts/")
@@ -104,16 +225,38 @@ async def topic_post_create(
     topic_id: int,
     post_data: PostData,
     requester_data: RequesterData = Depends(jwt_token.decode),
+    idempotent_request: IdempotentRequest = Depends(get_idempotent_request),
     db: SessionLocal = Depends(get_db),
 ) -> PostSchema:
-    validated_data = PostCreateValidatedData(
-        **post_data.model_dump(exclude_none=True)
-        | {
-            "author": requester_data.name,
-            "topic_id": topic_id,
-        }
+    if (replay := idempotent_request.begin(requester_data.name, post_data)) is not None:
+        return replay
+    if TopicCRUD.is_archived(db, topic_id):
+        raise TopicArchivedException(topic_id)
+    validated_data: PostCreateValidatedData = from_request(
+        post_data, author=requester_data.name, topic_id=topic_id
     )
-    return PostCRUD.create(db, validated_data)
+    return idempotent_request.complete(PostSchema, PostCRUD.create(db, validated_data))
+
+
+@router.get("/posts/{post_id}/")
+async def topic_post_details(
+    post_id: int,
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    fields: Optional[Set[str]] = Depends(FieldSelection(PostSchema)),
+    db: SessionLocal = Depends(get_db),
+) -> PostSchema:
+    post = PostCRUD.get_full(db, post_id)
+    if post is not None:
+        # Reactions do not move updated_at, so responses holding them are not
+        # conditional.
+        if fields is None or "reactions" in fields:
+            tag_response(post_key(post_id))
+            (post,) = get_reaction_counter().with_counts(db, [post])
+        else:
+            tag_response(
+                post_key(post_id), last_modified=post.updated_at or post.posted_on
+            )
+    return select_fields(PostSchema, post, fields)
 
 
 @router.patch("/posts/{post_id}/")
@@ -123,14 +266,33 @@ async def topic_post_update(
     requester_data: RequesterData = Depends(jwt_token.decode),
     db: SessionLocal = Depends(get_db),
 ) -> PostSchema:
-    post_obj = PostCRUD.get_one(db, post_id)
-    if not (
-        post_obj.author == requester_data.name
-        or set(requester_data.groups) & {"moderator"}
-    ):
+    validated_data: PostUpdateValidatedData = from_request(post_data)
+    post_obj = PostCRUD.update_if_permitted(db, post_id, validated_data, requester_data)
+    if post_obj is None:
         raise NoPermissionException(requester_data.name)
-    validated_data = PostUpdateValidatedData(**post_data.model_dump(exclude_none=True))
-    return PostCRUD.update(db, post_obj, validated_data)
+    return post_obj
+
+
+@router.get("/posts/{post_id}/revisions/")
+async def topic_post_revisions(
+    post_id: int,
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    page_params: PageParams = Depends(),
+    db: SessionLocal = Depends(get_db),
+) -> PaginatedResponse[PostRevisionSchema]:
+    revisions = PostCRUD.get_revisions(
+        db,
+        post_id,
+        requester_data,
+        offset=(page_params.page - 1) * page_params.size,
+        limit=page_params.size,
+    )
+    if revisions is None:
+        raise NoPermissionException(requester_data.name)
+    total, page = revisions
+    return PaginatedResponse[PostRevisionSchema](
+        total=total, page=page_params.page, size=page_params.size, data=page
+    )
 
 
 @router.delete("/posts/{post_id}/")
@@ -139,10 +301,117 @@ async def topic_post_delete(
     requester_data: RequesterData = Depends(jwt_token.decode),
     db: SessionLocal = Depends(get_db),
 ) -> bool:
-    post_obj = PostCRUD.get_one(db, post_id)
-    if not (
-        post_obj.author == requester_data.name
-        or set(requester_data.groups) & {"moderator"}
-    ):
+    if not PostCRUD.delete_if_permitted(db, post_id, requester_data):
         raise NoPermissionException(requester_data.name)
-    return PostCRUD.delete(db, post_obj)
+    return True
+
+
+@router.post("/posts/{post_id}/reactions/")
+async def post_reaction_add(
+    post_id: int,
+    reaction_data: ReactionData,
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    db: SessionLocal = Depends(get_db),
+) -> bool:
+    added = add_reaction(db, post_id, requester_data.name, reaction_data.kind)
+    if added:
+        get_reaction_counter().add(post_id, reaction_data.kind, 1)
+        tag_response(post_key(post_id))
+    return added
+
+
+@router.delete("/posts/{post_id}/reactions/{kind}/")
+async def post_reaction_remove(
+    post_id: int,
+    kind: ReactionKind,
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    db: SessionLocal = Depends(get_db),
+) -> bool:
+    removed = remove_reaction(db, post_id, requester_data.name, kind)
+    if removed:
+        get_reaction_counter().add(post_id, kind, -1)
+        tag_response(post_key(post_id))
+    return removed
+
+
+@router.get("/users/{name}/posts/")
+async def user_posts(
+    name: str,
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    keyset_params: KeysetParams = Depends(),
+    db: SessionLocal = Depends(get_db),
+) -> KeysetResponse[PostSchema]:
+    after = decode_cursor(keyset_params.cursor) if keyset_params.cursor else None
+    posts = PostCRUD.get_by_author(db, name, keyset_params.size + 1, after)
+    next_cursor = None
+    if len(posts) > keyset_params.size:
+        posts = posts[: keyset_params.size]
+        next_cursor = encode_cursor(posts[-1].posted_on, posts[-1].id)
+    tag_response(user_key(name), *(topic_key(post.topic_id) for post in posts))
+    # The total counts the archived posts, which the listing skips since they
+    # are only stored in the archive of their topic.
+    return KeysetResponse(
+        total=author_post_count(db, name),
+        size=keyset_params.size,
+        next_cursor=next_cursor,
+        data=get_reaction_counter().with_counts(
+            db,
+            [PostSchema.model_validate(post, from_attributes=True) for post in posts],
+        ),
+    )
+
+
+@health_router.get("/health")
+async def health() -> LivenessSchema:
+    return LivenessSchema(alive=True)
+
+
+@health_router.get("/metrics")
+async def metrics(
+    requester_data: RequesterData = Depends(jwt_token.decode),
+) -> MetricsSchema:
+    require_role(requester_data, Role.MODERATOR)
+    hot_posts = get_hot_post_cache()
+    db_limiter = get_db_limiter()
+    return MetricsSchema(
+        coalescing={"topic_posts": single_flight.stats()},
+        hot_post_cache=hot_posts.stats() if hot_posts else None,
+        idempotency=get_idempotency_store().stats(),
+        db_limiter=db_limiter.stats() if db_limiter else None,
+        reactions=get_reaction_counter().stats(),
+        outbox=get_outbox_consumer().stats(),
+    )
+
+
+@health_router.get("/ready")
+async def ready(request: Request, response: Response) -> ReadinessSchema:
+    startup = getattr(request.app.state, "startup", None)
+    db_probe = getattr(request.app.state, "db_probe", None)
+    database_reachable = db_probe is not None and await db_probe.reachable()
+    is_ready = startup is not None and startup.ready and database_reachable
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessSchema(
+        ready=is_ready,
+        database_reachable=database_reachable,
+        pool=db_probe.pool_status() if db_probe else {},
+        startup_ms=startup.total if startup else None,
+        startup_steps_ms=startup.steps if startup else {},
+    )
+
+
+@debug_router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    requester_data: RequesterData = Depends(jwt_token.decode),
+    profile_params: ProfileParams = Depends(),
+) -> PlainTextResponse:
+    require_role(requester_data, Role.MODERATOR)
+    if stack_sampler.busy:
+        raise ProfileInProgressException()
+    collapsed_stacks = await stack_sampler.profile(
+        profile_params.seconds, profile_params.interval_ms / 1000
+    )
+    return PlainTextResponse(
+        collapsed_stacks,
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+    )
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Generic, List, Optional, TypeVar
+from typing import Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -17,9 +17,24 @@ class PaginatedResponse(BaseModel, Generic[T]):
     data: List[T]
 
 
+class KeysetResponse(BaseModel, Generic[T]):
+    """
+    A model representing a page of a keyset paginated response.
+
+    The cursor of the next page is None on the last page.
+    """
+
+    total: int
+    size: int
+    next_cursor: Optional[str]
+    data: List[T]
+
+
 class TopicSchema(BaseModel):
     """
     A model representing the response schema for a topic.
+
+    The posts of an archived topic are read-only.
     """
 
     id: int
@@ -28,14 +43,99 @@ class TopicSchema(BaseModel):
     category: str
     created_by: str
     created_on: datetime
+    updated_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
 
 
 class PostSchema(BaseModel):
     """
     A model representing the response schema for a post.
+
+    The content of a truncated post is a preview of its full content. The
+    reactions are the number of reactions of each kind, None in responses
+    which do not count them, e.g. the changes feed.
     """
 
     id: int
     content: str
     author: str
     posted_on: datetime
+    updated_at: Optional[datetime] = None
+    truncated: bool = False
+    reactions: Optional[Dict[str, int]] = None
+
+
+class PostRevisionSchema(BaseModel):
+    """
+    A model representing the response schema for a previous version of a post,
+    along with the user who edited it.
+    """
+
+    id: int
+    content: str
+    edited_by: str
+    edited_on: datetime
+
+
+class TopicWithPostsSchema(TopicSchema):
+    """
+    A model representing the response schema for a topic along with its latest posts.
+    """
+
+    posts: List[PostSchema]
+
+
+class PostChangeSchema(PostSchema):
+    """
+    A model representing the response schema for a changed post, along with its topic.
+    """
+
+    topic_id: int
+
+
+class ChangesSchema(BaseModel):
+    """
+    A model representing the response schema for the topics and posts changed
+    since a change token.
+    """
+
+    token: str
+    has_more: bool
+    reset: bool
+    topics: List[TopicSchema] = []
+    posts: List[PostChangeSchema] = []
+    deleted_topics: List[int] = []
+    deleted_posts: List[int] = []
+
+
+class LivenessSchema(BaseModel):
+    """
+    A model representing the response schema for the liveness probe.
+    """
+
+    alive: bool
+
+
+class ReadinessSchema(BaseModel):
+    """
+    A model representing the response schema for the readiness probe.
+    """
+
+    ready: bool
+    database_reachable: bool
+    pool: Dict[str, int]
+    startup_ms: Optional[float]
+    startup_steps_ms: Dict[str, float]
+
+
+class MetricsSchema(BaseModel):
+    """
+    A model representing the response schema for the process metrics.
+    """
+
+    coalescing: Dict[str, Dict[str, int]]
+    hot_post_cache: Optional[Dict[str, int]]
+    idempotency: Dict[str, int]
+    db_limiter: Optional[Dict[str, float]]
+    reactions: Dict[str, int]
+    outbox: Dict[str, float]
@@ -1,4 +1,13 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Optional, Set, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
 from datastructures import PageParams
+from exceptions import InvalidCursorException
 from schemas import PaginatedResponse, T
 
 
@@ -25,3 +34,74 @@ def paginate(page_params: PageParams, query) -> PaginatedResponse[T]:
         size=page_params.size,
         data=paginated_query,
     )
+
+
+def encode_cursor(posted_on: datetime, id_: int) -> str:
+    """
+    Encode the position of a post into an opaque pagination cursor.
+
+    Args:
+        posted_on (datetime): The publication date of the post.
+        id_ (int): The ID of the post.
+
+    Returns:
+        str: The cursor.
+    """
+    return base64.urlsafe_b64encode(f"{posted_on.isoformat()}|{id_}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a pagination cursor built by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        Tuple[datetime, int]: The publication date and the ID of the post.
+
+    Raises:
+        InvalidCursorException: If the cursor cannot be decoded.
+    """
+    try:
+        posted_on, id_ = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(posted_on), int(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorException(cursor)
+
+
+def select_fields(
+    response_model: Type[BaseModel], data: Any, fields: Optional[Set[str]]
+) -> Any:
+    """
+    Serialize only the selected fields of a response.
+
+    For paginated responses, the selection applies to each item of the page
+    while the pagination attributes are always returned.
+
+    Args:
+        response_model (Type[BaseModel]): The response model of the route.
+        data (Any): The data returned by the route.
+        fields (Optional[Set[str]]): The fields to include, or None to include all of them.
+
+    Returns:
+        Any: The data untouched if no field is selected, otherwise a JSON
+        response containing the selected fields only.
+    """
+    if fields is None:
+        return data
+    if issubclass(response_model, PaginatedResponse):
+        include = {
+            "total": True,
+            "page": True,
+            "size": True,
+            "data": {"__all__": fields},
+        }
+    else:
+        include = fields
+    return Response(
+        content=response_model.model_validate(
+            data, from_attributes=True
+        ).model_dump_json(include=include),
+        media_type="application/json",
+    )
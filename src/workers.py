@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from database.crud_factory import PostCRUD, TopicCRUD
+from database.db_conf import SessionLocal
+from outbox import OutboxConsumer
+from reactions import ReactionCounter
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """
+    A class running a synchronous job periodically, off the request path.
+
+    The job runs in a worker thread so that it never blocks the event loop.
+    Errors are logged and do not stop the worker.
+
+    Attributes:
+        name (str): The name of the worker, used in logs.
+        job (Callable[[], Any]): The job to run.
+        interval (float): The number of seconds to wait between two runs.
+    """
+
+    def __init__(self, name: str, job: Callable[[], Any], interval: float):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        """
+        Runs the job forever, waiting `interval` seconds between two runs.
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.job)
+            except Exception:
+                logger.exception("Worker %s failed", self.name)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Starts the worker in the running event loop.
+        """
+        self._task = asyncio.create_task(self.run(), name=self.name)
+
+    async def stop(self) -> None:
+        """
+        Stops the worker and waits for its task to finish.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+def purge_deleted_records(
+    batch_size: int, session_factory: Callable[[], Session] = SessionLocal
+) -> int:
+    """
+    Permanently remove soft deleted posts and topics.
+
+    Records are removed in batches of at most `batch_size` rows, each batch
+    in its own transaction, so that locks are only held for a short time.
+    Posts are purged first since topics are only purged once empty.
+
+    Args:
+        batch_size (int): The maximum number of records removed per transaction.
+        session_factory (Callable[[], Session]): The factory creating database sessions.
+
+    Returns:
+        int: The total number of removed records.
+    """
+    purged = 0
+    with session_factory() as db:
+        for crud in (PostCRUD, TopicCRUD):
+            while True:
+                count = crud.purge(db, batch_size)
+                purged += count
+                if count < batch_size:
+                    break
+    return purged
+
+
+def flush_reaction_counts(
+    counter: ReactionCounter, session_factory: Callable[[], Session] = SessionLocal
+) -> int:
+    """
+    Add the reactions counted in memory since the last flush to the reaction
+    counts of the database, in a single transaction.
+
+    Args:
+        counter (ReactionCounter): The reaction counter of the process.
+        session_factory (Callable[[], Session]): The factory creating database sessions.
+
+    Returns:
+        int: The number of written counts.
+    """
+    return counter.flush(session_factory)
+
+
+def audit_reaction_counts(
+    counter: ReactionCounter, session_factory: Callable[[], Session] = SessionLocal
+) -> int:
+    """
+    Compare the reaction counts of the database with the reactions, e.g. to
+    detect the reactions lost by a process killed before its flush.
+
+    Args:
+        counter (ReactionCounter): The reaction counter of the process.
+        session_factory (Callable[[], Session]): The factory creating database sessions.
+
+    Returns:
+        int: The number of drifted counts.
+    """
+    drifted = counter.audit(session_factory)
+    if drifted:
+        logger.warning(
+            "%d reaction counts drifted, rebuild them with python -m database.reactions",
+            drifted,
+        )
+    return drifted
+
+
+def consume_outbox(
+    consumer: OutboxConsumer, session_factory: Callable[[], Session] = SessionLocal
+) -> int:
+    """
+    Run the due side effects of writes, by batches.
+
+    Args:
+        consumer (OutboxConsumer): The outbox consumer of the process.
+        session_factory (Callable[[], Session]): The factory creating database sessions.
+
+    Returns:
+        int: The number of claimed tasks.
+    """
+    return consumer.run(session_factory)
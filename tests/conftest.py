@@ -1,5 +1,6 @@
+from contextlib import contextmanager
 from enum import StrEnum, auto
-from typing import Generator
+from typing import Callable, ContextManager, Generator, Iterator
 
 import pytest
 from faker import Faker
@@ -9,10 +10,15 @@ from sqlalchemy.exc import OperationalError as SQLAlchemyOperationalError
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from cache import HotPostCache, get_hot_post_cache
+from conf import get_settings
 from database.models import BaseModel
 from datastructures import RequesterData
-from dependencies import get_db
+from dependencies import get_db, get_session_factory
+from idempotency import get_idempotency_store
 from main import app
+from query_budget import QueryCount, count_queries
+from reactions import get_reaction_counter
 from routers import jwt_token
 
 
@@ -78,11 +84,49 @@ def async_test_client(db_session) -> Generator[AsyncClient, None, None]:
             db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: lambda: db_session
+    if (hot_posts := get_hot_post_cache()) is not None:
+        hot_posts.clear()
+    get_idempotency_store().clear()
+    get_reaction_counter().clear()
     yield AsyncClient(
         transport=ASGITransport(app=app), base_url="http://localhost/api/forum"
     )
 
 
+@pytest.fixture
+def hot_post_cache(monkeypatch) -> Iterator[HotPostCache]:
+    """Enable the hot post cache for the duration of the test."""
+    monkeypatch.setattr(get_settings(), "HOT_CACHE_ENABLED", True)
+    get_hot_post_cache.cache_clear()
+    yield get_hot_post_cache()
+    get_hot_post_cache.cache_clear()
+
+
+@pytest.fixture
+def no_tombstone_retention(monkeypatch) -> None:
+    """Let soft deleted records be purged as soon as they are deleted."""
+    monkeypatch.setattr(get_settings(), "TOMBSTONE_RETENTION_DAYS", 0)
+
+
+@pytest.fixture
+def assert_max_queries(
+    async_test_client,
+) -> Callable[[int], ContextManager[QueryCount]]:
+    """Count the SQL statements executed by the requests sent with the test client."""
+
+    @contextmanager
+    def assert_max_queries(budget: int) -> Iterator[QueryCount]:
+        with count_queries() as counter:
+            yield counter
+        assert counter.count <= budget, (
+            f"{counter.count} SQL statements executed, budget is {budget}:\n"
+            + "\n".join(counter.statements)
+        )
+
+    return assert_max_queries
+
+
 class Users(StrEnum):
     TEST_BASIC_USER = auto()
     TEST_ANOTHER_BASIC_USER = auto()
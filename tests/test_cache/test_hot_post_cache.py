@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import HotPostCache
+from datastructures import PageParams
+from schemas import PaginatedResponse, PostSchema
+
+
+def make_post(id_: int, content: str = "content") -> PostSchema:
+    return PostSchema(
+        id=id_,
+        content=content,
+        author="author",
+        posted_on=datetime(2020, 1, 1) + timedelta(days=id_),
+    )
+
+
+def make_page(topic_id: int, ids, total: int) -> PaginatedResponse:
+    return PaginatedResponse[PostSchema](
+        total=total,
+        page=1,
+        size=len(ids),
+        data=[make_post(id_) for id_ in ids],
+    )
+
+
+@pytest.fixture
+def hot_posts() -> HotPostCache:
+    return HotPostCache(page_size=3, max_topics=2, max_bytes=1 << 20, ttl=60)
+
+
+class TestHotPostCache:
+    def test_get_page_when_topic_not_cached_should_return_none(self, hot_posts):
+        assert hot_posts.get_page(1, PageParams(size=3)) is None
+        assert hot_posts.stats()["misses"] == 1
+
+    def test_get_page_when_not_first_page_should_bypass_cache(self, hot_posts):
+        hot_posts.store_page(
+            1, PageParams(size=3), make_page(1, [3, 2, 1], 3), hot_posts.generation(1)
+        )
+        assert hot_posts.get_page(1, PageParams(page=2, size=3)) is None
+        assert hot_posts.get_page(1, PageParams(size=5)) is None
+
+    def test_get_page_when_stored_should_return_cached_page(self, hot_posts):
+        hot_posts.store_page(
+            1, PageParams(size=3), make_page(1, [5, 4, 3], 5), hot_posts.generation(1)
+        )
+        page = hot_posts.get_page(1, PageParams(size=2))
+        assert page.total == 5
+        assert [post.id for post in page.data] == [5, 4]
+
+    def test_add_should_push_newest_post_and_drop_oldest(self, hot_posts):
+        hot_posts.store_page(
+            1, PageParams(size=3), make_page(1, [3, 2, 1], 3), hot_posts.generation(1)
+        )
+        hot_posts.add(1, make_post(4))
+        page = hot_posts.get_page(1, PageParams(size=3))
+        assert page.total == 4
+        assert [post.id for post in page.data] == [4, 3, 2]
+
+    def test_add_when_topic_not_cached_should_not_cache_topic(self, hot_posts):
+        hot_posts.add(1, make_post(1))
+        assert hot_posts.stats()["topics"] == 0
+
+    def test_replace_should_update_cached_post(self, hot_posts):
+        hot_posts.store_page(
+            1, PageParams(size=3), make_page(1, [3, 2, 1], 3), hot_posts.generation(1)
+        )
+        hot_posts.replace(1, make_post(2, content="updated"))
+        page = hot_posts.get_page(1, PageParams(size=3))
+        assert page.data[1].content == "updated"
+
+    def test_store_page_when_max_topics_exceeded_should_evict_least_recently_used(
+        self, hot_posts
+    ):
+        for topic_id in (1, 2):
+            hot_posts.store_page(
+                topic_id,
+                PageParams(size=3),
+                make_page(topic_id, [1], 1),
+                hot_posts.generation(topic_id),
+            )
+        hot_posts.get_page(1, PageParams(size=3))
+        hot_posts.store_page(
+            3, PageParams(size=3), make_page(3, [1], 1), hot_posts.generation(3)
+        )
+        assert hot_posts.get_page(2, PageParams(size=3)) is None
+        assert hot_posts.get_page(1, PageParams(size=3)) is not None
+
+    def test_store_page_when_max_bytes_exceeded_should_evict(self):
+        hot_posts = HotPostCache(page_size=3, max_topics=10, max_bytes=1000, ttl=60)
+        hot_posts.store_page(
+            1, PageParams(size=3), make_page(1, [3, 2, 1], 3), hot_posts.generation(1)
+        )
+        hot_posts.store_page(
+            2, PageParams(size=3), make_page(2, [3, 2, 1], 3), hot_posts.generation(2)
+        )
+        assert hot_posts.stats()["topics"] == 1
+        assert hot_posts.stats()["size_bytes"] <= 1000
+
+    def test_get_page_when_ttl_elapsed_should_expire_topic(self):
+        now = [0.0]
+        hot_posts = HotPostCache(
+            page_size=3, max_topics=2, max_bytes=1 << 20, ttl=10, clock=lambda: now[0]
+        )
+        hot_posts.store_page(
+            1, PageParams(size=3), make_page(1, [3, 2, 1], 3), hot_posts.generation(1)
+        )
+        now[0] = 9
+        hot_posts.add(1, make_post(4))
+        assert hot_posts.get_page(1, PageParams(size=3)) is not None
+        now[0] = 10
+        assert hot_posts.get_page(1, PageParams(size=3)) is None
+        assert hot_posts.stats()["topics"] == 0
+
+    def test_store_page_when_topic_written_during_read_should_not_store(
+        self, hot_posts
+    ):
+        generation = hot_posts.generation(1)
+        hot_posts.add(1, make_post(4))
+        page = make_page(1, [3, 2, 1], 3)
+        assert not hot_posts.store_page(1, PageParams(size=3), page, generation)
+        assert hot_posts.get_page(1, PageParams(size=3)) is None
+        assert hot_posts.store_page(
+            1, PageParams(size=3), page, hot_posts.generation(1)
+        )
+
+    def test_add_when_post_already_cached_should_replace_it(self, hot_posts):
+        page = make_page(1, [3, 2, 1], 3)
+        hot_posts.store_page(1, PageParams(size=3), page, hot_posts.generation(1))
+        hot_posts.add(1, make_post(3, content="read before added"))
+        page = hot_posts.get_page(1, PageParams(size=3))
+        assert [post.id for post in page.data] == [3, 2, 1]
+        assert page.total == 3
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+
+from coalescing import SingleFlight
+
+
+def blocking_call(release: threading.Event, calls: list, result="result"):
+    def call():
+        calls.append(1)
+        release.wait(timeout=5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return call
+
+
+async def wait_in_flight(single_flight: SingleFlight) -> None:
+    while not single_flight.stats()["in_flight"]:
+        await asyncio.sleep(0)
+
+
+class TestSingleFlight:
+    async def test_do_when_concurrent_calls_should_execute_once(self):
+        single_flight, release, calls = SingleFlight(), threading.Event(), []
+        func = blocking_call(release, calls)
+        leader = asyncio.ensure_future(single_flight.do("key", func))
+        await wait_in_flight(single_flight)
+        waiters = [
+            asyncio.ensure_future(single_flight.do("key", func)) for _ in range(4)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(leader, *waiters) == ["result"] * 5
+        assert len(calls) == 1
+        assert single_flight.stats() == {
+            "executions": 1,
+            "coalesced": 4,
+            "in_flight": 0,
+        }
+
+    async def test_do_when_previous_call_completed_should_execute_again(self):
+        single_flight, release, calls = SingleFlight(), threading.Event(), []
+        release.set()
+        func = blocking_call(release, calls)
+        await single_flight.do("key", func)
+        await single_flight.do("key", func)
+        assert len(calls) == 2
+
+    async def test_do_when_keys_differ_should_not_coalesce(self):
+        single_flight, release, calls = SingleFlight(), threading.Event(), []
+        release.set()
+        await asyncio.gather(
+            single_flight.do("a", blocking_call(release, calls)),
+            single_flight.do("b", blocking_call(release, calls)),
+        )
+        assert single_flight.stats()["coalesced"] == 0
+
+    async def test_do_when_function_raises_should_raise_to_all_callers(self):
+        single_flight, release, calls = SingleFlight(), threading.Event(), []
+        func = blocking_call(release, calls, ValueError("boom"))
+        leader = asyncio.ensure_future(single_flight.do("key", func))
+        await wait_in_flight(single_flight)
+        waiter = asyncio.ensure_future(single_flight.do("key", func))
+        await asyncio.sleep(0)
+        release.set()
+        for task in (leader, waiter):
+            with pytest.raises(ValueError):
+                await task
+
+    async def test_do_when_leader_cancelled_should_still_serve_waiters(self):
+        single_flight, release, calls = SingleFlight(), threading.Event(), []
+        func = blocking_call(release, calls)
+        leader = asyncio.ensure_future(single_flight.do("key", func))
+        await wait_in_flight(single_flight)
+        waiter = asyncio.ensure_future(single_flight.do("key", func))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+        assert await waiter == "result"
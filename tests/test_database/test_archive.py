@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from conf import get_settings
+from database.archive import (
+    ArchiveStore,
+    archive_cold_topics,
+    archive_path,
+    archive_topic,
+    get_archive_store,
+    read_archived_page,
+)
+from database.crud_factory import POST_DEPENDENTS, PostCRUD, TopicCRUD
+from database.models import Post, PostReaction, PostReactionCount, Topic
+from database.post_counts import author_post_count, rebuild_post_counts
+from database.validation_schemas import PostCreateValidatedData
+from datastructures import PageParams, RequesterData
+
+MODERATOR = RequesterData(name="moderator", groups=["moderator"])
+COLD = datetime.today() - timedelta(days=400)
+
+
+@pytest.fixture
+def archive_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "ARCHIVE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "ARCHIVE_SHARED_STORAGE", True)
+    get_archive_store.cache_clear()
+    yield tmp_path
+    get_archive_store().close()
+    get_archive_store.cache_clear()
+
+
+def create_cold_topic(db_session, n: int, content: str = "Archived") -> int:
+    topic_obj = Topic(
+        title="Cold", category="archive", created_by="archivist", created_on=COLD
+    )
+    db_session.add(topic_obj)
+    db_session.flush()
+    db_session.add_all(
+        Post(
+            content=f"{content} {i}",
+            author="archivist",
+            topic_id=topic_obj.id,
+            posted_on=COLD + timedelta(minutes=i),
+        )
+        for i in range(n)
+    )
+    db_session.flush()
+    db_session.execute(
+        update(Topic).where(Topic.id == topic_obj.id).values(updated_at=COLD)
+    )
+    db_session.execute(
+        update(Post).where(Post.topic_id == topic_obj.id).values(updated_at=COLD)
+    )
+    db_session.commit()
+    return topic_obj.id
+
+
+class TestArchive:
+    def test_archive_topic_should_keep_stub_and_remove_posts(
+        self, db_session, archive_directory
+    ):
+        topic_id = create_cold_topic(db_session, 5)
+        assert archive_topic(db_session, topic_id, archive_directory, 2) == 5
+        topic_obj = TopicCRUD.get_one(db_session, topic_id)
+        assert topic_obj.archived_at is not None
+        assert topic_obj.title == "Cold"
+        assert not db_session.scalars(
+            select(Post.id).where(Post.topic_id == topic_id)
+        ).all()
+        assert archive_topic(db_session, topic_id, archive_directory, 2) is None
+
+    def test_archive_store_should_read_pages_across_blocks(
+        self, db_session, archive_directory
+    ):
+        topic_id = create_cold_topic(db_session, 7)
+        archive_topic(db_session, topic_id, archive_directory, 3)
+        store = ArchiveStore(archive_directory, max_open=1)
+        page = store.get_page(topic_id, PageParams(page=2, size=3))
+        assert page.total == 7
+        assert [post.content for post in page.data] == [
+            "Archived 3",
+            "Archived 2",
+            "Archived 1",
+        ]
+        last = store.get_page(topic_id, PageParams(page=3, size=3))
+        assert [post.content for post in last.data] == ["Archived 0"]
+        assert store.get_page(topic_id + 1, PageParams(page=1, size=3)) is None
+        store.close()
+
+    def test_archive_topic_should_store_full_content_of_truncated_posts(
+        self, db_session, archive_directory, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "POST_COMPRESSION_THRESHOLD", 100)
+        monkeypatch.setattr(get_settings(), "POST_PREVIEW_LENGTH", 20)
+        topic_id = create_cold_topic(db_session, 0)
+        content = "A long archived post. " * 20
+        PostCRUD.create(
+            db_session,
+            PostCreateValidatedData(
+                content=content, author="archivist", topic_id=topic_id
+            ),
+        )
+        archive_topic(db_session, topic_id, archive_directory, 10)
+        page = get_archive_store().get_page(topic_id, PageParams(page=1, size=10))
+        assert page.data[0].content == content
+        assert not page.data[0].truncated
+
+    def test_archive_cold_topics_should_skip_active_topics(
+        self, db_session, archive_directory
+    ):
+        cold_id = create_cold_topic(db_session, 1)
+        active_id = create_cold_topic(db_session, 1)
+        db_session.add(Post(content="Fresh", author="archivist", topic_id=active_id))
+        db_session.commit()
+        archived = archive_cold_topics(db_session, archive_directory, 365, 10, 1000)
+        assert cold_id in archived
+        assert active_id not in archived
+
+    def test_archive_topic_should_keep_posts_counted_until_topic_purged(
+        self, db_session, archive_directory, no_tombstone_retention
+    ):
+        topic_id = create_cold_topic(db_session, 0)
+        for _ in range(2):
+            PostCRUD.create(
+                db_session,
+                PostCreateValidatedData(
+                    content="Counted", author="uncounted", topic_id=topic_id
+                ),
+            )
+        archive_topic(db_session, topic_id, archive_directory, 10)
+        assert author_post_count(db_session, "uncounted") == 2
+        rebuild_post_counts(db_session)
+        assert author_post_count(db_session, "uncounted") == 2
+        TopicCRUD.delete_if_permitted(db_session, topic_id, MODERATOR)
+        TopicCRUD.purge(db_session, batch_size=10)
+        assert author_post_count(db_session, "uncounted") == 0
+
+    def test_archived_topic_should_be_read_only(self, db_session, archive_directory):
+        topic_id = create_cold_topic(db_session, 1)
+        archive_topic(db_session, topic_id, archive_directory, 10)
+        assert TopicCRUD.is_archived(db_session, topic_id)
+        assert not TopicCRUD.update_if_permitted(
+            db_session, topic_id, {"title": "Renamed"}, MODERATOR
+        )
+
+    def test_archived_topic_when_deleted_should_be_hidden_then_purged(
+        self, db_session, archive_directory, no_tombstone_retention
+    ):
+        topic_id = create_cold_topic(db_session, 1)
+        archive_topic(db_session, topic_id, archive_directory, 10)
+        page_params = PageParams(page=1, size=10)
+        assert read_archived_page(db_session, topic_id, page_params) is not None
+
+        assert TopicCRUD.delete_if_permitted(db_session, topic_id, MODERATOR)
+        assert read_archived_page(db_session, topic_id, page_params) is None
+        TopicCRUD.purge(db_session, batch_size=10)
+        assert db_session.get(Topic, topic_id) is None
+        assert not archive_path(archive_directory, topic_id).exists()
+
+    def test_archive_topic_should_remove_rows_depending_on_posts(
+        self, db_session, archive_directory, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "POST_COMPRESSION_THRESHOLD", 100)
+        monkeypatch.setattr(get_settings(), "POST_PREVIEW_LENGTH", 20)
+        topic_id = create_cold_topic(db_session, 1)
+        post_id = db_session.scalar(select(Post.id).where(Post.topic_id == topic_id))
+        PostCRUD.update_if_permitted(
+            db_session, post_id, {"content": "An edited post. " * 20}, MODERATOR
+        )
+        db_session.add(PostReaction(post_id=post_id, reacted_by="fan", kind="like"))
+        db_session.add(PostReactionCount(post_id=post_id, kind="like", count=1))
+        db_session.commit()
+        archive_topic(db_session, topic_id, archive_directory, 10)
+        for model in POST_DEPENDENTS:
+            assert not db_session.scalars(
+                select(model.post_id).where(model.post_id == post_id)
+            ).all(), model.__name__
+
+    def test_archive_topic_when_storage_not_shared_should_refuse(
+        self, db_session, archive_directory, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "ARCHIVE_SHARED_STORAGE", False)
+        topic_id = create_cold_topic(db_session, 1)
+        with pytest.raises(ValueError):
+            archive_topic(db_session, topic_id, archive_directory, 10)
+        assert not TopicCRUD.is_archived(db_session, topic_id)
+        assert not archive_path(archive_directory, topic_id).exists()
+
+    def test_read_archived_page_should_only_read_archived_topics(
+        self, db_session, archive_directory
+    ):
+        archived_id = create_cold_topic(db_session, 1)
+        archive_topic(db_session, archived_id, archive_directory, 10)
+        emptied_id = create_cold_topic(db_session, 0)
+        archive_path(archive_directory, archived_id).rename(
+            archive_path(archive_directory, emptied_id)
+        )
+        page_params = PageParams(page=1, size=10)
+        assert read_archived_page(db_session, emptied_id, page_params) is None
+        with pytest.raises(FileNotFoundError):
+            read_archived_page(db_session, archived_id, page_params)
@@ -0,0 +1,53 @@
+import pytest
+
+from database.crud_factory import PostCRUD, SortKey, TopicCRUD
+from database.post_counts import author_post_count
+from datastructures import RequesterData
+
+
+class TestGetManyWhitelist:
+    def test_get_many_when_sort_key_not_whitelisted_should_raise(self, db_session):
+        with pytest.raises(ValueError, match="Topic cannot be sorted by"):
+            TopicCRUD.get_many(db_session, order_by=SortKey.POSTED_ON_DESC)
+
+    def test_get_many_when_sort_key_unknown_should_raise(self, db_session):
+        with pytest.raises(ValueError, match="Post cannot be sorted by 'id; drop'"):
+            PostCRUD.get_many(db_session, order_by="id; drop")
+
+    def test_get_many_when_filter_column_not_whitelisted_should_raise(self, db_session):
+        with pytest.raises(ValueError, match="Post cannot be filtered on 'author'"):
+            PostCRUD.get_many(db_session, "someone", "author")
+
+    def test_get_many_when_model_has_no_filter_columns_should_raise(self, db_session):
+        with pytest.raises(ValueError, match="Topic cannot be filtered on 'title'"):
+            TopicCRUD.get_many(db_session, "title", "title")
+
+    def test_get_many_when_whitelisted_should_build_query(self, db_session):
+        query = PostCRUD.get_many(db_session, 1, "topic_id", SortKey.POSTED_ON_DESC)
+        sql = str(query.statement)
+        assert "post.topic_id = " in sql
+        assert "ORDER BY post.posted_on DESC, post.id DESC" in sql
+
+
+class TestPostsOfDeletedTopic:
+    def test_posts_of_soft_deleted_topic_should_be_hidden(self, db_session):
+        moderator = RequesterData(name="moderator", groups=["moderator"])
+        topic_obj = TopicCRUD.create(
+            db_session, {"title": "Gone", "category": "gone", "created_by": "someone"}
+        )
+        topic_id = topic_obj.id
+        post_id = PostCRUD.create(
+            db_session,
+            {"content": "Orphan", "author": "orphaned", "topic_id": topic_id},
+        ).id
+        assert TopicCRUD.delete_if_permitted(db_session, topic_id, moderator)
+        assert PostCRUD.get_one(db_session, post_id) is None
+        assert PostCRUD.get_many(db_session, topic_id, "topic_id").all() == []
+        assert PostCRUD.get_by_author(db_session, "orphaned", 10) == []
+        assert (
+            PostCRUD.update_if_permitted(
+                db_session, post_id, {"content": "Edited"}, moderator
+            )
+            is None
+        )
+        assert author_post_count(db_session, "orphaned") == 1
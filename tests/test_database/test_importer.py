@@ -0,0 +1,157 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from database.importer import (
+    copy_buffer,
+    import_records,
+    read_records,
+    relaxed_durability,
+)
+from database.models import AuthorPostCount, BaseModel, Post, Topic
+
+
+@pytest.fixture
+def import_connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.sqlite3'}")
+    BaseModel.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def write_ndjson(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    return path
+
+
+class TestReadRecords:
+    def test_read_records_when_csv_should_skip_empty_fields(self, tmp_path):
+        path = tmp_path / "topics.csv"
+        path.write_text(
+            "title,description,category,created_by\n"
+            'Dune,,scifi,reader\n"Multi\nline",About it,novel,reader\n'
+        )
+        assert list(read_records(path)) == [
+            (2, {"title": "Dune", "category": "scifi", "created_by": "reader"}),
+            (
+                4,
+                {
+                    "title": "Multi\nline",
+                    "description": "About it",
+                    "category": "novel",
+                    "created_by": "reader",
+                },
+            ),
+        ]
+
+    def test_read_records_when_ndjson_should_skip_blank_lines(self, tmp_path):
+        path = tmp_path / "posts.ndjson"
+        path.write_text('{"content": "a"}\n\n{"content": "b"}\n')
+        assert list(read_records(path)) == [
+            (1, {"content": "a"}),
+            (3, {"content": "b"}),
+        ]
+
+    def test_read_records_when_unsupported_extension_should_raise(self, tmp_path):
+        with pytest.raises(ValueError):
+            list(read_records(tmp_path / "posts.xml"))
+
+
+class TestImportRecords:
+    def test_import_records_should_keep_ids_and_stamp_changes(
+        self, tmp_path, import_connection
+    ):
+        topics = write_ndjson(
+            tmp_path / "topics.ndjson",
+            [
+                {"id": 7, "title": "Dune", "category": "scifi", "created_by": "a"},
+                {"id": 9, "title": "Emma", "category": "novel", "created_by": "b"},
+            ],
+        )
+        posts = write_ndjson(
+            tmp_path / "posts.ndjson",
+            [
+                {
+                    "topic_id": 9,
+                    "author": "c",
+                    "content": f"Post {i}",
+                    "posted_on": f"2020-01-0{i}T10:00:00",
+                }
+                for i in range(1, 6)
+            ],
+        )
+        with relaxed_durability(import_connection):
+            assert (
+                import_records(import_connection, Topic.__table__, read_records(topics))
+                == 2
+            )
+            assert (
+                import_records(
+                    import_connection, Post.__table__, read_records(posts), chunk_size=2
+                )
+                == 5
+            )
+        imported_posts = import_connection.execute(select(Post).order_by(Post.id)).all()
+        assert import_connection.scalars(select(Topic.id)).all() == [7, 9]
+        assert [post.topic_id for post in imported_posts] == [9] * 5
+        assert imported_posts[0].posted_on == datetime(2020, 1, 1, 10)
+        assert [post.change_seq for post in imported_posts] == [3, 4, 5, 6, 7]
+        assert not any(post.truncated for post in imported_posts)
+        assert import_connection.scalar(select(Topic.created_on)) is not None
+        assert import_connection.scalar(select(AuthorPostCount.post_count)) == 5
+
+    def test_import_records_when_record_invalid_should_raise_with_line(
+        self, tmp_path, import_connection
+    ):
+        topics = write_ndjson(
+            tmp_path / "topics.ndjson",
+            [
+                {"title": "Dune", "category": "scifi", "created_by": "a"},
+                {"title": "No category", "created_by": "a"},
+            ],
+        )
+        with pytest.raises(ValueError, match="topics.ndjson:2"):
+            import_records(
+                import_connection,
+                Topic.__table__,
+                read_records(topics),
+                source=str(topics),
+            )
+
+    def test_import_records_when_ids_partially_provided_should_raise(
+        self, tmp_path, import_connection
+    ):
+        topics = write_ndjson(
+            tmp_path / "topics.ndjson",
+            [
+                {"id": 1, "title": "Dune", "category": "scifi", "created_by": "a"},
+                {"title": "Emma", "category": "novel", "created_by": "b"},
+            ],
+        )
+        with pytest.raises(ValueError, match="either every record or none"):
+            import_records(import_connection, Topic.__table__, read_records(topics))
+
+    def test_relaxed_durability_should_restore_pragmas(self, import_connection):
+        with relaxed_durability(import_connection):
+            assert import_connection.exec_driver_sql("PRAGMA synchronous").scalar() == 0
+        assert import_connection.exec_driver_sql("PRAGMA synchronous").scalar() == 2
+        assert (
+            import_connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+            == "delete"
+        )
+
+
+class TestCopyBuffer:
+    def test_copy_buffer_should_escape_text_format(self):
+        rows = [
+            {
+                "content": "tab\there\nback\\slash",
+                "deleted_at": None,
+                "truncated": False,
+            }
+        ]
+        buffer = copy_buffer(rows, ["content", "deleted_at", "truncated"])
+        assert buffer.read() == "tab\\there\\nback\\\\slash\t\\N\tf\n"
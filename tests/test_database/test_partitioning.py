@@ -0,0 +1,38 @@
+from datetime import date
+
+import pytest
+
+from database.partitioning import HASH, RANGE, partition_ddl
+
+
+class TestPartitionDDL:
+    def test_partition_ddl_when_hash_strategy_should_create_one_table_per_remainder(
+        self,
+    ):
+        statements = partition_ddl(HASH, partitions=4)
+        assert "PARTITION BY HASH (topic_id)" in statements[1]
+        assert "ADD PRIMARY KEY (id, topic_id)" in statements[2]
+        assert [s for s in statements if "MODULUS 4" in s] == [
+            f'CREATE TABLE "post_p{i}" PARTITION OF "post" '
+            f"FOR VALUES WITH (MODULUS 4, REMAINDER {i})"
+            for i in range(4)
+        ]
+
+    def test_partition_ddl_when_range_strategy_should_create_monthly_tables(self):
+        statements = partition_ddl(RANGE, start=date(2024, 11, 1), months=3)
+        assert "PARTITION BY RANGE (posted_on)" in statements[1]
+        assert (
+            'CREATE TABLE "post_2024_12" PARTITION OF "post" '
+            "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')" in statements
+        )
+        assert 'CREATE TABLE "post_default" PARTITION OF "post" DEFAULT' in statements
+
+    def test_partition_ddl_should_drop_referencing_foreign_keys_first(self):
+        statements = partition_ddl(
+            HASH, referencing_foreign_keys=[("post_revision", "fk_post")]
+        )
+        assert statements[0] == 'ALTER TABLE "post_revision" DROP CONSTRAINT "fk_post"'
+
+    def test_partition_ddl_when_unknown_strategy_should_raise(self):
+        with pytest.raises(ValueError):
+            partition_ddl("list")
@@ -0,0 +1,33 @@
+import zlib
+
+import pytest
+
+from database import post_bodies
+from database.post_bodies import compress_body, decompress_body, split_body
+
+CONTENT = "A rather long post body, repeated to be worth compressing. " * 50
+
+
+class TestPostBodies:
+    def test_decompress_body_should_return_compressed_content(self):
+        assert decompress_body(compress_body(CONTENT)) == CONTENT
+
+    def test_decompress_body_when_zlib_compressed_should_return_content(self):
+        assert decompress_body(zlib.compress(CONTENT.encode())) == CONTENT
+
+    def test_compress_body_when_zstandard_missing_should_fall_back_to_zlib(
+        self, monkeypatch
+    ):
+        monkeypatch.setattr(post_bodies, "zstandard", None)
+        assert zlib.decompress(compress_body(CONTENT)).decode() == CONTENT
+
+    @pytest.mark.parametrize("threshold", [0, len(CONTENT)])
+    def test_split_body_when_under_threshold_or_disabled_should_store_inline(
+        self, threshold
+    ):
+        assert split_body(CONTENT, threshold, 20) == (CONTENT, None)
+
+    def test_split_body_when_over_threshold_should_return_preview_and_body(self):
+        preview, body = split_body(CONTENT, 100, 20)
+        assert preview == CONTENT[:20]
+        assert decompress_body(body) == CONTENT
@@ -0,0 +1,64 @@
+import pytest
+
+from conf import get_settings
+from database.crud_factory import PostCRUD, TopicCRUD
+from database.models import Post, Topic
+from database.post_counts import author_post_count, rebuild_post_counts
+from database.validation_schemas import PostCreateValidatedData
+from datastructures import RequesterData
+from workers import purge_deleted_records
+
+MODERATOR = RequesterData(name="moderator", groups=["moderator"])
+
+
+@pytest.fixture
+def topic_id(db_session) -> int:
+    topic_obj = Topic(title="Counted", category="count", created_by="counter")
+    db_session.add(topic_obj)
+    db_session.commit()
+    return topic_obj.id
+
+
+def create_posts(db_session, topic_id: int, author: str, n: int) -> list:
+    return [
+        PostCRUD.create(
+            db_session,
+            PostCreateValidatedData(
+                content="Counted", author=author, topic_id=topic_id
+            ),
+        ).id
+        for _ in range(n)
+    ]
+
+
+class TestAuthorPostCounts:
+    def test_create_and_delete_should_maintain_count(self, db_session, topic_id):
+        post_ids = create_posts(db_session, topic_id, "writer", 3)
+        PostCRUD.delete_if_permitted(db_session, post_ids[0], MODERATOR)
+        PostCRUD.delete(db_session, PostCRUD.get_one(db_session, post_ids[1]))
+        assert author_post_count(db_session, "writer") == 1
+
+    def test_purge_of_deleted_topic_should_uncount_its_live_posts(
+        self, db_session, topic_id, no_tombstone_retention
+    ):
+        post_ids = create_posts(db_session, topic_id, "purged", 3)
+        PostCRUD.delete_if_permitted(db_session, post_ids[0], MODERATOR)
+        TopicCRUD.delete_if_permitted(db_session, topic_id, MODERATOR)
+        assert author_post_count(db_session, "purged") == 2
+        purge_deleted_records(batch_size=10, session_factory=lambda: db_session)
+        assert author_post_count(db_session, "purged") == 0
+
+    def test_hard_delete_of_topic_should_uncount_its_posts(
+        self, db_session, topic_id, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "SOFT_DELETE", False)
+        create_posts(db_session, topic_id, "hard", 2)
+        TopicCRUD.delete_if_permitted(db_session, topic_id, MODERATOR)
+        assert author_post_count(db_session, "hard") == 0
+
+    def test_rebuild_post_counts_should_count_live_posts(self, db_session, topic_id):
+        db_session.add(Post(content="Inserted", author="rebuilt", topic_id=topic_id))
+        db_session.commit()
+        assert author_post_count(db_session, "rebuilt") == 0
+        rebuild_post_counts(db_session)
+        assert author_post_count(db_session, "rebuilt") == 1
@@ -0,0 +1,20 @@
+from database.revisions import decode_revision, encode_revision, replay_revisions
+
+
+class TestRevisions:
+    def test_decode_revision_should_return_previous_content(self):
+        previous, current = "Hello world", "Hello brave new world"
+        assert decode_revision(encode_revision(previous, current), current) == previous
+
+    def test_encode_revision_when_small_edit_should_be_smaller_than_content(self):
+        previous = "The quick brown fox jumps over the lazy dog. " * 20
+        current = previous + "Edited."
+        assert len(encode_revision(previous, current)) < len(previous) // 10
+
+    def test_replay_revisions_should_decode_chain_from_newest(self):
+        versions = ["first", "first, second", "first, second, third"]
+        deltas = [
+            encode_revision(versions[1], versions[2]),
+            encode_revision(versions[0], versions[1]),
+        ]
+        assert list(replay_revisions(versions[2], deltas)) == versions[1::-1]
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+from database.changes import changes_since
+from database.models import Post, Topic
+from database.post_counts import author_post_count
+from database.upgrade import upgrade_ddl, upgrade_schema
+
+OLD_SCHEMA = (
+    "CREATE TABLE topic (id INTEGER PRIMARY KEY, title VARCHAR(50) NOT NULL, "
+    "description VARCHAR(200), category VARCHAR(20) NOT NULL, "
+    "created_by VARCHAR(20) NOT NULL, created_on DATETIME NOT NULL)",
+    "CREATE TABLE post (id INTEGER PRIMARY KEY, content VARCHAR NOT NULL, "
+    "author VARCHAR(20) NOT NULL, posted_on DATETIME NOT NULL, "
+    "topic_id INTEGER NOT NULL REFERENCES topic (id))",
+    "INSERT INTO topic VALUES (1, 'Old', NULL, 'old', 'elder', '2020-01-01')",
+    "INSERT INTO post VALUES (1, 'Old', 'elder', '2020-01-01', 1)",
+    "INSERT INTO post VALUES (2, 'Older', 'elder', '2020-01-02', 1)",
+)
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite3'}")
+    with engine.begin() as connection:
+        for statement in OLD_SCHEMA:
+            connection.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+class TestUpgrade:
+    def test_upgrade_schema_should_add_columns_and_keep_records(self, old_engine):
+        with old_engine.connect() as connection:
+            statements = upgrade_schema(connection, chunk_size=1)
+            assert any("ADD COLUMN change_xid" in s for s in statements)
+            assert upgrade_ddl(connection) == []
+            assert "archived_at" in {
+                column["name"] for column in inspect(connection).get_columns("topic")
+            }
+        with Session(old_engine) as db:
+            posts = db.scalars(select(Post).order_by(Post.id)).all()
+            assert [post.deleted_at for post in posts] == [None, None]
+            assert [post.truncated for post in posts] == [False, False]
+            assert author_post_count(db, "elder") == 2
+            changes = changes_since(db, "0.0", 10)
+            assert [topic.id for topic in changes.topics] == [1]
+            assert [post.id for post in changes.posts] == [1, 2]
+            assert db.get(Topic, 1).title == "Old"
+
+    def test_upgrade_schema_when_up_to_date_should_do_nothing(self, old_engine):
+        with old_engine.connect() as connection:
+            upgrade_schema(connection)
+            assert upgrade_schema(connection) == []
@@ -0,0 +1,16 @@
+from database.validation_schemas import from_request
+from datastructures import PostData, TopicUpdateData
+
+
+class TestFromRequest:
+    def test_from_request_should_merge_server_fields(self):
+        post_data = PostData(content="Hello")
+        assert from_request(post_data, author="reader", topic_id=1) == {
+            "content": "Hello",
+            "author": "reader",
+            "topic_id": 1,
+        }
+
+    def test_from_request_should_leave_out_unset_fields(self):
+        topic_data = TopicUpdateData(title="New title")
+        assert from_request(topic_data) == {"title": "New title"}
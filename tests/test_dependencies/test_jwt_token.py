@@ -0,0 +1,93 @@
+import json
+
+import jwt
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm  # noqa: E402
+
+from datastructures import Token  # noqa: E402
+from dependencies import JWTToken  # noqa: E402
+from exceptions import JWTTokenInvalidException  # noqa: E402
+from jwks import JWKSKeySet  # noqa: E402
+
+PAYLOAD = {"name": "test_basic_user", "groups": ["basic"]}
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope="module")
+def ec_key():
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+def write_jwks(path, **keys) -> None:
+    jwk_list = []
+    for kid, key in keys.items():
+        algorithm = RSAAlgorithm if isinstance(key, rsa.RSAPrivateKey) else ECAlgorithm
+        jwk = algorithm.to_jwk(key.public_key(), as_dict=True)
+        jwk_list.append(jwk | {"kid": kid, "use": "sig"})
+    path.write_text(json.dumps({"keys": jwk_list}))
+
+
+@pytest.fixture
+def jwks_path(tmp_path, rsa_key, ec_key):
+    path = tmp_path / "jwks.json"
+    write_jwks(path, rsa_1=rsa_key, ec_1=ec_key)
+    return path
+
+
+@pytest.fixture
+def jwt_token(jwks_path) -> JWTToken:
+    token = JWTToken()
+    token.key_set = JWKSKeySet(str(jwks_path), min_reload_interval=0)
+    return token
+
+
+class TestJWTTokenDecode:
+    def test_decode_when_token_signed_with_shared_secret_should_return_requester_data(
+        self, jwt_token
+    ):
+        bearer = jwt.encode(PAYLOAD, "test_secret", algorithm="HS256")
+        requester_data = jwt_token.decode(Token(bearer=bearer))
+        assert requester_data.name == PAYLOAD["name"]
+
+    @pytest.mark.parametrize("kid, algorithm", [["rsa_1", "RS256"], ["ec_1", "ES256"]])
+    def test_decode_when_token_signed_with_jwks_key_should_return_requester_data(
+        self, jwt_token, rsa_key, ec_key, kid, algorithm
+    ):
+        key = rsa_key if kid == "rsa_1" else ec_key
+        bearer = jwt.encode(PAYLOAD, key, algorithm=algorithm, headers={"kid": kid})
+        requester_data = jwt_token.decode(Token(bearer=bearer))
+        assert requester_data.groups == PAYLOAD["groups"]
+
+    def test_decode_when_keys_rotated_should_reload_key_set(
+        self, jwt_token, jwks_path, rsa_key
+    ):
+        jwt_token.key_set.load()
+        new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        write_jwks(jwks_path, rsa_1=rsa_key, rsa_2=new_key)
+        bearer = jwt.encode(
+            PAYLOAD, new_key, algorithm="RS256", headers={"kid": "rsa_2"}
+        )
+        assert jwt_token.decode(Token(bearer=bearer)).name == PAYLOAD["name"]
+
+    @pytest.mark.parametrize(
+        "kid, algorithm", [["unknown", "RS256"], ["ec_1", "RS256"]]
+    )
+    def test_decode_when_key_does_not_match_should_raise(
+        self, jwt_token, rsa_key, kid, algorithm
+    ):
+        bearer = jwt.encode(PAYLOAD, rsa_key, algorithm=algorithm, headers={"kid": kid})
+        with pytest.raises(JWTTokenInvalidException):
+            jwt_token.decode(Token(bearer=bearer))
+
+    def test_decode_when_token_expired_should_raise(self, jwt_token):
+        bearer = jwt.encode(PAYLOAD | {"exp": 0}, "test_secret", algorithm="HS256")
+        with pytest.raises(JWTTokenInvalidException):
+            jwt_token.decode(Token(bearer=bearer))
@@ -0,0 +1,97 @@
+import pytest
+
+from datastructures import PostData
+from exceptions import IdempotencyKeyConflictException, IdempotencyKeyMismatchException
+from idempotency import REPLAYED_HEADER, IdempotencyStore, IdempotentRequest
+
+SCOPE = ("user", "POST", "/api/forum/topics/", "key")
+PAYLOAD = PostData(content="Retried")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock) -> IdempotencyStore:
+    return IdempotencyStore(ttl=60, max_keys=2, max_bytes=1 << 20, clock=clock)
+
+
+class TestIdempotencyStore:
+    def test_begin_when_completed_should_replay_response(self, store):
+        assert store.begin(SCOPE, "fingerprint") is None
+        store.complete(SCOPE, b'{"id": 1}', 200)
+        response = store.begin(SCOPE, "fingerprint")
+        assert response.body == b'{"id": 1}'
+        assert response.headers[REPLAYED_HEADER] == "true"
+
+    def test_begin_when_in_progress_should_raise_conflict(self, store):
+        store.begin(SCOPE, "fingerprint")
+        with pytest.raises(IdempotencyKeyConflictException):
+            store.begin(SCOPE, "fingerprint")
+
+    def test_begin_when_payload_differs_should_raise_mismatch(self, store):
+        store.begin(SCOPE, "fingerprint")
+        store.complete(SCOPE, b"{}", 200)
+        with pytest.raises(IdempotencyKeyMismatchException):
+            store.begin(SCOPE, "other fingerprint")
+
+    def test_begin_when_aborted_should_execute_again(self, store):
+        store.begin(SCOPE, "fingerprint")
+        store.abort(SCOPE)
+        assert store.begin(SCOPE, "fingerprint") is None
+
+    def test_abort_when_completed_should_keep_response(self, store):
+        store.begin(SCOPE, "fingerprint")
+        store.complete(SCOPE, b"{}", 200)
+        store.abort(SCOPE)
+        assert store.begin(SCOPE, "fingerprint") is not None
+
+    def test_begin_when_ttl_elapsed_should_execute_again(self, store, clock):
+        store.begin(SCOPE, "fingerprint")
+        store.complete(SCOPE, b"{}", 200)
+        clock.now = 61
+        assert store.begin(SCOPE, "fingerprint") is None
+
+    def test_begin_when_max_keys_exceeded_should_forget_oldest(self, store):
+        for key in ("a", "b", "c"):
+            scope = SCOPE[:-1] + (key,)
+            store.begin(scope, "fingerprint")
+            store.complete(scope, b"{}", 200)
+        assert store.begin(SCOPE[:-1] + ("a",), "fingerprint") is None
+        assert store.begin(SCOPE[:-1] + ("c",), "fingerprint") is not None
+
+    def test_complete_when_max_bytes_exceeded_should_forget_oldest(self, clock):
+        store = IdempotencyStore(ttl=60, max_keys=10, max_bytes=1000, clock=clock)
+        for key in ("a", "b"):
+            scope = SCOPE[:-1] + (key,)
+            store.begin(scope, "fingerprint")
+            store.complete(scope, b"x" * 400, 200)
+        assert store.stats()["keys"] == 1
+        assert store.stats()["size_bytes"] <= 1000
+        assert store.begin(SCOPE[:-1] + ("a",), "fingerprint") is None
+
+    def test_release_when_retry_conflicts_should_keep_first_reservation(self, store):
+        first = IdempotentRequest(store, SCOPE[-1], *SCOPE[1:3])
+        assert first.begin(SCOPE[0], PAYLOAD) is None
+        for payload in (PAYLOAD, PostData(content="Other")):
+            retry = IdempotentRequest(store, SCOPE[-1], *SCOPE[1:3])
+            with pytest.raises(
+                (IdempotencyKeyConflictException, IdempotencyKeyMismatchException)
+            ):
+                retry.begin(SCOPE[0], payload)
+            retry.release()
+        assert store.stats()["keys"] == 1
+        with pytest.raises(IdempotencyKeyConflictException):
+            IdempotentRequest(store, SCOPE[-1], *SCOPE[1:3]).begin(SCOPE[0], PAYLOAD)
+        first.complete(PostData, PAYLOAD)
+        assert store.stats()["keys"] == 1
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from exceptions import ServiceOverloadedException
+from limiter import AdaptiveLimiter, Priority
+
+
+def make_limiter(limit=1, queue_size=10, timeout=1.0, **kwargs) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        initial_limit=limit,
+        min_limit=1,
+        max_limit=kwargs.pop("max_limit", 4),
+        target_latency=kwargs.pop("target_latency", 0.25),
+        queue_size=queue_size,
+        queue_timeouts={Priority.BROWSE: timeout, Priority.WRITE: timeout},
+        **kwargs,
+    )
+
+
+class TestAdaptiveLimiter:
+    async def test_acquire_when_under_limit_should_admit_immediately(self):
+        limiter = make_limiter(limit=2)
+        await limiter.acquire(Priority.BROWSE)
+        await limiter.acquire(Priority.BROWSE)
+        assert limiter.stats()["in_flight"] == 2
+        assert limiter.stats()["admitted"] == 2
+
+    async def test_acquire_when_at_limit_should_wait_for_release(self):
+        limiter = make_limiter()
+        admitted_at = await limiter.acquire(Priority.BROWSE)
+        waiter = asyncio.ensure_future(limiter.acquire(Priority.BROWSE))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 1
+        limiter.release(admitted_at)
+        await waiter
+        assert limiter.stats()["in_flight"] == 1
+        assert limiter.stats()["queued"] == 0
+
+    async def test_acquire_when_queue_timeout_elapses_should_shed(self):
+        limiter = make_limiter(timeout=0.01)
+        await limiter.acquire(Priority.BROWSE)
+        with pytest.raises(ServiceOverloadedException):
+            await limiter.acquire(Priority.BROWSE)
+        assert limiter.stats()["shed"] == 1
+        assert limiter.stats()["in_flight"] == 1
+
+    async def test_acquire_when_queue_full_should_shed_without_waiting(self):
+        limiter = make_limiter(queue_size=1)
+        await limiter.acquire(Priority.BROWSE)
+        waiter = asyncio.ensure_future(limiter.acquire(Priority.BROWSE))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceOverloadedException):
+            await limiter.acquire(Priority.BROWSE)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    async def test_acquire_when_queue_full_should_evict_lower_priority(self):
+        limiter = make_limiter(queue_size=1)
+        admitted_at = await limiter.acquire(Priority.BROWSE)
+        browse = asyncio.ensure_future(limiter.acquire(Priority.BROWSE))
+        await asyncio.sleep(0)
+        write = asyncio.ensure_future(limiter.acquire(Priority.WRITE))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceOverloadedException):
+            await browse
+        limiter.release(admitted_at)
+        await write
+        assert limiter.stats()["shed"] == 1
+
+    async def test_release_should_wake_higher_priority_first(self):
+        limiter = make_limiter(target_latency=0.0)
+        admitted_at = await limiter.acquire(Priority.BROWSE)
+        browse = asyncio.ensure_future(limiter.acquire(Priority.BROWSE))
+        write = asyncio.ensure_future(limiter.acquire(Priority.WRITE))
+        await asyncio.sleep(0)
+        limiter.release(admitted_at)
+        await write
+        assert not browse.done()
+        browse.cancel()
+        await asyncio.gather(browse, return_exceptions=True)
+
+    async def test_release_when_fast_should_increase_limit(self):
+        limiter = make_limiter(limit=2)
+        limiter.release(await limiter.acquire(Priority.BROWSE))
+        assert limiter.limit == 2.5
+
+    async def test_release_when_slow_should_decrease_limit(self):
+        limiter = make_limiter(limit=4, target_latency=0.0, backoff=0.5)
+        await limiter.acquire(Priority.BROWSE)
+        limiter.release(time.monotonic() - 1)
+        assert limiter.limit == 2.0
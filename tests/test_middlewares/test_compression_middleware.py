@@ -0,0 +1,74 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from middlewares import CompressionMiddleware
+
+
+def build_client(**options) -> AsyncClient:
+    async def large_json(_):
+        return JSONResponse({"content": "x" * 1000})
+
+    async def small_json(_):
+        return JSONResponse({"content": "x"})
+
+    async def streamed(_):
+        return StreamingResponse(
+            iter([b"x" * 1000, b"x" * 1000]), media_type="application/json"
+        )
+
+    app = Starlette(
+        routes=[
+            Route("/large/", large_json),
+            Route("/small/", small_json),
+            Route("/streamed/", streamed),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, **options)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+
+
+class TestCompressionMiddleware:
+    async def test_compression_when_client_accepts_gzip_should_return_gzip_body(self):
+        response = await build_client(encodings=["gzip"]).get(
+            "/large/", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json() == {"content": "x" * 1000}
+
+    @pytest.mark.parametrize(
+        "path, accept_encoding",
+        [
+            ["/small/", "gzip"],
+            ["/large/", "identity"],
+            ["/large/", "gzip;q=0"],
+            ["/streamed/", "gzip"],
+        ],
+    )
+    async def test_compression_when_response_not_eligible_should_return_identity_body(
+        self, path, accept_encoding
+    ):
+        response = await build_client(encodings=["gzip"]).get(
+            path, headers={"Accept-Encoding": accept_encoding}
+        )
+        assert "content-encoding" not in response.headers
+
+    async def test_compression_when_content_type_not_listed_should_return_identity_body(
+        self,
+    ):
+        response = await build_client(encodings=["gzip"], content_types=["text/"]).get(
+            "/large/", headers={"Accept-Encoding": "gzip"}
+        )
+        assert "content-encoding" not in response.headers
+
+    async def test_compression_when_codec_unavailable_should_fall_back_to_next_encoding(
+        self,
+    ):
+        client = build_client(encodings=["unknown", "gzip"])
+        response = await client.get(
+            "/large/", headers={"Accept-Encoding": "unknown, gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
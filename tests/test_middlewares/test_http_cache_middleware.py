@@ -0,0 +1,137 @@
+from datetime import datetime
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from conf import CachePolicy, get_settings
+from database.crud_factory import PostCRUD, TopicCRUD
+from datastructures import RequesterData
+from http_cache import http_date, record_cache_tags, tag_response
+from middlewares import HttpCacheMiddleware
+
+LAST_MODIFIED = datetime(2025, 1, 1, 10, 0, 0, 500000)
+
+
+class RecordingPurger:
+    def __init__(self):
+        self.purged = []
+
+    async def purge(self, keys) -> None:
+        self.purged.append(set(keys))
+
+
+def build_client(purger=None) -> AsyncClient:
+    app = FastAPI()
+
+    @app.get("/topics/{topic_id}/")
+    async def topic(topic_id: int) -> dict:
+        tag_response(f"topic-{topic_id}", last_modified=LAST_MODIFIED)
+        return {"id": topic_id}
+
+    @app.get("/drafts/")
+    async def drafts() -> list:
+        tag_response("drafts")
+        return []
+
+    @app.get("/uncached/")
+    async def uncached() -> list:
+        return []
+
+    @app.post("/topics/{topic_id}/posts/")
+    async def post_create(topic_id: int) -> dict:
+        tag_response(f"topic-{topic_id}", "post-1")
+        return {"id": 1}
+
+    app.add_middleware(
+        HttpCacheMiddleware,
+        policies={
+            "GET /topics/{topic_id}/": CachePolicy(
+                max_age=30, stale_while_revalidate=60
+            ),
+            "GET /drafts/": CachePolicy(max_age=5, public=False),
+        },
+        purger=purger,
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+
+
+class TestHttpCacheMiddleware:
+    async def test_http_cache_when_public_policy_should_add_cache_headers(self):
+        response = await build_client().get("/topics/3/")
+        assert response.json() == {"id": 3}
+        assert (
+            response.headers["cache-control"]
+            == "public, max-age=30, stale-while-revalidate=60"
+        )
+        assert response.headers["vary"] == "token"
+        assert response.headers["last-modified"] == http_date(LAST_MODIFIED)
+        assert response.headers["surrogate-key"] == "topic-3"
+
+    async def test_http_cache_when_private_policy_should_not_allow_shared_caches(
+        self,
+    ):
+        response = await build_client().get("/drafts/")
+        assert response.headers["cache-control"] == "private, max-age=5"
+        assert "last-modified" not in response.headers
+
+    async def test_http_cache_when_route_without_policy_should_add_no_header(self):
+        response = await build_client().get("/uncached/")
+        assert "cache-control" not in response.headers
+        assert "vary" not in response.headers
+
+    async def test_http_cache_when_not_modified_since_should_return_304(self):
+        client = build_client()
+        last_modified = (await client.get("/topics/3/")).headers["last-modified"]
+        response = await client.get(
+            "/topics/3/", headers={"If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["last-modified"] == last_modified
+        assert "content-length" not in response.headers
+
+    async def test_http_cache_when_modified_since_should_return_body(self):
+        response = await build_client().get(
+            "/topics/3/",
+            headers={"If-Modified-Since": "Tue, 31 Dec 2024 10:00:00 GMT"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"id": 3}
+
+    async def test_http_cache_after_write_should_purge_tagged_keys(self):
+        purger = RecordingPurger()
+        response = await build_client(purger).post("/topics/3/posts/")
+        assert response.status_code == 200
+        assert "cache-control" not in response.headers
+        assert purger.purged == [{"topic-3", "post-1"}]
+
+
+class TestSurrogateKeys:
+    def test_post_create_should_tag_post_topic_and_author_keys(self, db_session):
+        topic_obj = TopicCRUD.create(
+            db_session, {"title": "Tagged", "category": "tag", "created_by": "tagger"}
+        )
+        with record_cache_tags() as cache_tags:
+            post_obj = PostCRUD.create(
+                db_session,
+                {"content": "Tagged", "author": "tagger", "topic_id": topic_obj.id},
+            )
+        assert cache_tags.keys == {
+            f"post-{post_obj.id}",
+            f"topic-{topic_obj.id}",
+            "user-tagger",
+        }
+
+    def test_topic_hard_delete_should_tag_topic_and_listing_keys(
+        self, db_session, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "SOFT_DELETE", False)
+        topic_obj = TopicCRUD.create(
+            db_session, {"title": "Tagged", "category": "tag", "created_by": "tagger"}
+        )
+        topic_id = topic_obj.id
+        with record_cache_tags() as cache_tags:
+            assert TopicCRUD.delete_if_permitted(
+                db_session, topic_id, RequesterData(name="mod", groups=["moderator"])
+            )
+        assert cache_tags.keys == {"topics", f"topic-{topic_id}"}
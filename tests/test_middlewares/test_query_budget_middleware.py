@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from exceptions import QueryBudgetExceededException
+from main import create_exception_handler
+from middlewares import QueryBudgetMiddleware
+
+
+def build_client(**options) -> AsyncClient:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    app = FastAPI()
+
+    @app.get("/queries/{n}/")
+    async def queries(n: int) -> int:
+        with engine.connect() as connection:
+            for _ in range(n):
+                connection.execute(text("SELECT 1"))
+        return n
+
+    app.add_middleware(QueryBudgetMiddleware, **options)
+    app.add_exception_handler(QueryBudgetExceededException, create_exception_handler())
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+
+
+class TestQueryBudgetMiddleware:
+    async def test_query_budget_when_within_budget_should_not_log(self, caplog):
+        with caplog.at_level(logging.WARNING, logger="middlewares"):
+            response = await build_client(default_budget=3).get("/queries/3/")
+        assert response.status_code == 200
+        assert not caplog.records
+
+    async def test_query_budget_when_exceeded_should_log_statements(self, caplog):
+        with caplog.at_level(logging.WARNING, logger="middlewares"):
+            response = await build_client(default_budget=2).get("/queries/3/")
+        assert response.status_code == 200
+        assert "GET /queries/{n}/ executed 3 SQL statements" in caplog.text
+        assert "SELECT 1" in caplog.text
+
+    @pytest.mark.parametrize(
+        "budgets, status_code",
+        [
+            [{"GET /queries/{n}/": 2}, 500],
+            [{"GET /queries/{n}/": 5}, 200],
+        ],
+    )
+    async def test_query_budget_when_strict_should_fail_requests_over_route_budget(
+        self, budgets, status_code
+    ):
+        response = await build_client(
+            default_budget=10, budgets=budgets, strict=True
+        ).get("/queries/3/")
+        assert response.status_code == status_code
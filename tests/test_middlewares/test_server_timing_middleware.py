@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from middlewares import ServerTimingMiddleware
+from profiler import TimedRoute, timed
+
+
+def build_client() -> AsyncClient:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    router = APIRouter(route_class=TimedRoute)
+
+    def authenticate() -> str:
+        with timed("auth"):
+            return "user"
+
+    @router.get("/timed/")
+    async def timed_route(user: str = Depends(authenticate)) -> dict:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return {"user": user}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ServerTimingMiddleware)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+
+
+class TestServerTimingMiddleware:
+    async def test_server_timing_should_report_each_phase(self):
+        response = await build_client().get("/timed/")
+        metrics = dict(
+            metric.strip().split(";dur=")
+            for metric in response.headers["server-timing"].split(",")
+        )
+        assert set(metrics) == {"auth", "db", "handler", "serialize", "total"}
+        assert all(float(duration) >= 0 for duration in metrics.values())
+        assert float(metrics["total"]) >= float(metrics["handler"])
+        assert response.json() == {"user": "user"}
@@ -0,0 +1,130 @@
+from collections import defaultdict
+
+import pytest
+from sqlalchemy import select
+
+import outbox
+from database.crud_factory import PostCRUD, TopicCRUD
+from database.models import OutboxTask
+from datastructures import RequesterData
+from outbox import (
+    POST_CREATED,
+    POST_DELETED,
+    TOPIC_CREATED,
+    OutboxConsumer,
+    enqueue,
+    handles,
+)
+
+MODERATOR = RequesterData(name="moderator", groups=["moderator"])
+
+
+@pytest.fixture
+def handled(monkeypatch) -> list:
+    monkeypatch.setattr(outbox, "_handlers", defaultdict(list))
+    handled = []
+
+    @handles(POST_CREATED, POST_DELETED)
+    def record(payload: dict) -> None:
+        handled.append(payload)
+
+    return handled
+
+
+@pytest.fixture
+def topic_id(db_session) -> int:
+    return TopicCRUD.create(
+        db_session, {"title": "Queued", "category": "queue", "created_by": "queuer"}
+    ).id
+
+
+def create_post(db_session, topic_id: int) -> int:
+    return PostCRUD.create(
+        db_session, {"content": "Queued", "author": "queuer", "topic_id": topic_id}
+    ).id
+
+
+def tasks(db_session) -> list:
+    return db_session.scalars(select(OutboxTask).order_by(OutboxTask.id)).all()
+
+
+class TestOutbox:
+    def test_write_should_enqueue_task_only_when_handled(
+        self, db_session, topic_id, handled
+    ):
+        post_id = create_post(db_session, topic_id)
+        queued = tasks(db_session)
+        assert [(task.kind, task.payload) for task in queued] == [
+            (
+                POST_CREATED,
+                {"id": post_id, "topic_id": topic_id, "author": "queuer"},
+            )
+        ]
+        consumer = OutboxConsumer(batch_size=10, max_attempts=3, retry_base=0.0)
+        assert consumer.run(lambda: db_session) == 1
+
+    def test_consumer_should_run_handlers_by_batches_and_acknowledge(
+        self, db_session, topic_id, handled
+    ):
+        post_ids = [create_post(db_session, topic_id) for _ in range(3)]
+        PostCRUD.delete_if_permitted(db_session, post_ids[0], MODERATOR)
+        consumer = OutboxConsumer(batch_size=2, max_attempts=3, retry_base=0.0)
+
+        assert consumer.run(lambda: db_session) == 4
+
+        assert [payload["id"] for payload in handled] == post_ids + post_ids[:1]
+        assert not tasks(db_session)
+        assert consumer.stats() == {
+            "processed": 4,
+            "retried": 0,
+            "dead": 0,
+            "pending": 0,
+            "lag_seconds": 0.0,
+        }
+
+    def test_consumer_when_handler_fails_should_retry_then_give_up(
+        self, db_session, topic_id, monkeypatch
+    ):
+        monkeypatch.setattr(outbox, "_handlers", defaultdict(list))
+
+        @handles(POST_CREATED)
+        def fail(payload: dict) -> None:
+            raise RuntimeError("search index unavailable")
+
+        create_post(db_session, topic_id)
+        consumer = OutboxConsumer(batch_size=10, max_attempts=3, retry_base=60.0)
+
+        consumer.run(lambda: db_session)
+        (task,) = tasks(db_session)
+        assert task.attempts == 1
+        assert task.dead_at is None
+        assert task.available_at > task.created_on
+        assert "search index unavailable" in task.last_error
+
+        consumer.retry_base = 0.0
+        task.available_at = task.created_on
+        db_session.commit()
+        consumer.run(lambda: db_session)
+        consumer.run(lambda: db_session)
+
+        (task,) = tasks(db_session)
+        assert task.attempts == 3
+        assert task.dead_at is not None
+        assert consumer.stats()["retried"] == 2
+        assert consumer.stats()["dead"] == 1
+        assert consumer.stats()["pending"] == 0
+
+    def test_consumer_should_leave_tasks_without_handlers_unclaimed(
+        self, db_session, topic_id, handled
+    ):
+        enqueue(db_session, TOPIC_CREATED, {"id": topic_id})
+        post_id = create_post(db_session, topic_id)
+        consumer = OutboxConsumer(batch_size=10, max_attempts=3, retry_base=0.0)
+
+        assert consumer.run(lambda: db_session) == 1
+
+        assert [payload["id"] for payload in handled] == [post_id]
+        (task,) = [task for task in tasks(db_session) if task.dead_at is None]
+        assert task.kind == TOPIC_CREATED
+        assert task.attempts == 0
+        assert consumer.stats()["pending"] == 1
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy.dialects import sqlite
+
+from database.models import Post
+from datastructures import RequesterData
+from exceptions import NoPermissionException
+from permissions import Role, require_role, write_criteria
+
+
+class TestRequesterDataRoles:
+    @pytest.mark.parametrize(
+        "groups, roles",
+        [
+            [["basic"], Role.BASIC],
+            [["moderator"], Role.MODERATOR],
+            [["basic", "moderator"], Role.BASIC | Role.MODERATOR],
+            [["unknown"], Role.NONE],
+        ],
+    )
+    def test_roles_should_be_computed_from_groups(self, groups, roles):
+        assert RequesterData(name="user", groups=groups).roles == roles
+
+    def test_require_role_when_role_missing_should_raise(self):
+        with pytest.raises(NoPermissionException):
+            require_role(RequesterData(name="user", groups=["basic"]), Role.MODERATOR)
+
+
+class TestWriteCriteria:
+    @pytest.mark.parametrize(
+        "groups, is_moderator", [[["basic"], False], [["moderator"], True]]
+    )
+    def test_write_criteria_should_check_ownership_or_moderator_role(
+        self, groups, is_moderator
+    ):
+        criteria = write_criteria(
+            Post.author, RequesterData(name="user", groups=groups)
+        ).compile(dialect=sqlite.dialect())
+        assert str(criteria) == "post.author = ? OR ? = 1"
+        assert list(criteria.params.values()) == ["user", is_moderator]
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from profiler import (
+    ServerTiming,
+    StackSampler,
+    record_server_timing,
+    sample_stacks,
+    timed,
+)
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def run_busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,))
+    thread.start()
+    return stop, thread
+
+
+class TestStackSampling:
+    def test_sample_stacks_should_collapse_stacks_of_other_threads(self):
+        stop, thread = run_busy_thread()
+        try:
+            samples = sample_stacks(duration=0.05, interval=0.001)
+        finally:
+            stop.set()
+            thread.join()
+        busy_stacks = [stack for stack in samples if stack.endswith(":busy_loop")]
+        assert busy_stacks
+        assert all(";" in stack for stack in busy_stacks)
+        assert not any(":sample_stacks" in stack for stack in samples)
+
+    async def test_profile_should_return_collapsed_stack_lines(self):
+        stop, thread = run_busy_thread()
+        try:
+            collapsed = await StackSampler(max_duration=1).profile(0.05, 0.001)
+        finally:
+            stop.set()
+            thread.join()
+        for line in collapsed.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert stack and int(count) > 0
+
+
+class TestServerTiming:
+    def test_timed_when_not_recording_should_do_nothing(self):
+        with timed("auth"):
+            pass
+
+    def test_timed_should_accumulate_phase_durations(self):
+        with record_server_timing() as server_timing:
+            for _ in range(2):
+                with timed("auth"):
+                    time.sleep(0.01)
+        assert server_timing.durations["auth"] >= 20
+
+    def test_header_should_render_durations_in_milliseconds(self):
+        server_timing = ServerTiming()
+        server_timing.add("auth", 0.4)
+        server_timing.add("db", 2.125)
+        assert server_timing.header() == "auth;dur=0.40, db;dur=2.12"
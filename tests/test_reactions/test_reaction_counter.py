@@ -0,0 +1,172 @@
+import pytest
+from sqlalchemy import select
+
+from database.models import Post, PostReaction, PostReactionCount, Topic
+from database.reactions import read_reaction_drift, rebuild_reaction_counts
+from reactions import ReactionCounter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def post_ids(db_session) -> list:
+    topic_obj = Topic(title="Reacted", category="react", created_by="reactor")
+    topic_obj.posts = [Post(content="Reacted", author="reactor") for _ in range(2)]
+    db_session.add(topic_obj)
+    db_session.commit()
+    return [post.id for post in topic_obj.posts]
+
+
+def stored_counts(db_session, post_id: int) -> dict:
+    return dict(
+        db_session.execute(
+            select(PostReactionCount.kind, PostReactionCount.count).where(
+                PostReactionCount.post_id == post_id
+            )
+        ).all()
+    )
+
+
+class TestReactionCounter:
+    def test_flush_should_add_counted_reactions_in_one_batch(
+        self, db_session, post_ids
+    ):
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        for _ in range(1000):
+            counter.add(post_ids[0], "like", 1)
+        counter.add(post_ids[0], "like", -1)
+        counter.add(post_ids[1], "sad", 1)
+        assert counter.flush(lambda: db_session) == 2
+        counter.add(post_ids[0], "like", 1)
+        assert counter.flush(lambda: db_session) == 1
+        assert stored_counts(db_session, post_ids[0]) == {"like": 1000}
+        assert stored_counts(db_session, post_ids[1]) == {"sad": 1}
+        assert counter.stats() | {"cached_posts": 0} == {
+            "flushes": 2,
+            "flushed": 3,
+            "pending": 0,
+            "cached_posts": 0,
+            "drifted_counts": 0,
+        }
+
+    def test_counts_should_add_unflushed_reactions_to_cached_counts(
+        self, db_session, post_ids
+    ):
+        clock = FakeClock()
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10, clock=clock)
+        counter.add(post_ids[0], "like", 1)
+        counter.flush(lambda: db_session)
+        assert counter.counts(db_session, post_ids) == {
+            post_ids[0]: {"like": 1},
+            post_ids[1]: {},
+        }
+        counter.add(post_ids[0], "love", 1)
+        assert counter.counts(db_session, [post_ids[0]]) == {
+            post_ids[0]: {"like": 1, "love": 1}
+        }
+        counter.flush(lambda: db_session)
+        assert counter.counts(db_session, [post_ids[0]]) == {
+            post_ids[0]: {"like": 1, "love": 1}
+        }
+
+    def test_counts_when_cache_expired_should_read_other_workers_flushes(
+        self, db_session, post_ids
+    ):
+        clock = FakeClock()
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10, clock=clock)
+        other_worker = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        assert counter.counts(db_session, [post_ids[0]]) == {post_ids[0]: {}}
+        other_worker.add(post_ids[0], "like", 1)
+        other_worker.flush(lambda: db_session)
+        assert counter.counts(db_session, [post_ids[0]]) == {post_ids[0]: {}}
+        clock.now = 6.0
+        assert counter.counts(db_session, [post_ids[0]]) == {post_ids[0]: {"like": 1}}
+
+    def test_flush_when_failing_should_keep_reactions_for_next_flush(
+        self, db_session, post_ids
+    ):
+        def failing_session():
+            raise RuntimeError("database unavailable")
+
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        counter.add(post_ids[0], "like", 1)
+        with pytest.raises(RuntimeError):
+            counter.flush(failing_session)
+        assert counter.stats()["pending"] == 1
+        assert counter.flush(lambda: db_session) == 1
+        assert stored_counts(db_session, post_ids[0]) == {"like": 1}
+
+    def test_flush_when_post_removed_should_drop_its_reactions(
+        self, db_session, post_ids
+    ):
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        removed_id = max(post_ids) + 1000
+        counter.add(post_ids[0], "like", 1)
+        counter.add(removed_id, "like", 1)
+        assert counter.flush(lambda: db_session) == 2
+        assert counter.stats()["pending"] == 0
+        assert stored_counts(db_session, post_ids[0]) == {"like": 1}
+        assert stored_counts(db_session, removed_id) == {}
+
+    def test_flush_when_nothing_counted_should_not_open_session(self, post_ids):
+        def failing_session():
+            raise RuntimeError("database unavailable")
+
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        counter.add(post_ids[0], "like", 1)
+        counter.add(post_ids[0], "like", -1)
+        assert counter.flush(failing_session) == 0
+        assert counter.stats()["flushes"] == 0
+
+    def test_rebuild_reaction_counts_should_count_reactions(self, db_session, post_ids):
+        db_session.add_all(
+            PostReaction(post_id=post_ids[1], reacted_by=name, kind="love")
+            for name in ("first", "second")
+        )
+        db_session.add(PostReactionCount(post_id=post_ids[1], kind="sad", count=3))
+        db_session.commit()
+        rebuild_reaction_counts(db_session)
+        assert stored_counts(db_session, post_ids[1]) == {"love": 2}
+
+
+class TestReactionDrift:
+    def test_audit_when_reactions_lost_should_report_drift_until_rebuilt(
+        self, db_session, post_ids
+    ):
+        db_session.add_all(
+            PostReaction(post_id=post_ids[0], reacted_by=name, kind="like")
+            for name in ("first", "second")
+        )
+        db_session.add(PostReactionCount(post_id=post_ids[1], kind="sad", count=1))
+        db_session.commit()
+        killed_worker = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        killed_worker.add(post_ids[0], "like", 2)
+        killed_worker.add(post_ids[1], "sad", -1)
+        assert read_reaction_drift(db_session) == {
+            (post_ids[0], "like"): 2,
+            (post_ids[1], "sad"): -1,
+        }
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        assert counter.audit(lambda: db_session) == 0
+        assert counter.audit(lambda: db_session) == 2
+        assert counter.stats()["drifted_counts"] == 2
+        rebuild_reaction_counts(db_session)
+        assert read_reaction_drift(db_session) == {}
+        assert counter.audit(lambda: db_session) == 0
+
+    def test_audit_should_flush_counted_reactions_first(self, db_session, post_ids):
+        db_session.add(
+            PostReaction(post_id=post_ids[0], reacted_by="first", kind="wow")
+        )
+        db_session.commit()
+        counter = ReactionCounter(shards=4, ttl=5.0, max_posts=10)
+        counter.add(post_ids[0], "wow", 1)
+        assert counter.audit(lambda: db_session) == 0
+        assert counter.audit(lambda: db_session) == 0
+        assert stored_counts(db_session, post_ids[0]) == {"wow": 1}
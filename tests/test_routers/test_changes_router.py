@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from database.crud_factory import PostCRUD
+from tests.conftest import Users
+
+
+async def current_token(client) -> str:
+    response = await client.get("/changes/", params={"since": "0.0", "limit": 1})
+    token = response.json()["token"]
+    while response.json()["has_more"]:
+        response = await client.get("/changes/", params={"since": token})
+        token = response.json()["token"]
+    return token
+
+
+class TestChanges:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_MODERATOR], indirect=True
+    )
+    async def test_changes_should_return_created_updated_and_deleted_records(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        token = await current_token(async_test_client)
+        topic = (
+            await async_test_client.post(
+                "/topics/", content=json.dumps({"title": "Sync", "category": "sync"})
+            )
+        ).json()
+        posts = [
+            (
+                await async_test_client.post(
+                    f"/topics/{topic['id']}/posts/",
+                    content=json.dumps({"content": f"Post {i}"}),
+                )
+            ).json()
+            for i in range(2)
+        ]
+        await async_test_client.patch(
+            f"/posts/{posts[0]['id']}/", content=json.dumps({"content": "Edited"})
+        )
+        await async_test_client.delete(f"/posts/{posts[1]['id']}/")
+
+        response = await async_test_client.get("/changes/", params={"since": token})
+        changes = response.json()
+        assert response.status_code == 200
+        assert [t["id"] for t in changes["topics"]] == [topic["id"]]
+        assert [(p["id"], p["content"]) for p in changes["posts"]] == [
+            (posts[0]["id"], "Edited")
+        ]
+        assert changes["posts"][0]["topic_id"] == topic["id"]
+        assert changes["deleted_posts"] == [posts[1]["id"]]
+        assert changes["has_more"] is False
+        assert changes["reset"] is False
+
+        response = await async_test_client.get(
+            "/changes/", params={"since": changes["token"]}
+        )
+        assert response.json()["topics"] == response.json()["posts"] == []
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_changes_when_limit_reached_should_page_in_change_order(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        token = await current_token(async_test_client)
+        ids = [
+            (
+                await async_test_client.post(
+                    "/topics/",
+                    content=json.dumps({"title": f"Page {i}", "category": "sync"}),
+                )
+            ).json()["id"]
+            for i in range(3)
+        ]
+        seen = []
+        has_more = True
+        while has_more:
+            changes = (
+                await async_test_client.get(
+                    "/changes/", params={"since": token, "limit": 2}
+                )
+            ).json()
+            seen += [t["id"] for t in changes["topics"]]
+            token, has_more = changes["token"], changes["has_more"]
+        assert seen == ids
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_changes_when_token_older_than_purge_should_require_reset(
+        self, async_test_client, db_session, override_jwt_token, no_tombstone_retention
+    ):
+        token = await current_token(async_test_client)
+        topic_id = (
+            await async_test_client.post(
+                "/topics/", content=json.dumps({"title": "Purged", "category": "sync"})
+            )
+        ).json()["id"]
+        post_id = (
+            await async_test_client.post(
+                f"/topics/{topic_id}/posts/", content=json.dumps({"content": "Gone"})
+            )
+        ).json()["id"]
+        await async_test_client.delete(f"/posts/{post_id}/")
+        PostCRUD.purge(db_session, batch_size=10)
+
+        changes = (
+            await async_test_client.get("/changes/", params={"since": token})
+        ).json()
+        assert changes["reset"] is True
+        assert changes["topics"] == changes["deleted_posts"] == []
+        response = await async_test_client.get(
+            "/changes/", params={"since": changes["token"]}
+        )
+        assert response.json()["reset"] is False
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_changes_when_token_malformed_should_return_422(
+        self, async_test_client, override_jwt_token
+    ):
+        response = await async_test_client.get("/changes/", params={"since": "12"})
+        assert response.status_code == 422
@@ -0,0 +1,40 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from datastructures import RequesterData
+from exceptions import NoPermissionException
+from main import create_exception_handler
+from routers import debug_router, jwt_token
+from tests.conftest import USER_GROUPS, Users
+
+
+@pytest.fixture
+def debug_client(request) -> AsyncClient:
+    app = FastAPI()
+    app.include_router(debug_router)
+    app.add_exception_handler(NoPermissionException, create_exception_handler())
+    app.dependency_overrides[jwt_token.decode] = lambda: RequesterData(
+        name=request.param, groups=USER_GROUPS[request.param]
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+
+
+class TestProfile:
+    @pytest.mark.parametrize("debug_client", [Users.TEST_MODERATOR], indirect=True)
+    async def test_profile_when_requested_by_moderator_should_return_collapsed_stacks(
+        self, debug_client
+    ):
+        response = await debug_client.get(
+            "/debug/profile", params={"seconds": 0.05, "interval_ms": 1}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "profile.folded" in response.headers["content-disposition"]
+
+    @pytest.mark.parametrize("debug_client", [Users.TEST_BASIC_USER], indirect=True)
+    async def test_profile_when_requested_by_basic_user_should_return_403(
+        self, debug_client
+    ):
+        response = await debug_client.get("/debug/profile", params={"seconds": 0.05})
+        assert response.status_code == 403
@@ -0,0 +1,102 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event
+
+from database.db_conf import warm_up_pool
+from health import DatabaseProbe
+from main import app
+from tests.conftest import Users
+
+
+def health_client() -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+
+
+class TestLiveness:
+    async def test_health_should_return_200_without_database(self):
+        async with health_client() as client:
+            response = await client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"alive": True}
+
+
+class TestMetrics:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_MODERATOR], indirect=True
+    )
+    async def test_metrics_should_return_coalescing_cache_and_limiter_counters(
+        self, hot_post_cache, override_jwt_token
+    ):
+        async with health_client() as client:
+            response = await client.get("/metrics")
+        response_json = response.json()
+        assert response.status_code == 200
+        assert set(response_json["coalescing"]["topic_posts"]) == {
+            "executions",
+            "coalesced",
+            "in_flight",
+        }
+        assert "hits" in response_json["hot_post_cache"]
+        assert "size_bytes" in response_json["idempotency"]
+        assert "shed" in response_json["db_limiter"]
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_metrics_when_requested_by_basic_user_should_return_403(
+        self, override_jwt_token
+    ):
+        async with health_client() as client:
+            response = await client.get("/metrics")
+        assert response.status_code == 403
+
+    async def test_metrics_when_requested_without_token_should_return_422(self):
+        async with health_client() as client:
+            response = await client.get("/metrics")
+        assert response.status_code == 422
+
+
+class TestReadiness:
+    async def test_ready_when_application_not_started_should_return_503(self):
+        app.state.startup = app.state.db_probe = None
+        async with health_client() as client:
+            response = await client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+    async def test_ready_when_application_started_should_return_startup_profile(self):
+        async with app.router.lifespan_context(app), health_client() as client:
+            response = await client.get("/ready")
+        response_json = response.json()
+        assert response.status_code == 200
+        assert response_json["ready"] is True
+        assert {"engine", "schema_check", "workers"} <= set(
+            response_json["startup_steps_ms"]
+        )
+        assert response_json["startup_ms"] >= 0
+        assert response_json["database_reachable"] is True
+        assert response_json["pool"]["size"] >= 1
+
+
+class TestDatabaseProbe:
+    async def test_probe_should_query_database_once_per_ttl(self, db_url):
+        engine = create_engine(db_url)
+        queries = []
+        event.listen(
+            engine, "before_cursor_execute", lambda *args: queries.append(args[2])
+        )
+        probe = DatabaseProbe(engine, ttl=60)
+        assert await probe.reachable() is True
+        assert await probe.reachable() is True
+        assert queries == ["SELECT 1"]
+
+    async def test_probe_when_database_unreachable_should_return_false(self):
+        probe = DatabaseProbe(create_engine("sqlite:////nonexistent/dir/db"), ttl=0)
+        assert await probe.reachable() is False
+
+
+class TestPoolWarmUp:
+    def test_warm_up_pool_should_fill_pool_with_open_connections(self, db_url):
+        engine = create_engine(db_url, pool_size=5, max_overflow=0)
+        assert warm_up_pool(engine, 3) == 3
+        assert engine.pool.checkedin() == 3
@@ -2,6 +2,11 @@ import json
 
 import pytest
 
+from conf import get_settings
+from database.archive import archive_topic, get_archive_store
+from datastructures import RequesterData
+from http_cache import record_cache_tags
+from routers import topic_post_details
 from tests.conftest import Users
 
 
@@ -63,6 +68,101 @@ class TestPostList:
         )
 
 
+class TestPostFieldSelection:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_list_when_fields_selected_should_return_selected_fields_only(
+        self, bulk_create_posts, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/topics/1/posts/", params={"fields": "id,author"}
+        )
+        response_json = response.json()
+        assert response.status_code == 200
+        assert response_json["total"] == 15
+        assert all(set(post) == {"id", "author"} for post in response_json["data"])
+
+
+class TestPostQueryBudget:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_list_should_not_exceed_query_budget(
+        self,
+        bulk_create_posts,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        assert_max_queries,
+        hot_post_cache,
+    ):
+        with assert_max_queries(3):
+            await async_test_client.get("/topics/1/posts/")
+        with assert_max_queries(0):
+            await async_test_client.get("/topics/1/posts/")
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_details_should_not_exceed_query_budget(
+        self,
+        bulk_create_posts,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        assert_max_queries,
+    ):
+        with assert_max_queries(2):
+            response = await async_test_client.get("/posts/1/")
+        assert response.status_code == 200
+        with assert_max_queries(1):
+            await async_test_client.get("/posts/1/")
+
+
+class TestPostListHotCache:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_list_when_post_created_should_serve_it_from_cache(
+        self,
+        bulk_create_posts,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        hot_post_cache,
+    ):
+        hot_posts = hot_post_cache
+        await async_test_client.get("/topics/1/posts/")
+        response = await async_test_client.post(
+            "/topics/1/posts/", content=json.dumps({"content": "Hot off the press"})
+        )
+        post_id = response.json()["id"]
+        hits = hot_posts.stats()["hits"]
+        response = await async_test_client.get("/topics/1/posts/")
+        response_json = response.json()
+        assert hot_posts.stats()["hits"] == hits + 1
+        assert response_json["total"] == 16
+        assert response_json["data"][0]["id"] == post_id
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_MODERATOR], indirect=True
+    )
+    async def test_post_list_when_post_deleted_should_not_return_it(
+        self,
+        bulk_create_posts,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        hot_post_cache,
+    ):
+        response = await async_test_client.get("/topics/1/posts/")
+        post_id = response.json()["data"][0]["id"]
+        await async_test_client.delete(f"/posts/{post_id}/")
+        response = await async_test_client.get("/topics/1/posts/")
+        assert post_id not in [post["id"] for post in response.json()["data"]]
+
+
 class TestCreatePost:
     @pytest.mark.parametrize(
         "override_jwt_token, requesting_user, post_data_list",
@@ -168,6 +268,113 @@ class TestUpdatePost:
         assert response.status_code == 422
 
 
+@pytest.fixture
+def compressed_post_bodies(monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "POST_COMPRESSION_THRESHOLD", 100)
+    monkeypatch.setattr(get_settings(), "POST_PREVIEW_LENGTH", 20)
+
+
+class TestCompressedPostBody:
+    LONG_CONTENT = "A long post. " * 20
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_list_when_body_compressed_should_return_preview(
+        self,
+        create_single_topic,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        compressed_post_bodies,
+    ):
+        topic_id = create_single_topic.id
+        response = await async_test_client.post(
+            f"/topics/{topic_id}/posts/",
+            content=json.dumps({"content": self.LONG_CONTENT}),
+        )
+        post_id = response.json()["id"]
+        response = await async_test_client.get(f"/topics/{topic_id}/posts/")
+        post = next(p for p in response.json()["data"] if p["id"] == post_id)
+        assert post["content"] == self.LONG_CONTENT[:20]
+        assert post["truncated"] is True
+
+        response = await async_test_client.get(f"/posts/{post_id}/")
+        assert response.json()["content"] == self.LONG_CONTENT
+        assert response.json()["truncated"] is False
+
+    @pytest.mark.parametrize(
+        "override_jwt_token, create_single_post",
+        [[Users.TEST_BASIC_USER for _ in range(2)]],
+        indirect=["override_jwt_token", "create_single_post"],
+    )
+    async def test_update_post_when_body_compressed_should_keep_revision_and_body(
+        self,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        create_single_post,
+        compressed_post_bodies,
+    ):
+        post_id, original = create_single_post.id, create_single_post.content
+        for content in (self.LONG_CONTENT, "Short again."):
+            await async_test_client.patch(
+                f"/posts/{post_id}/", content=json.dumps({"content": content})
+            )
+        response = await async_test_client.get(f"/posts/{post_id}/")
+        assert response.json()["content"] == "Short again."
+        response = await async_test_client.get(f"/posts/{post_id}/revisions/")
+        assert [revision["content"] for revision in response.json()["data"]] == [
+            self.LONG_CONTENT,
+            original,
+        ]
+
+
+class TestPostRevisions:
+    @pytest.mark.parametrize(
+        "override_jwt_token, create_single_post",
+        [[Users.TEST_BASIC_USER for _ in range(2)]],
+        indirect=["override_jwt_token", "create_single_post"],
+    )
+    async def test_post_revisions_when_post_edited_should_return_previous_contents(
+        self, async_test_client, db_session, override_jwt_token, create_single_post
+    ):
+        post_id, original = create_single_post.id, create_single_post.content
+        for content in (original + " Edited once.", original + " Edited twice."):
+            await async_test_client.patch(
+                f"/posts/{post_id}/", content=json.dumps({"content": content})
+            )
+        response = await async_test_client.get(f"/posts/{post_id}/revisions/")
+        response_json = response.json()
+        assert response.status_code == 200
+        assert response_json["total"] == 2
+        assert [revision["content"] for revision in response_json["data"]] == [
+            original + " Edited once.",
+            original,
+        ]
+        assert response_json["data"][0]["edited_by"] == Users.TEST_BASIC_USER
+
+        response = await async_test_client.get(
+            f"/posts/{post_id}/revisions/", params={"page": 2, "size": 1}
+        )
+        assert [revision["content"] for revision in response.json()["data"]] == [
+            original
+        ]
+
+    @pytest.mark.parametrize(
+        "override_jwt_token, create_single_post",
+        [[Users.TEST_ANOTHER_BASIC_USER, Users.TEST_BASIC_USER]],
+        indirect=["override_jwt_token", "create_single_post"],
+    )
+    async def test_post_revisions_when_requested_by_another_basic_user_should_return_403(
+        self, async_test_client, db_session, override_jwt_token, create_single_post
+    ):
+        response = await async_test_client.get(
+            f"/posts/{create_single_post.id}/revisions/"
+        )
+        assert response.status_code == 403
+
+
 class TestPostDelete:
     @pytest.mark.parametrize(
         "override_jwt_token, create_single_post",
@@ -206,3 +413,107 @@ class TestPostDelete:
             response.json()["detail"]
             == f"User {requesting_user} does not have enough permission to perform this action!"
         )
+
+
+class TestPostReactions:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_reaction_should_count_each_user_kind_once(
+        self, create_single_post, async_test_client, db_session, override_jwt_token
+    ):
+        post_id = create_single_post.id
+        reaction = json.dumps({"kind": "like"})
+        first = await async_test_client.post(
+            f"/posts/{post_id}/reactions/", content=reaction
+        )
+        again = await async_test_client.post(
+            f"/posts/{post_id}/reactions/", content=reaction
+        )
+        response = await async_test_client.get(f"/posts/{post_id}/")
+        assert first.json() is True
+        assert again.json() is False
+        assert response.json()["reactions"] == {"like": 1}
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_reaction_when_removed_should_not_be_counted(
+        self, create_single_post, async_test_client, db_session, override_jwt_token
+    ):
+        post_id, topic_id = create_single_post.id, create_single_post.topic_id
+        await async_test_client.post(
+            f"/posts/{post_id}/reactions/", content=json.dumps({"kind": "laugh"})
+        )
+        response = await async_test_client.delete(f"/posts/{post_id}/reactions/laugh/")
+        assert response.json() is True
+        response = await async_test_client.get(f"/topics/{topic_id}/posts/")
+        assert response.json()["data"][0]["reactions"] == {}
+
+    async def test_post_details_when_reactions_served_should_not_be_conditional(
+        self, create_single_post, db_session
+    ):
+        post_id = create_single_post.id
+        requester_data = RequesterData(name="reader", groups=[])
+        with record_cache_tags() as cache_tags:
+            await topic_post_details(post_id, requester_data, None, db_session)
+        assert cache_tags.last_modified is None
+        with record_cache_tags() as cache_tags:
+            await topic_post_details(
+                post_id, requester_data, {"id", "content"}, db_session
+            )
+        assert cache_tags.last_modified is not None
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_reaction_when_post_missing_should_return_false(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.post(
+            "/posts/9999/reactions/", content=json.dumps({"kind": "like"})
+        )
+        assert response.json() is False
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_post_reaction_when_kind_unknown_should_return_422(
+        self, create_single_post, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.post(
+            f"/posts/{create_single_post.id}/reactions/",
+            content=json.dumps({"kind": "meh"}),
+        )
+        assert response.status_code == 422
+
+
+class TestArchivedTopicPosts:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_archived_topic_posts_should_be_served_read_only(
+        self,
+        create_single_post,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        tmp_path,
+        monkeypatch,
+    ):
+        monkeypatch.setattr(get_settings(), "ARCHIVE_DIRECTORY", str(tmp_path))
+        monkeypatch.setattr(get_settings(), "ARCHIVE_SHARED_STORAGE", True)
+        get_archive_store.cache_clear()
+        post_id, topic_id = create_single_post.id, create_single_post.topic_id
+        archive_topic(db_session, topic_id, tmp_path, 10)
+        listed = await async_test_client.get(f"/topics/{topic_id}/posts/")
+        created = await async_test_client.post(
+            f"/topics/{topic_id}/posts/", content=json.dumps({"content": "Late"})
+        )
+        topic = await async_test_client.get(f"/topics/{topic_id}/")
+        get_archive_store().close()
+        get_archive_store.cache_clear()
+        assert listed.json()["total"] == 1
+        assert listed.json()["data"][0]["id"] == post_id
+        assert created.status_code == 409
+        assert topic.json()["archived_at"] is not None
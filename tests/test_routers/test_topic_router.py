@@ -1,7 +1,9 @@
 import json
 
 import pytest
+from sqlalchemy import func, select
 
+from database.models import Topic
 from tests.conftest import Users
 
 
@@ -63,6 +65,89 @@ class TestTopicList:
         )
 
 
+class TestTopicListCompression:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_topic_list_when_client_accepts_gzip_should_return_compressed_body(
+        self, bulk_create_topics, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/topics/", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(response.content)
+
+
+class TestTopicFieldSelection:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_topic_list_when_fields_selected_should_return_selected_fields_only(
+        self, bulk_create_topics, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/topics/", params={"fields": "id,title"}
+        )
+        response_json = response.json()
+        assert response.status_code == 200
+        assert response_json["total"] == 20
+        assert all(set(topic) == {"id", "title"} for topic in response_json["data"])
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_topic_details_when_fields_selected_should_return_selected_fields_only(
+        self, bulk_create_topics, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get("/topics/1/", params={"fields": "title"})
+        assert response.status_code == 200
+        assert set(response.json()) == {"title"}
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_topic_list_when_unknown_fields_selected_should_return_400(
+        self, bulk_create_topics, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/topics/", params={"fields": "id,password"}
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Unknown fields requested: password"
+
+
+class TestTopicListWithLatestPosts:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_topic_list_with_latest_posts_should_return_latest_posts_per_topic(
+        self, bulk_create_posts, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/topics/latest-posts/", params={"posts": 4}
+        )
+        response_json = response.json()
+        assert response.status_code == 200
+        assert response_json["total"] == 3
+        for topic in response_json["data"]:
+            posted_on = [post["posted_on"] for post in topic["posts"]]
+            assert len(posted_on) == 4
+            assert posted_on == sorted(posted_on, reverse=True)
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_topic_list_with_latest_posts_when_posts_out_of_range_should_return_422(
+        self, bulk_create_posts, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/topics/latest-posts/", params={"posts": 50}
+        )
+        assert response.status_code == 422
+
+
 class TestTopicDetails:
     @pytest.mark.parametrize(
         "override_jwt_token",
@@ -84,6 +169,33 @@ class TestTopicDetails:
         assert response.status_code == 422
 
 
+class TestTopicQueryBudget:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    @pytest.mark.parametrize(
+        "path, budget",
+        [
+            ("/topics/", 2),
+            ("/topics/1/", 1),
+            ("/topics/latest-posts/", 3),
+        ],
+    )
+    async def test_topic_routes_should_not_exceed_query_budget(
+        self,
+        bulk_create_posts,
+        async_test_client,
+        db_session,
+        override_jwt_token,
+        assert_max_queries,
+        path,
+        budget,
+    ):
+        with assert_max_queries(budget):
+            response = await async_test_client.get(path)
+        assert response.status_code == 200
+
+
 class TestCreateTopic:
     @pytest.mark.parametrize(
         "override_jwt_token, requesting_user, topic_data_list",
@@ -118,6 +230,58 @@ class TestCreateTopic:
         assert response.status_code == 422
 
 
+class TestCreateTopicIdempotency:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_create_topic_when_retried_with_same_key_should_replay_response(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        data = json.dumps({"title": "Retried topic", "category": "Retries"})
+        headers = {"Idempotency-Key": "create-topic-1"}
+        first = await async_test_client.post("/topics/", content=data, headers=headers)
+        retry = await async_test_client.post("/topics/", content=data, headers=headers)
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert (
+            db_session.scalar(
+                select(func.count()).where(Topic.title == "Retried topic")
+            )
+            == 1
+        )
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_create_topic_when_key_reused_with_other_payload_should_return_422(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        headers = {"Idempotency-Key": "create-topic-2"}
+        await async_test_client.post(
+            "/topics/",
+            content=json.dumps({"title": "First", "category": "Retries"}),
+            headers=headers,
+        )
+        response = await async_test_client.post(
+            "/topics/",
+            content=json.dumps({"title": "Second", "category": "Retries"}),
+            headers=headers,
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_create_topic_when_no_key_should_create_each_time(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        data = json.dumps({"title": "Not idempotent", "category": "Retries"})
+        first = await async_test_client.post("/topics/", content=data)
+        second = await async_test_client.post("/topics/", content=data)
+        assert first.json()["id"] != second.json()["id"]
+
+
 class TestUpdateTopic:
     @pytest.mark.parametrize(
         "override_jwt_token, requesting_user, create_single_topic",
@@ -227,3 +391,14 @@ class TestDeleteTopic:
         response = await async_test_client.delete(f"/topics/{create_single_topic.id}/")
         assert response.status_code == 200
         assert response.json() is True
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_MODERATOR], indirect=True
+    )
+    async def test_delete_topic_should_hide_object_from_topic_list(
+        self, async_test_client, db_session, override_jwt_token, create_single_topic
+    ):
+        topic_id = create_single_topic.id
+        await async_test_client.delete(f"/topics/{topic_id}/")
+        response = await async_test_client.get("/topics/", params={"size": 100})
+        assert topic_id not in [topic["id"] for topic in response.json()["data"]]
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from conf import get_settings
+from database.archive import archive_topic, get_archive_store
+from tests.conftest import Users
+
+
+async def create_posts(async_test_client, topic_id: int, n: int) -> list:
+    post_ids = []
+    for i in range(n):
+        response = await async_test_client.post(
+            f"/topics/{topic_id}/posts/", content=json.dumps({"content": f"Post {i}"})
+        )
+        post_ids.append(response.json()["id"])
+    return post_ids
+
+
+class TestUserPosts:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_ANOTHER_BASIC_USER], indirect=True
+    )
+    async def test_user_posts_should_walk_pages_most_recent_first(
+        self, create_single_topic, async_test_client, db_session, override_jwt_token
+    ):
+        topic_id = create_single_topic.id
+        post_ids = await create_posts(async_test_client, topic_id, 5)
+        seen, cursor = [], None
+        while True:
+            params = {"size": 2} | ({"cursor": cursor} if cursor else {})
+            response = await async_test_client.get(
+                f"/users/{Users.TEST_ANOTHER_BASIC_USER}/posts/", params=params
+            )
+            response_json = response.json()
+            assert response.status_code == 200
+            assert response_json["total"] == 5
+            seen += [post["id"] for post in response_json["data"]]
+            if (cursor := response_json["next_cursor"]) is None:
+                break
+        assert seen == post_ids[::-1]
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_MODERATOR], indirect=True
+    )
+    async def test_user_posts_when_post_deleted_should_decrease_total(
+        self, create_single_topic, async_test_client, db_session, override_jwt_token
+    ):
+        post_ids = await create_posts(async_test_client, create_single_topic.id, 2)
+        await async_test_client.delete(f"/posts/{post_ids[0]}/")
+        response = await async_test_client.get(f"/users/{Users.TEST_MODERATOR}/posts/")
+        response_json = response.json()
+        assert response_json["total"] == 1
+        assert [post["id"] for post in response_json["data"]] == post_ids[1:]
+        assert response_json["next_cursor"] is None
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_user_posts_when_author_never_posted_should_return_empty_page(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get("/users/nobody/posts/")
+        assert response.json() == {
+            "total": 0,
+            "size": 10,
+            "next_cursor": None,
+            "data": [],
+        }
+
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_BASIC_USER], indirect=True
+    )
+    async def test_user_posts_when_cursor_invalid_should_return_422(
+        self, async_test_client, db_session, override_jwt_token
+    ):
+        response = await async_test_client.get(
+            "/users/nobody/posts/", params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 422
+
+
+class TestUserPostsOfArchivedTopics:
+    @pytest.mark.parametrize(
+        "override_jwt_token", [Users.TEST_MODERATOR], indirect=True
+    )
+    async def test_user_posts_should_count_archived_posts_without_listing_them(
+        self, async_test_client, db_session, override_jwt_token, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "ARCHIVE_DIRECTORY", str(tmp_path))
+        monkeypatch.setattr(get_settings(), "ARCHIVE_SHARED_STORAGE", True)
+        get_archive_store.cache_clear()
+        topic_ids = [
+            (
+                await async_test_client.post(
+                    "/topics/",
+                    content=json.dumps({"title": f"Topic {i}", "category": "user"}),
+                )
+            ).json()["id"]
+            for i in range(2)
+        ]
+        await create_posts(async_test_client, topic_ids[0], 2)
+        post_ids = await create_posts(async_test_client, topic_ids[1], 1)
+        archive_topic(db_session, topic_ids[0], tmp_path, 10)
+        response = await async_test_client.get(f"/users/{Users.TEST_MODERATOR}/posts/")
+        get_archive_store().close()
+        get_archive_store.cache_clear()
+        response_json = response.json()
+        assert response_json["total"] == 3
+        assert [post["id"] for post in response_json["data"]] == post_ids
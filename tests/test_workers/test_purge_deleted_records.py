@@ -0,0 +1,138 @@
+import pytest
+from sqlalchemy import select
+
+from conf import get_settings
+from database.changes import changes_since
+from database.crud_factory import POST_DEPENDENTS, PostCRUD, TopicCRUD
+from database.models import Post, PostReaction, PostReactionCount, Topic
+from datastructures import PageParams, RequesterData
+from schemas import PaginatedResponse
+from workers import purge_deleted_records
+
+
+@pytest.fixture
+def topic_with_posts(get_faker, db_session) -> Topic:
+    fake = get_faker
+    topic_obj = Topic(
+        title=fake.sentence(), category=fake.word(), created_by=fake.first_name()
+    )
+    topic_obj.posts = [
+        Post(content=fake.text(), author=fake.first_name()) for _ in range(5)
+    ]
+    db_session.add(topic_obj)
+    db_session.commit()
+    return topic_obj
+
+
+@pytest.mark.usefixtures("no_tombstone_retention")
+class TestPurgeDeletedRecords:
+    def test_purge_when_posts_soft_deleted_should_only_remove_deleted_posts(
+        self, db_session, topic_with_posts
+    ):
+        topic_id = topic_with_posts.id
+        deleted_ids = [post.id for post in topic_with_posts.posts[:2]]
+        for post_obj in topic_with_posts.posts[:2]:
+            PostCRUD.delete(db_session, post_obj)
+
+        purged = purge_deleted_records(batch_size=1, session_factory=lambda: db_session)
+
+        remaining_ids = db_session.scalars(
+            select(Post.id).where(Post.topic_id == topic_id)
+        ).all()
+        assert purged == 2
+        assert not set(deleted_ids) & set(remaining_ids)
+        assert len(remaining_ids) == 3
+
+    def test_purge_when_topic_soft_deleted_should_remove_topic_and_its_posts(
+        self, db_session, topic_with_posts
+    ):
+        topic_id = topic_with_posts.id
+        TopicCRUD.delete(db_session, topic_with_posts)
+        assert TopicCRUD.get_one(db_session, topic_id) is None
+
+        purged = purge_deleted_records(batch_size=2, session_factory=lambda: db_session)
+
+        assert purged == 6
+        assert db_session.get(Topic, topic_id) is None
+        assert not db_session.scalars(
+            select(Post.id).where(Post.topic_id == topic_id)
+        ).all()
+
+    def test_purge_when_nothing_deleted_should_keep_records(
+        self, db_session, topic_with_posts
+    ):
+        topic_id = topic_with_posts.id
+        purged = purge_deleted_records(
+            batch_size=10, session_factory=lambda: db_session
+        )
+        assert purged == 0
+        assert TopicCRUD.get_one(db_session, topic_id) is not None
+
+    def test_purge_and_hard_delete_should_remove_dependent_rows(
+        self, db_session, topic_with_posts, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "POST_COMPRESSION_THRESHOLD", 100)
+        monkeypatch.setattr(get_settings(), "POST_PREVIEW_LENGTH", 20)
+        moderator = RequesterData(name="moderator", groups=["moderator"])
+        post_ids = [post.id for post in topic_with_posts.posts[:3]]
+        for post_id in post_ids:
+            PostCRUD.update_if_permitted(
+                db_session, post_id, {"content": "An edited post. " * 20}, moderator
+            )
+            db_session.add(PostReaction(post_id=post_id, reacted_by="fan", kind="like"))
+            db_session.add(PostReactionCount(post_id=post_id, kind="like", count=1))
+        db_session.commit()
+
+        PostCRUD.delete_if_permitted(db_session, post_ids[0], moderator)
+        purge_deleted_records(batch_size=10, session_factory=lambda: db_session)
+        monkeypatch.setattr(get_settings(), "SOFT_DELETE", False)
+        PostCRUD.delete_if_permitted(db_session, post_ids[1], moderator)
+        PostCRUD.delete(db_session, PostCRUD.get_one(db_session, post_ids[2]))
+
+        for model in POST_DEPENDENTS:
+            assert not db_session.scalars(
+                select(model.post_id).where(model.post_id.in_(post_ids))
+            ).all(), model.__name__
+
+    def test_topic_delete_and_purge_should_invalidate_hot_post_cache(
+        self, db_session, topic_with_posts, hot_post_cache
+    ):
+        topic_id = topic_with_posts.id
+        page_params = PageParams(size=len(topic_with_posts.posts))
+        page = PaginatedResponse(
+            total=len(topic_with_posts.posts),
+            page=1,
+            size=page_params.size,
+            data=topic_with_posts.posts,
+        )
+        hot_post_cache.store_page(
+            topic_id, page_params, page, hot_post_cache.generation(topic_id)
+        )
+        TopicCRUD.delete(db_session, topic_with_posts)
+        assert hot_post_cache.get_page(topic_id, page_params) is None
+
+        hot_post_cache.store_page(
+            topic_id, page_params, page, hot_post_cache.generation(topic_id)
+        )
+        purge_deleted_records(batch_size=10, session_factory=lambda: db_session)
+        assert hot_post_cache.get_page(topic_id, page_params) is None
+
+
+class TestTombstoneRetention:
+    def test_purge_when_tombstone_retained_should_keep_and_sync_deletion(
+        self, db_session, topic_with_posts, monkeypatch
+    ):
+        monkeypatch.setattr(get_settings(), "TOMBSTONE_RETENTION_DAYS", 30)
+        post_id = topic_with_posts.posts[0].id
+        token = changes_since(db_session, "0.0", 1000).token
+        PostCRUD.delete(db_session, topic_with_posts.posts[0])
+
+        purged = purge_deleted_records(
+            batch_size=10, session_factory=lambda: db_session
+        )
+
+        changes = changes_since(db_session, token, 1000)
+        assert purged == 0
+        assert db_session.get(Post, post_id) is not None
+        assert changes.reset is False
+        assert changes.deleted_posts == [post_id]